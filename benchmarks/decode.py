@@ -0,0 +1,61 @@
+"""Compare validated and trusted model decoding of donate pages
+
+Run with ``python benchmarks/decode.py``.
+"""
+import timeit
+
+from donatello.models import DonateList, LongpoolDonate, decode_trusted
+
+PER_PAGE = 100
+ROUNDS = 200
+
+
+def donate(i: int) -> dict:
+    return {
+        "pubId": f"D{i:08d}",
+        "clientName": f"client_{i % 50}",
+        "message": "Thanks for the stream!",
+        "amount": 10 + i % 1000,
+        "currency": "UAH",
+        "goal": "",
+        "isPublished": True,
+        "createdAt": f"2023-05-01 12:{i // 60 % 60:02d}:{i % 60:02d}",
+    }
+
+
+PAGE = {
+    "content": [donate(i) for i in range(PER_PAGE)],
+    "page": 0,
+    "size": PER_PAGE,
+    "num": PER_PAGE,
+    "first": True,
+    "last": False,
+    "total": PER_PAGE * 10,
+}
+
+LONGPOOL = {
+    "clientName": "client", "message": "Hi", "amount": "100", "currency": "UAH",
+    "source": "site", "image": "", "sound": "", "video": "", "interactionMedia": "",
+    "interactionMediaStartTime": "", "goalWidgetName": "", "manuallyApproved": False,
+    "ban": False, "isPublished": True, "createdAt": "2023-05-01 12:00:00",
+    "isSubscription": False, "uploadedVoice": "", "name": "client",
+}
+
+
+def bench(name: str, validated, trusted, rounds: int) -> None:
+    assert validated() == trusted()
+    slow = min(timeit.repeat(validated, number=rounds, repeat=7))
+    fast = min(timeit.repeat(trusted, number=rounds, repeat=7))
+    print(f"{name:<16} validated {slow / rounds * 1e6:9.1f} us"
+          f"  trusted {fast / rounds * 1e6:9.1f} us  x{slow / fast:.1f}")
+
+
+if __name__ == "__main__":
+    bench(f"DonateList[{PER_PAGE}]",
+          lambda: DonateList(**PAGE),
+          lambda: decode_trusted(DonateList, PAGE),
+          ROUNDS)
+    bench("LongpoolDonate",
+          lambda: LongpoolDonate(**LONGPOOL),
+          lambda: decode_trusted(LongpoolDonate, LONGPOOL),
+          ROUNDS * 100)
@@ -0,0 +1,221 @@
+"""End-to-end benchmarks against the bundled mock server
+
+Runs the clients over real local HTTP connections to
+:class:`donatello.testing.MockServer`, no network access is needed. Run with
+``python benchmarks/end_to_end.py [--quick] [section ...]``, sections are
+``throughput``, ``latency``, ``memory``, ``decode`` and ``fanout``.
+"""
+import argparse
+import asyncio
+import gc
+import logging
+import statistics
+import threading
+import time
+import tracemalloc
+
+from donatello import AsyncDonatello, AsyncSupervisor, BulkFetcher, Donatello, PollingPolicy
+from donatello.testing import MockServer
+
+QUIET = logging.ERROR
+
+
+def percentiles(samples: list) -> str:
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return (f"p50 {statistics.median(samples) * 1000:7.2f} ms"
+            f"  p99 {cuts[98] * 1000:7.2f} ms  max {max(samples) * 1000:7.2f} ms")
+
+
+def rate(name: str, count: int, elapsed: float) -> None:
+    print(f"  {name:<38} {count / elapsed:9.0f} req/s  ({count} in {elapsed:.2f} s)")
+
+
+def throughput(scale: int) -> None:
+    print("Throughput, get_me with 1 ms server latency")
+    requests = 200 * scale
+    with MockServer(latency=0.001, seed=1) as server:
+        client = Donatello("token", connection=server.connection(), logging_level=QUIET)
+        started = time.perf_counter()
+        for _ in range(requests):
+            client.get_me()
+        rate("Donatello, sequential", requests, time.perf_counter() - started)
+        client.close()
+
+    async def run(concurrency: int) -> None:
+        async with MockServer(latency=0.001, seed=1) as server:
+            client = AsyncDonatello("token", connection=server.connection(pool_size=concurrency),
+                                    logging_level=QUIET)
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def call() -> None:
+                async with semaphore:
+                    await client.get_me()
+
+            started = time.perf_counter()
+            await asyncio.gather(*(call() for _ in range(requests * 5)))
+            rate(f"AsyncDonatello, {concurrency} concurrent", requests * 5, time.perf_counter() - started)
+            await client.close()
+
+    for concurrency in (10, 100):
+        asyncio.run(run(concurrency))
+
+
+def latency(scale: int) -> None:
+    print("Alert latency, donate injected on the server to listener called")
+    alerts = 100 * scale
+
+    # Long polling requests are held by the server until a donate arrives
+    async def supervised(widgets: int) -> None:
+        samples = []
+        with MockServer(hold=1, seed=2) as server:
+            supervisor = AsyncSupervisor(concurrency=widgets, connection=server.connection(),
+                                         polling_policy=PollingPolicy(0), logging_level=QUIET)
+            for index in range(widgets):
+                supervisor.add_widget("token", f"widget_{index}")
+
+            @supervisor.on_donate
+            async def on_donate(donate) -> None:
+                samples.append(time.perf_counter() - float(donate.message))
+
+            polling = asyncio.ensure_future(supervisor.run())
+            await asyncio.sleep(0.2)
+            for index in range(alerts):
+                server.inject(f"widget_{index % widgets}", message=repr(time.perf_counter()))
+                await asyncio.sleep(0.005)
+            await asyncio.sleep(0.5)
+            supervisor.stop()
+            await polling
+        print(f"  {f'AsyncSupervisor, {widgets} widgets':<38} {percentiles(samples)}  ({len(samples)} alerts)")
+
+    for widgets in (1, 100):
+        asyncio.run(supervised(widgets))
+
+    # Sync long polling asks every interval, latency is bounded by it
+    samples = []
+    arrived = threading.Event()
+    with MockServer(seed=2) as server:
+        client = Donatello("token", "widget", connection=server.connection(),
+                           longpool_timeout=0.05, logging_level=QUIET)
+
+        @client.on_donate
+        def on_donate(donates) -> None:
+            samples.append(time.perf_counter() - float(donates[0].message))
+            arrived.set()
+
+        client.start()
+        for _ in range(alerts // 5):
+            arrived.clear()
+            server.inject("widget", message=repr(time.perf_counter()))
+            arrived.wait(5)
+        client.stop()
+    print(f"  {'Donatello, 50 ms polling interval':<38} {percentiles(samples)}  ({len(samples)} alerts)")
+
+
+def traced(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return used
+
+
+def memory(scale: int) -> None:
+    print("Memory per widget, traced allocations")
+    widgets = 1000 * scale
+    server = MockServer(history=0)
+
+    def supervisor() -> AsyncSupervisor:
+        runner = AsyncSupervisor(connection=server.connection(), logging_level=QUIET)
+        for index in range(widgets):
+            runner.add_widget(f"token_{index}", f"widget_{index}")
+        return runner
+
+    used = traced(supervisor)
+    print(f"  {f'AsyncSupervisor, {widgets} widgets':<38} {used / widgets:9.0f} B/widget")
+
+    clients = 50 * scale
+    used = traced(lambda: [Donatello(f"token_{index}", f"widget_{index}", connection=server.connection(),
+                                     logging_level=QUIET) for index in range(clients)])
+    print(f"  {f'Donatello per widget, {clients} widgets':<38} {used / clients:9.0f} B/widget")
+
+    async def async_clients() -> int:
+        built = []
+        used = traced(lambda: built.extend(
+            AsyncDonatello(f"token_{index}", f"widget_{index}", connection=server.connection(),
+                           logging_level=QUIET) for index in range(clients)))
+        for client in built:
+            await client.close()
+        return used
+
+    used = asyncio.run(async_clients())
+    print(f"  {f'AsyncDonatello per widget, {clients} widgets':<38} {used / clients:9.0f} B/widget")
+
+
+def decode(scale: int) -> None:
+    print("Decode, donates pages of 100 through the client")
+    pages = 20 * scale
+    with MockServer(history=pages * 100, seed=3) as server:
+        for trusted in (False, True):
+            client = Donatello("token", connection=server.connection(), trusted=trusted, logging_level=QUIET)
+            started = time.perf_counter()
+            for page in range(pages):
+                client.get_donates(page=page, per_page=100)
+            elapsed = time.perf_counter() - started
+            name = f"get_donates, {'trusted' if trusted else 'validated'}"
+            print(f"  {name:<38} {elapsed / pages * 1000:9.2f} ms/page")
+            client.close()
+
+        client = Donatello("token", connection=server.connection(), trusted=True, logging_level=QUIET)
+        started = time.perf_counter()
+        count = sum(1 for _ in client.stream_donates(per_page=100))
+        elapsed = time.perf_counter() - started
+        print(f"  {'stream_donates, trusted':<38} {elapsed / (count / 100) * 1000:9.2f} ms/page")
+        client.close()
+
+
+def fanout(scale: int) -> None:
+    print("Fan-out, get_me for many tokens with 20 ms server latency")
+    tokens = [f"token_{index}" for index in range(100 * scale)]
+    with MockServer(latency=0.02, history=100, seed=4) as server:
+        started = time.perf_counter()
+        for token in tokens[:len(tokens) // 10]:
+            client = Donatello(token, connection=server.connection(), logging_level=QUIET)
+            client.get_me()
+            client.close()
+        rate("Donatello, one token after another", len(tokens) // 10, time.perf_counter() - started)
+
+    async def run(concurrency: int) -> None:
+        async with MockServer(latency=0.02, history=100, seed=4) as server:
+            async with BulkFetcher(concurrency, connection=server.connection(), logging_level=QUIET) as bulk:
+                started = time.perf_counter()
+                failed = [item async for item in bulk.get_me(tokens) if not item.ok]
+                rate(f"BulkFetcher, {concurrency} concurrent", len(tokens), time.perf_counter() - started)
+                assert not failed, failed[0].error
+
+    for concurrency in (10, 100):
+        asyncio.run(run(concurrency))
+
+
+SECTIONS = {
+    "throughput": throughput,
+    "latency": latency,
+    "memory": memory,
+    "decode": decode,
+    "fanout": fanout,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sections", nargs="*", metavar="section",
+                        help=f"One of {', '.join(SECTIONS)}, all by default")
+    parser.add_argument("--quick", action="store_true", help="Smaller runs for CI")
+    args = parser.parse_args()
+    unknown = set(args.sections) - set(SECTIONS)
+    if unknown:
+        parser.error(f"unknown sections: {', '.join(sorted(unknown))}")
+    for section in args.sections or SECTIONS:
+        SECTIONS[section](1 if args.quick else 5)
@@ -0,0 +1,41 @@
+"""Measure cold import time of the package
+
+Every statement runs in a fresh interpreter, the interpreter start-up
+measured with ``pass`` is subtracted. Run with
+``python benchmarks/import_time.py [rounds]``.
+"""
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = [
+    "import donatello",
+    "from donatello import Donatello",
+    "from donatello import AsyncDonatello",
+    "from donatello import Donatello; Donatello('token', 'widget_id')",
+    "from donatello.models import Donate",
+]
+
+# Prints the wall time of the statement measured inside the child
+TEMPLATE = "import time; t = time.perf_counter(); {}; print(time.perf_counter() - t)"
+
+
+def measure(statement: str, rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        out = subprocess.run([sys.executable, "-c", TEMPLATE.format(statement)],
+                             check=True, capture_output=True, text=True).stdout
+        samples.append(float(out.split()[-1]))
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+    # Warm up bytecode caches
+    measure("; ".join(STATEMENTS), 1)
+    for statement in STATEMENTS:
+        print(f"{measure(statement, rounds):8.1f} ms  {statement}")
+
+
+if __name__ == "__main__":
+    main()
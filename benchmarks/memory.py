@@ -0,0 +1,37 @@
+"""Compare memory of Donate models and CompactDonates
+
+Run with ``python benchmarks/memory.py [count]``.
+"""
+import sys
+import tracemalloc
+
+from donatello.models import CompactDonates, Donate, decode_trusted
+
+
+def payload(i: int) -> dict:
+    # Strings are built per record like a decoded JSON response
+    return {
+        "pubId": f"D{i:08d}",
+        "clientName": "".join(("client_", str(i % 500))),
+        "message": f"Thanks for the stream #{i}",
+        "amount": 10 + i % 1000,
+        "currency": "".join(("UA", "H")),
+        "isPublished": True,
+        "createdAt": f"2023-05-{1 + i // 86400 % 28:02d} {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}",
+    }
+
+
+def measure(name: str, build, count: int) -> None:
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<16} {size / 2 ** 20:8.1f} MiB  {size / count:7.0f} B/donate")
+    return result
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    measure("list[Donate]", lambda: [decode_trusted(Donate, payload(i)) for i in range(count)], count)
+    measure("CompactDonates", lambda: CompactDonates(
+        decode_trusted(Donate, payload(i)) for i in range(count)), count)
@@ -0,0 +1,59 @@
+"""Compare peak memory and time of whole-page and streaming page decoding
+
+Decodes an in-memory response body the way ``get_donates`` and
+``stream_donates`` do. Run with ``python benchmarks/streaming.py [per_page]``.
+"""
+import json
+import sys
+import time
+import tracemalloc
+
+from donatello.models import Donate, DonateList, decode_trusted
+from donatello.streaming import CHUNK_SIZE, PageParser, loads
+
+
+def body(count: int) -> bytes:
+    return json.dumps({
+        "content": [{
+            "pubId": f"D{i:08d}", "clientName": f"client_{i % 500}",
+            "message": f"Thanks for the stream #{i}", "amount": 10 + i % 1000,
+            "currency": "UAH", "isPublished": True, "createdAt": "2023-05-01 12:00:00",
+        } for i in range(count)],
+        "page": 0, "size": count, "num": count, "first": True, "last": True, "total": count,
+    }).encode()
+
+
+def whole(raw: bytes) -> int:
+    # requests' resp.text followed by json.loads
+    page = decode_trusted(DonateList, json.loads(raw.decode()))
+    return sum(donate.amount for donate in page)
+
+
+def streamed(raw: bytes) -> int:
+    parser = PageParser()
+    total = 0
+    for start in range(0, len(raw), CHUNK_SIZE):
+        for item in parser.feed(raw[start:start + CHUNK_SIZE]):
+            total += decode_trusted(Donate, item).amount
+    parser.close()
+    return total
+
+
+def measure(name: str, decode, raw: bytes) -> None:
+    # Tracing allocations slows decoding down, time is measured separately
+    started = time.perf_counter()
+    decode(raw)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    decode(raw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<10} {peak / 2 ** 20:8.1f} MiB peak  {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    per_page = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    raw = body(per_page)
+    print(f"{per_page} donates, {len(raw) / 2 ** 20:.1f} MiB body, loads={loads.__module__}")
+    measure("whole", whole, raw)
+    measure("streamed", streamed, raw)
@@ -0,0 +1,45 @@
+"""Compare strptime with the shared timestamp parser
+
+Run with ``python benchmarks/timestamps.py``.
+"""
+import timeit
+from datetime import datetime as Datetime
+
+from donatello.models import DonateList, decode_trusted, parse_datetime, parse_datetimes
+from donatello.models.timestamps import DATETIME_FORMAT, _parse
+
+PER_PAGE = 100
+ROUNDS = 200
+
+# A raid: many donates share the same second
+VALUES = [f"2023-05-01 12:{i // 600 % 60:02d}:{i // 10 % 60:02d}" for i in range(PER_PAGE)]
+
+PAGE = {
+    "content": [{
+        "pubId": f"D{i:08d}", "clientName": f"client_{i % 50}", "message": "Hi",
+        "amount": 10 + i, "currency": "UAH", "isPublished": True, "createdAt": value,
+    } for i, value in enumerate(VALUES)],
+    "page": 0, "size": PER_PAGE, "num": PER_PAGE, "first": True, "last": False, "total": PER_PAGE,
+}
+
+
+def bench(name: str, func) -> float:
+    elapsed = min(timeit.repeat(func, number=ROUNDS, repeat=3)) / ROUNDS
+    print(f"{name:<28} {elapsed * 1e6:9.1f} us per page")
+    return elapsed
+
+
+def uncached() -> None:
+    _parse.cache_clear()
+    for value in VALUES:
+        parse_datetime(value)
+
+
+if __name__ == "__main__":
+    assert [Datetime.strptime(value, DATETIME_FORMAT) for value in VALUES] == parse_datetimes(VALUES)
+    base = bench("strptime", lambda: [Datetime.strptime(value, DATETIME_FORMAT) for value in VALUES])
+    bench("parse_datetime (cold cache)", uncached)
+    bench("parse_datetime (warm cache)", lambda: [parse_datetime(value) for value in VALUES])
+    bench("parse_datetimes", lambda: parse_datetimes(VALUES))
+    bench(f"DonateList[{PER_PAGE}] validated", lambda: DonateList(**PAGE))
+    bench(f"DonateList[{PER_PAGE}] trusted", lambda: decode_trusted(DonateList, PAGE))
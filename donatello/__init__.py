@@ -1,9 +1,97 @@
-from .async_client import AsyncDonatello
-from .base import BaseClient
-from .client import Donatello
-from .events import AsyncEventHandler, EventHandler
-from .models import (Client, ClientList, Donate, DonateList, LongpoolDonate,
-                     User, UserDonates)
+"""Donatello API wrapper
+
+Public names are imported on first access, so ``import donatello`` stays
+cheap and pydantic, requests and aiohttp are only loaded when used.
+"""
+from importlib import import_module
+from typing import TYPE_CHECKING
 
 __version__ = "1.0.2"
-__author__ = "hampta"
\ No newline at end of file
+__author__ = "hampta"
+
+# Public name -> submodule it is defined in
+_LAZY = {
+    "AsyncDonatello": ".async_client",
+    "BaseClient": ".base",
+    "AsyncDonateBatcher": ".batching",
+    "DonateBatcher": ".batching",
+    "BulkError": ".bulk",
+    "BulkFetcher": ".bulk",
+    "BulkResult": ".bulk",
+    "ResponseCache": ".cache",
+    "Donatello": ".client",
+    "ConnectionOptions": ".connection",
+    "DonateDeduplicator": ".dedup",
+    "AsyncEventHandler": ".events",
+    "EventHandler": ".events",
+    "HandlerStats": ".events",
+    "ThreadedEventHandler": ".events",
+    "EventJournal": ".journal",
+    "GoalProgress": ".leaderboard",
+    "Leaderboard": ".leaderboard",
+    "Histogram": ".metrics",
+    "Metrics": ".metrics",
+    "Client": ".models",
+    "ClientList": ".models",
+    "Donate": ".models",
+    "DonateList": ".models",
+    "LongpoolDonate": ".models",
+    "User": ".models",
+    "UserDonates": ".models",
+    "AdaptivePolling": ".polling",
+    "PollingPolicy": ".polling",
+    "PollingStats": ".polling",
+    "Priority": ".ratelimit",
+    "RateLimiter": ".ratelimit",
+    "DonateRates": ".rates",
+    "CircuitBreaker": ".retry",
+    "CircuitOpenError": ".retry",
+    "RetryPolicy": ".retry",
+    "HashRing": ".sharding",
+    "ShardedRunner": ".sharding",
+    "DonateStore": ".store",
+    "PageParser": ".streaming",
+    "AsyncSupervisor": ".supervisor",
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    # Cache on the package, later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from .async_client import AsyncDonatello
+    from .base import BaseClient
+    from .batching import AsyncDonateBatcher, DonateBatcher
+    from .bulk import BulkError, BulkFetcher, BulkResult
+    from .cache import ResponseCache
+    from .client import Donatello
+    from .connection import ConnectionOptions
+    from .dedup import DonateDeduplicator
+    from .events import (AsyncEventHandler, EventHandler, HandlerStats,
+                         ThreadedEventHandler)
+    from .journal import EventJournal
+    from .leaderboard import GoalProgress, Leaderboard
+    from .metrics import Histogram, Metrics
+    from .models import (Client, ClientList, Donate, DonateList, LongpoolDonate,
+                         User, UserDonates)
+    from .polling import AdaptivePolling, PollingPolicy, PollingStats
+    from .ratelimit import Priority, RateLimiter
+    from .rates import DonateRates
+    from .retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+    from .sharding import HashRing, ShardedRunner
+    from .store import DonateStore
+    from .streaming import PageParser
+    from .supervisor import AsyncSupervisor
@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 try:
     import ujson as json  # type: ignore # noqa
 except ImportError:
@@ -5,13 +7,26 @@ except ImportError:
 
 import asyncio
 import logging
+import time
+from collections import deque
+from math import ceil
+from urllib.parse import urlsplit
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Union
 
+from . import models
 from .base import BaseClient
-from .models import ClientList, DonateList, LongpoolDonate, User
+from .connection import ConnectionOptions
+from .dedup import DonateDeduplicator
+from .events import AsyncEventHandler
+from .journal import EventJournal
+from .metrics import Metrics
+from .polling import PollingPolicy
+from .ratelimit import Priority, RateLimiter
+from .retry import CircuitBreaker, RetryPolicy, transient_errors
+from .streaming import CHUNK_SIZE, PageParser
 
-logging.basicConfig(
-    format="[%(asctime)s] %(levelname)s: %(message)s", level=logging.INFO)
-logging.getLogger("requests").setLevel(logging.WARNING)
+if TYPE_CHECKING:
+    from .models import ClientList, Donate, DonateList, LongpoolDonate, User
 
 
 class AsyncDonatello(BaseClient):
@@ -19,7 +34,23 @@ class AsyncDonatello(BaseClient):
                  token: str,
                  widget_id: str = None,
                  longpool_timeout: int = 1,
-                 logging_level: int = logging.INFO
+                 logging_level: int = logging.INFO,
+                 polling_policy: PollingPolicy = None,
+                 trusted: bool = False,
+                 cache_ttl: Union[float, Dict[str, float]] = None,
+                 cache_size: int = 128,
+                 rate_limiter: RateLimiter = None,
+                 priority: Priority = None,
+                 connection: ConnectionOptions = None,
+                 session=None,
+                 retry_policy: RetryPolicy = None,
+                 circuit_breaker: CircuitBreaker = None,
+                 deduplicator: DonateDeduplicator = None,
+                 journal: EventJournal = None,
+                 metrics: Metrics = None,
+                 concurrent_dispatch: bool = False,
+                 dispatch_concurrency: int = None,
+                 dispatch_timeout: float = None
                  ) -> None:
         """Donatello API wrapper
 
@@ -27,11 +58,42 @@ class AsyncDonatello(BaseClient):
             :param widget_id: Donatello widget ID
             :param longpool_timeout: Long polling timeout
             :param logging_level: Logging level
+            :param polling_policy: Long polling interval policy
+            :param trusted: Build models from responses without pydantic validation
+            :param cache_ttl: Cache ``get_me``/``get_clients`` responses for this many seconds, or a dict of seconds per endpoint
+            :param cache_size: Maximum cached responses
+            :param rate_limiter: Request scheduler, can be shared between clients
+            :param priority: Rate limiter priority of every request, by default donate pages are bulk and the rest live
+            :param connection: Connection pool and timeout settings
+            :param session: Shared session, not closed by the client
+            :param retry_policy: Retries of idempotent requests, defaults to 3 attempts with backoff
+            :param circuit_breaker: Per-host circuit breaker, can be shared between clients
+            :param deduplicator: Drops long polling donates that were already delivered
+            :param journal: Records long polling donates until listeners handled them, replayed on start
+            :param metrics: Records request, polling and listener metrics, can be shared between clients
+            :param concurrent_dispatch: Run donate listeners concurrently, their exceptions go to on_error
+            :param dispatch_concurrency: Maximum donate listeners running at once
+            :param dispatch_timeout: Seconds a donate listener may run before it is cancelled
 
             :type token: str
             :type widget_id: str
             :type longpool_timeout: int
             :type logging_level: int
+            :type polling_policy: PollingPolicy
+            :type trusted: bool
+            :type cache_ttl: Union[float, Dict[str, float]]
+            :type cache_size: int
+            :type rate_limiter: RateLimiter
+            :type priority: Priority
+            :type connection: ConnectionOptions
+            :type retry_policy: RetryPolicy
+            :type circuit_breaker: CircuitBreaker
+            :type deduplicator: DonateDeduplicator
+            :type journal: EventJournal
+            :type metrics: Metrics
+            :type concurrent_dispatch: bool
+            :type dispatch_concurrency: int
+            :type dispatch_timeout: float
 
             :return: Donatello API wrapper
             :rtype: Donatello
@@ -82,8 +144,28 @@ class AsyncDonatello(BaseClient):
                          widget_id=widget_id,
                          longpool_timeout=longpool_timeout,
                          logging_level=logging_level,
+                         polling_policy=polling_policy,
+                         trusted=trusted,
+                         cache_ttl=cache_ttl,
+                         cache_size=cache_size,
+                         rate_limiter=rate_limiter,
+                         priority=priority,
+                         connection=connection,
+                         session=session,
+                         retry_policy=retry_policy,
+                         circuit_breaker=circuit_breaker,
+                         deduplicator=deduplicator,
+                         journal=journal,
+                         metrics=metrics,
                          is_async=True)
 
+        if concurrent_dispatch:
+            self._on_donate = AsyncEventHandler(concurrent=True,
+                                                max_concurrency=dispatch_concurrency,
+                                                timeout=dispatch_timeout,
+                                                error_callback=self._error_handler)
+            self._instrument()
+
         # Long polling thread
         self._loop = asyncio.get_event_loop()
 
@@ -91,6 +173,7 @@ class AsyncDonatello(BaseClient):
                        method: str,
                        url: str,
                        endpoint: str,
+                       priority: Priority = Priority.LIVE,
                        **kwargs
                        ) -> dict:
         """
@@ -101,14 +184,76 @@ class AsyncDonatello(BaseClient):
             :param method: HTTP method
             :param url: API url
             :param endpoint: API endpoint
+            :param priority: Rate limiter priority
             :param **kwargs: Additional arguments for aiohttp.request
         """
-        async with self._session.request(method, url + endpoint, **kwargs) as resp:
-            data: dict = await resp.json(loads=json.loads)
-            self._logger.debug(f"Response: {data}")
-            if data.get("success") is False:
-                await self._error_handler(data)
-            return data
+        kwargs.setdefault("headers", self._headers)
+        data: dict = await self._send(method, url, endpoint, priority, **kwargs)
+        self._logger.debug("Response: %s", data)
+        if data.get("success") is False:
+            await self._error_handler(data)
+        return data
+
+    async def _send(self,
+                    method: str,
+                    url: str,
+                    endpoint: str,
+                    priority: Priority,
+                    stream: bool = False,
+                    **kwargs
+                    ):
+        """
+            Send a request with retries and circuit breaking
+            Returns decoded response of the last attempt, or with ``stream``
+            its unread :class:`aiohttp.ClientResponse` to be released by the caller
+        """
+        host = urlsplit(url).netloc
+        metrics = self._metrics
+        attempts = self._retry_policy.attempts_for(method)
+        for attempt in range(1, attempts + 1):
+            if self._circuit_breaker is not None:
+                self._circuit_breaker.check(host)
+            if self._rate_limiter is not None:
+                await self._rate_limiter.acquire_async(priority if self._priority is None else self._priority)
+            started = time.perf_counter() if metrics is not None else 0
+            try:
+                if stream:
+                    resp = data = await self._session.request(method, url + endpoint, **kwargs)
+                    failed = resp.status in self._retry_policy.statuses
+                    if failed and attempt < attempts:
+                        resp.release()
+                else:
+                    async with self._session.request(method, url + endpoint, **kwargs) as resp:
+                        failed = resp.status in self._retry_policy.statuses
+                        if not failed or attempt == attempts:
+                            body = await resp.read()
+            except transient_errors() as e:
+                if metrics is not None:
+                    self._observe_request(endpoint, started, failed=True)
+                self._record_failure(host)
+                if attempt == attempts:
+                    raise
+                self._logger.warning(f"{method} {endpoint} failed: {e!r}, retrying")
+            else:
+                if metrics is not None:
+                    self._observe_request(endpoint, started, failed=resp.status >= 400)
+                if not failed:
+                    self._record_success(host)
+                    # Decoded outside the retry, a malformed body is not transient
+                    return data if stream else json.loads(body)
+                self._record_failure(host)
+                if attempt == attempts:
+                    return data if stream else json.loads(body)
+                self._logger.warning(f"{method} {endpoint} returned {resp.status}, retrying")
+            if metrics is not None:
+                metrics.inc("request_retries_total", endpoint=endpoint)
+            await asyncio.sleep(self._retry_policy.delay(attempt))
+
+    async def _cached(self, endpoint: str, loader):
+        """Serve a response from the cache when enabled"""
+        if self._cache is None:
+            return await loader()
+        return await self._cache.afetch((endpoint,), loader)
 
     async def _error_handler(self, data: dict) -> None:
         """
@@ -128,8 +273,10 @@ class AsyncDonatello(BaseClient):
             :return: User info
             :rtype: User
         """
-        data = await self._request("GET", self._api_url, "me")
-        self._user = User(**data)
+        async def load() -> User:
+            data = await self._request("GET", self._api_url, "me")
+            return self._decode(models.User, data)
+        self._user = await self._cached("me", load)
         return self._user
 
     async def get_clients(self) -> ClientList:
@@ -139,33 +286,191 @@ class AsyncDonatello(BaseClient):
             :return: Clients list
             :rtype: ClientList
         """
-        data = await self._request("GET", self._api_url, "clients")
-        return ClientList(**data)
+        async def load() -> ClientList:
+            data = await self._request("GET", self._api_url, "clients")
+            return self._decode(models.ClientList, data)
+        return await self._cached("clients", load)
 
-    async def get_donates(self) -> DonateList:
+    async def get_donates(self, page: int = 0, per_page: int = 20) -> DonateList:
         """
             Get donates list
 
+            Sent with bulk priority when a rate limiter is set
+
+            :param page: Page number
+            :param per_page: Donates per page
+
             :return: Donates list
             :rtype: DonateList
         """
-        data = await self._request("GET", self._api_url, "donates")
-        return DonateList(**data)
+        data = await self._request("GET", self._api_url, "donates", priority=Priority.BULK, params={
+            "page": page,
+            "size": per_page
+        })
+        return self._decode(models.DonateList, data)
+
+    async def aiter_donates(self,
+                            per_page: int = 20,
+                            prefetch: int = 4
+                            ) -> AsyncIterator[Donate]:
+        """
+            Iterate over all donates page by page
+
+            Up to ``prefetch`` next pages are fetched concurrently while the
+            current one is consumed, so memory is bounded by the prefetch
+            window instead of the full history.
+
+            :param per_page: Donates per page
+            :param prefetch: Number of pages fetched ahead, at least 1
+
+            :return: Donates iterator
+            :rtype: AsyncIterator[Donate]
+
+            Usage::
+
+                >>> async for donate in client.aiter_donates(per_page=100):
+                >>>     print(donate)
+        """
+        if prefetch < 1:
+            raise ValueError("prefetch must be at least 1")
+        first = await self.get_donates(0, per_page)
+        for donate in first:
+            yield donate
+        if first.last or not first.content:
+            return
+
+        pages = ceil(first.total / per_page)
+        next_page = 1
+        pending = deque()
+        try:
+            while True:
+                while len(pending) < prefetch and next_page < pages:
+                    pending.append(asyncio.ensure_future(
+                        self.get_donates(next_page, per_page)))
+                    next_page += 1
+                if not pending:
+                    return
+                donates = await pending.popleft()
+                for donate in donates:
+                    yield donate
+                if donates.last or not donates.content:
+                    return
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _dispatch_donate(self,
+                               data: dict,
+                               seq: int = None,
+                               replay: bool = False,
+                               received: float = None
+                               ) -> bool:
+        """
+            Decode and dispatch a long polling donate
+
+            The journal entry is acknowledged once all listeners succeeded,
+            batch listeners once the donate was delivered in a batch.
+
+            :return: Whether the donate reached listeners
+            :rtype: bool
+        """
+        donate = self._decode(models.LongpoolDonate, data)
+        if not self._is_new(donate) and not replay:
+            self._journal_ack(seq)
+            return False
+        self._polling_stats.donates += 1
+        self._invalidate_cache()
+        if seq is None and self._metrics is None:
+            await self._on_donate.handle_event(donate)
+            return True
+
+        def done() -> None:
+            self._journal_ack(seq)
+            self._observe_donate(received)
+
+        await self._on_donate.handle_event(donate, on_done=done)
+        return True
+
+    async def _replay_journal(self) -> None:
+        """Dispatch donates left unacknowledged by a previous run"""
+        if self._journal is None:
+            return
+        pending = self._journal.pending()
+        if pending:
+            self._logger.info(f"Replaying {len(pending)} journaled donates")
+        for seq, data in pending:
+            try:
+                await self._dispatch_donate(data, seq, replay=True)
+            except Exception as e:
+                await self._error_handler(e)
+
+    async def astream_donates(self,
+                              per_page: int = 100,
+                              page: int = 0
+                              ) -> AsyncIterator[Donate]:
+        """
+            Iterate over donates while pages are downloading
+
+            Each page is parsed incrementally from the raw response bytes and
+            donates are yielded as soon as they are read, so memory stays flat
+            for any ``per_page``. Pages are fetched one after another with bulk
+            priority, a failed page is retried only before its first donate.
+
+            :param per_page: Donates per page
+            :param page: First page
+
+            :return: Donates iterator
+            :rtype: AsyncIterator[Donate]
+
+            Usage::
+
+                >>> async for donate in client.astream_donates(per_page=1000):
+                >>>     print(donate)
+        """
+        while True:
+            resp = await self._send("GET", self._api_url, "donates", Priority.BULK, stream=True,
+                                    headers=self._headers, params={"page": page, "size": per_page})
+            parser = PageParser()
+            try:
+                if resp.status >= 400:
+                    await self._error_handler(await resp.json(loads=json.loads))
+                    return
+                async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                    for item in parser.feed(chunk):
+                        yield self._decode(models.Donate, item)
+                fields = parser.close()
+            finally:
+                resp.release()
+            if fields.get("success") is False:
+                await self._error_handler(fields)
+                return
+            if fields.get("last", True) or parser.items < per_page:
+                return
+            page += 1
 
     async def _long_polling(self) -> None:
         """Long polling thread"""
         self._logger.info("Long polling started")
         await self._on_ready.handle_event(await self.get_me())
+        await self._replay_journal()
+        stats = self._polling_stats
         while not self._stop_long_polling:
-            data = await self._request("GET", self._widget_url, "info")
+            donated = False
             try:
-                if data.get("success") is None:
-                    await self._on_donate.handle_event(LongpoolDonate(**data))
+                stats.requests += 1
+                data = await self._request("GET", self._widget_url, "info")
+                if data.get("clientName"):
+                    received = time.perf_counter() if self._metrics is not None else None
+                    donated = await self._dispatch_donate(data, self._journal_append(data), received=received)
                 elif data.get("success") is False:
+                    stats.errors += 1
                     await self._error_handler(data)
             except Exception as e:
-                await self._error_handler(data)
-            await asyncio.sleep(self._longpool_timeout)
+                stats.errors += 1
+                await self._error_handler(e)
+            await asyncio.sleep(self._polling_policy.next_interval(stats, donated))
+        for batcher in self._batchers:
+            await batcher.close()
         await self.close()
         self._logger.info("Long polling stopped")
 
@@ -177,6 +482,8 @@ class AsyncDonatello(BaseClient):
     def start(self) -> None:
         """Start long polling"""
         if not self._is_long_polling:
+            self._logger.warning(
+                "Long polling is disabled. You can enable it by specifying widget ID in constructor.")
             return
         self._loop.run_until_complete(self._start_long_polling())
 
@@ -194,7 +501,9 @@ class AsyncDonatello(BaseClient):
 
     async def close(self) -> None:
         """Close aiohttp session"""
-        await self.__session.close()
+        if self._owns_session and not self._session.closed:
+            await self._session.close()
 
     def __del__(self) -> None:
-        self._loop.run_until_complete(self.close())
+        if self._owns_session and not self._session.closed and not self._loop.is_running():
+            self._loop.run_until_complete(self.close())
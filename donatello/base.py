@@ -1,13 +1,30 @@
+from __future__ import annotations
+
 import logging
-try:
-    import ujson as json  # type: ignore # noqa
-except ImportError:
-    import json
+import time
+from typing import TYPE_CHECKING, Dict, Optional, Union
 
+from . import models
+from .batching import add_batch_listener
+from .cache import ResponseCache
+from .connection import ConnectionOptions
+from .dedup import DonateDeduplicator
 from .events import EventHandler, AsyncEventHandler
-from .models import User
+from .journal import EventJournal
+from .metrics import Metrics
+from .polling import PollingPolicy, PollingStats
+from .ratelimit import Priority, RateLimiter
+from .retry import CircuitBreaker, RetryPolicy
+
+if TYPE_CHECKING:
+    from .models import User
 
 API_VERSION = "v1"
+BASE_URL = "https://donatello.to"
+API_PATH = f"/api/{API_VERSION}/"
+WIDGET_PATH = "/widget/{widget_id}/token/{token}/"
+API_URL = BASE_URL + API_PATH
+WIDGET_URL = BASE_URL + WIDGET_PATH
 
 
 class BaseClient:
@@ -16,7 +33,20 @@ class BaseClient:
                  widget_id: str = None,
                  longpool_timeout: int = 1,
                  logging_level: int = logging.INFO,
-                 is_async: bool = False
+                 is_async: bool = False,
+                 polling_policy: PollingPolicy = None,
+                 trusted: bool = False,
+                 cache_ttl: Union[float, Dict[str, float]] = None,
+                 cache_size: int = 128,
+                 rate_limiter: RateLimiter = None,
+                 priority: Priority = None,
+                 connection: ConnectionOptions = None,
+                 session=None,
+                 retry_policy: RetryPolicy = None,
+                 circuit_breaker: CircuitBreaker = None,
+                 deduplicator: DonateDeduplicator = None,
+                 journal: EventJournal = None,
+                 metrics: Metrics = None
                  ) -> None:
         """Donatello API BaseClient
 
@@ -24,11 +54,36 @@ class BaseClient:
             :param widget_id: Donatello widget ID
             :param longpool_timeout: Long polling timeout
             :param logging_level: Logging level
+            :param polling_policy: Long polling interval policy, defaults to a fixed ``longpool_timeout``
+            :param trusted: Build models from responses without pydantic validation
+            :param cache_ttl: Cache ``get_me``/``get_clients`` responses for this many seconds, or a dict of seconds per endpoint (``"me"``, ``"clients"``). Disabled by default
+            :param cache_size: Maximum cached responses
+            :param rate_limiter: Request scheduler, can be shared between clients
+            :param priority: Rate limiter priority of every request, by default donate pages are bulk and the rest live
+            :param connection: Connection pool and timeout settings
+            :param session: Shared ``requests.Session`` or ``aiohttp.ClientSession``, not closed by the client
+            :param retry_policy: Retries of idempotent requests, defaults to 3 attempts with backoff
+            :param circuit_breaker: Per-host circuit breaker, can be shared between clients
+            :param deduplicator: Drops long polling donates that were already delivered
+            :param journal: Records long polling donates until listeners handled them, replayed on start
+            :param metrics: Records request, polling and listener metrics, can be shared between clients
 
             :type token: str
             :type widget_id: str
             :type longpool_timeout: int
             :type logging_level: int
+            :type polling_policy: PollingPolicy
+            :type trusted: bool
+            :type cache_ttl: Union[float, Dict[str, float]]
+            :type cache_size: int
+            :type rate_limiter: RateLimiter
+            :type priority: Priority
+            :type connection: ConnectionOptions
+            :type retry_policy: RetryPolicy
+            :type circuit_breaker: CircuitBreaker
+            :type deduplicator: DonateDeduplicator
+            :type journal: EventJournal
+            :type metrics: Metrics
 
             :return: BaseClient
             :rtype: BaseClient
@@ -38,10 +93,22 @@ class BaseClient:
         self._token = token
         self._widget_id = widget_id
         self._longpool_timeout = longpool_timeout
+        self._trusted = trusted
+        self._cache = ResponseCache(cache_ttl, cache_size) if cache_ttl else None
+        self._rate_limiter = rate_limiter
+        self._priority = priority
+        self._connection = connection or ConnectionOptions()
+        self._owns_session = session is None
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._circuit_breaker = circuit_breaker
+        self._deduplicator = deduplicator
+        self._journal = journal
+        self._metrics = metrics
 
         # URLs
-        self._api_url = f"https://donatello.to/api/{API_VERSION}/"
-        self._widget_url = f"https://donatello.to/widget/{widget_id}/token/{token}/"
+        base_url = (self._connection.base_url or BASE_URL).rstrip("/")
+        self._api_url = base_url + API_PATH
+        self._widget_url = base_url + WIDGET_PATH.format(widget_id=widget_id, token=token)
 
         # Logging
         self._logger = logging.getLogger("donatello")
@@ -51,31 +118,104 @@ class BaseClient:
             self._on_ready = AsyncEventHandler()
             self._on_donate = AsyncEventHandler()
             self._on_error = AsyncEventHandler()
-            import aiohttp
-            self._session = aiohttp.ClientSession(json_serialize=json.dumps)
+            self._session = session or self._connection.async_session()
         else:
             self._on_ready = EventHandler()
             self._on_donate = EventHandler()
             self._on_error = EventHandler()
-            import requests
-            self._session = requests.Session()
+            self._session = session or self._connection.session()
+        self._batchers = []
+        self._instrument()
 
         # Long polling
         if not widget_id:
-            self._logger.warning(
+            # Warned about in start(), API-only clients are common
+            self._logger.debug(
                 "Widget ID is not specified. You can't use long polling.")
             self._is_long_polling = False
         else:
             self._is_long_polling = True
             self._longpool_timeout = longpool_timeout
 
+        self._polling_policy = polling_policy or PollingPolicy(longpool_timeout)
+        self._polling_stats = self._polling_policy.create_stats()
+
         self._stop_long_polling = False
 
+        # Shared sessions get the token per request
         self._headers = {"X-Token": self._token}
-        self._session.headers.update(self._headers)
+        if self._owns_session:
+            self._session.headers.update(self._headers)
 
         self._user: User = None
 
+    def _decode(self, model, data: dict):
+        """Build a response model, skipping validation in trusted mode"""
+        if self._trusted:
+            return models.decode_trusted(model, data)
+        return model(**data)
+
+    def _record_success(self, host: str) -> None:
+        if self._circuit_breaker is not None:
+            self._circuit_breaker.record_success(host)
+
+    def _record_failure(self, host: str) -> None:
+        if self._circuit_breaker is not None:
+            self._circuit_breaker.record_failure(host)
+
+    def _is_new(self, donate) -> bool:
+        """Whether a long polling donate should reach listeners"""
+        return self._deduplicator is None or self._deduplicator.is_new(donate)
+
+    def _journal_append(self, data: dict) -> Optional[int]:
+        """Record a raw donate payload before dispatch"""
+        if self._journal is None:
+            return None
+        return self._journal.append(data)
+
+    def _journal_ack(self, seq: Optional[int]) -> None:
+        """Mark a journaled payload as handled"""
+        if seq is not None:
+            self._journal.ack(seq)
+
+    def _instrument(self) -> None:
+        """Time event listeners when metrics are enabled"""
+        if self._metrics is not None:
+            self._on_ready.instrument(self._metrics, "ready")
+            self._on_donate.instrument(self._metrics, "donate")
+            self._on_error.instrument(self._metrics, "error")
+
+    def _observe_request(self, endpoint: str, started: float, failed: bool) -> None:
+        """Record a request attempt"""
+        metrics = self._metrics
+        metrics.observe("request_duration_seconds", time.perf_counter() - started, endpoint=endpoint)
+        metrics.inc("requests_total", endpoint=endpoint)
+        if failed:
+            metrics.inc("request_errors_total", endpoint=endpoint)
+
+    def _observe_donate(self, received: Optional[float]) -> None:
+        """Record a donate handled by all listeners"""
+        if self._metrics is None:
+            return
+        self._metrics.inc("donates_total")
+        if received is not None:
+            self._metrics.observe("donate_latency_seconds", time.perf_counter() - received)
+
+    def _invalidate_cache(self) -> None:
+        """Drop cached responses, a new donate changes totals"""
+        if self._cache is not None:
+            self._cache.invalidate()
+
+    @property
+    def cache(self) -> ResponseCache:
+        """Response cache, ``None`` unless ``cache_ttl`` is set"""
+        return self._cache
+
+    @property
+    def polling_stats(self) -> PollingStats:
+        """Long polling request counters"""
+        return self._polling_stats
+
     @property
     def nickname(self) -> str:
         """Client nickname"""
@@ -121,6 +261,27 @@ class BaseClient:
         self._on_donate.add_listener(listener)
         return listener
 
+    def on_donate_batch(self, listener=None, max_size: int = 100, max_delay: float = 0.2):
+        """Decorator for batches of donate events
+
+            The listener is called with a list of up to ``max_size`` donates
+            once the batch is full or ``max_delay`` seconds after its first
+            donate. Buffered donates are delivered when long polling stops.
+
+            :param max_size: Donates per batch
+            :param max_delay: Seconds the first donate of a batch may wait
+
+            Usage::
+
+                >>> @client.on_donate_batch(max_size=100, max_delay=0.2)
+                >>> def on_donates(donates: List[LongpoolDonate]):
+                >>>     database.insert_many(donates)
+        """
+        def register(listener):
+            self._batchers.append(add_batch_listener(self._on_donate, listener, max_size, max_delay))
+            return listener
+        return register if listener is None else register(listener)
+
     def on_error(self, listener):
         """Decorator for error event"""
         self._on_error.add_listener(listener)
@@ -128,15 +289,20 @@ class BaseClient:
 
     def remove_client_listener(self, listener):
         """Remove client event listener"""
-        self._on_ready.listeners.remove(listener)
+        self._on_ready.remove_listener(listener)
 
     def remove_donate_listener(self, listener):
         """Remove donate event listener"""
-        self._on_donate.listeners.remove(listener)
+        for batcher in self._batchers:
+            if batcher.listener is listener:
+                self._batchers.remove(batcher)
+                self._on_donate.remove_listener(batcher)
+                return
+        self._on_donate.remove_listener(listener)
 
     def remove_error_listener(self, listener):
         """Remove error event listener"""
-        self._on_error.listeners.remove(listener)
+        self._on_error.remove_listener(listener)
 
     def __str__(self) -> str:
         return f"Donatello API wrapper API version: {API_VERSION}"
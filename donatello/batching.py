@@ -0,0 +1,289 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Awaitable, Callable, Deque, List, Tuple, Union
+
+from .events import AsyncEventHandler, EventHandler, _listener_name
+
+if TYPE_CHECKING:
+    import asyncio
+
+    from .models import LongpoolDonate
+
+
+class DonateBatcher:
+    # Event handlers pass a completion callback, reported after delivery
+    deferred = True
+
+    def __init__(self,
+                 listener: Callable[[List["LongpoolDonate"]], None],
+                 max_size: int = 100,
+                 max_delay: float = 0.2
+                 ) -> None:
+        """Groups donate events into lists for a sync listener
+
+            Donates are buffered until ``max_size`` arrived or ``max_delay``
+            seconds passed since the first one, then ``listener`` is called
+            with the list. A full batch is delivered in the dispatching thread,
+            a timed out one in a background thread. Batches are delivered one
+            at a time and in order. An event counts as handled, e.g. for the
+            journal, only once the batch holding it was delivered.
+
+            :param listener: Called with lists of donates
+            :param max_size: Donates per batch
+            :param max_delay: Seconds the first donate of a batch may wait
+
+            :type listener: callable
+            :type max_size: int
+            :type max_delay: float
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.listener = listener
+        self.name = _listener_name(listener)
+        self._max_size = max_size
+        self._max_delay = max_delay
+        self._buffer: list = []
+        # (donates buffered up to the event, completion callback), in order
+        self._callbacks: Deque[Tuple[int, Callable[[bool], None]]] = deque()
+        self._added = 0
+        self._taken = 0
+        self._deadline: float = None
+        self._condition = threading.Condition()
+        self._delivering = threading.Lock()
+        self._thread: threading.Thread = None
+        self._closed = False
+        self._logger = logging.getLogger("donatello")
+
+    def __call__(self, event, on_done: Callable[[bool], None] = None) -> None:
+        """Buffer a donate or a list of donates
+
+            :param on_done: Called with ``True`` once the event was delivered, ``False`` if its batch failed
+        """
+        with self._condition:
+            if isinstance(event, list):
+                self._buffer.extend(event)
+                self._added += len(event)
+            else:
+                self._buffer.append(event)
+                self._added += 1
+            if on_done is not None:
+                self._callbacks.append((self._added, on_done))
+            if len(self._buffer) < self._max_size:
+                if self._deadline is None:
+                    self._deadline = time.monotonic() + self._max_delay
+                    self._start()
+                    self._condition.notify()
+                return
+        self._deliver(full=True)
+
+    def _start(self) -> None:
+        if self._thread is None:
+            self._closed = False
+            self._thread = threading.Thread(target=self._run, name="donatello-batch", daemon=True)
+            self._thread.start()
+
+    def _take(self, full: bool) -> Tuple[list, list]:
+        """Cut the next batch and the callbacks of events it completes, called with the condition held"""
+        if full and len(self._buffer) < self._max_size:
+            return [], []
+        batch = self._buffer[:self._max_size]
+        del self._buffer[:self._max_size]
+        if self._buffer:
+            # The remainder starts a new batch, the timer has to deliver it
+            self._deadline = time.monotonic() + self._max_delay
+            self._start()
+            self._condition.notify()
+        else:
+            self._deadline = None
+        self._taken += len(batch)
+        callbacks = []
+        while self._callbacks and self._callbacks[0][0] <= self._taken:
+            callbacks.append(self._callbacks.popleft()[1])
+        return batch, callbacks
+
+    def _send(self, batch: list, callbacks: list) -> None:
+        try:
+            self.listener(batch)
+        except Exception:
+            for callback in callbacks:
+                callback(False)
+            raise
+        for callback in callbacks:
+            callback(True)
+
+    def _deliver(self, full: bool = False) -> None:
+        with self._delivering:
+            while True:
+                with self._condition:
+                    batch, callbacks = self._take(full)
+                if not batch:
+                    return
+                self._send(batch, callbacks)
+
+    def _run(self) -> None:
+        """Deliver batches whose delay ran out"""
+        while True:
+            with self._condition:
+                while not self._closed:
+                    if self._deadline is None:
+                        self._condition.wait()
+                        continue
+                    remaining = self._deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._closed:
+                    return
+            try:
+                with self._delivering:
+                    with self._condition:
+                        batch, callbacks = self._take(full=False)
+                    if batch:
+                        self._send(batch, callbacks)
+            except Exception as e:
+                self._logger.exception(f"Batch listener failed: {e}")
+
+    def flush(self) -> None:
+        """Deliver buffered donates now"""
+        self._deliver()
+
+    def close(self) -> None:
+        """Deliver buffered donates and stop the background thread
+
+            The batcher can be used again, the next donate starts a new thread.
+        """
+        self.flush()
+        with self._condition:
+            self._closed = True
+            thread, self._thread = self._thread, None
+            self._condition.notify()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def __repr__(self) -> str:
+        return f"<DonateBatcher listener={self.name} buffered={len(self._buffer)}>"
+
+
+class AsyncDonateBatcher:
+    # Event handlers pass a completion callback, reported after delivery
+    deferred = True
+
+    def __init__(self,
+                 listener: Callable[[List["LongpoolDonate"]], Awaitable[None]],
+                 max_size: int = 100,
+                 max_delay: float = 0.2
+                 ) -> None:
+        """Groups donate events into lists for a coroutine listener
+
+            Donates are buffered until ``max_size`` arrived or ``max_delay``
+            seconds passed since the first one, then ``listener`` is awaited
+            with the list. Batches are delivered one at a time and in order.
+            An event counts as handled, e.g. for the journal, only once the
+            batch holding it was delivered.
+
+            :param listener: Coroutine function called with lists of donates
+            :param max_size: Donates per batch
+            :param max_delay: Seconds the first donate of a batch may wait
+
+            :type listener: callable
+            :type max_size: int
+            :type max_delay: float
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.listener = listener
+        self.name = _listener_name(listener)
+        self._max_size = max_size
+        self._max_delay = max_delay
+        self._buffer: list = []
+        self._callbacks: Deque[Tuple[int, Callable[[bool], None]]] = deque()
+        self._added = 0
+        self._taken = 0
+        self._timer: "asyncio.Task" = None
+        self._lock: "asyncio.Lock" = None
+        self._logger = logging.getLogger("donatello")
+
+    async def __call__(self, donate: "LongpoolDonate", on_done: Callable[[bool], None] = None) -> None:
+        """Buffer a donate
+
+            :param on_done: Called with ``True`` once the donate was delivered, ``False`` if its batch failed
+        """
+        import asyncio
+        self._buffer.append(donate)
+        self._added += 1
+        if on_done is not None:
+            self._callbacks.append((self._added, on_done))
+        if len(self._buffer) >= self._max_size:
+            await self._deliver(full=True)
+        elif self._timer is None:
+            self._timer = asyncio.ensure_future(self._deliver_later())
+
+    async def _deliver_later(self) -> None:
+        import asyncio
+        await asyncio.sleep(self._max_delay)
+        # Not cancelled by a full batch from here on
+        self._timer = None
+        try:
+            await self._deliver()
+        except Exception as e:
+            self._logger.exception(f"Batch listener failed: {e}")
+
+    async def _deliver(self, full: bool = False) -> None:
+        import asyncio
+        if self._lock is None:
+            # Created lazily to bind to the running loop
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while len(self._buffer) >= (self._max_size if full else 1):
+                batch = self._buffer[:self._max_size]
+                del self._buffer[:self._max_size]
+                if not self._buffer and self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                self._taken += len(batch)
+                callbacks = []
+                while self._callbacks and self._callbacks[0][0] <= self._taken:
+                    callbacks.append(self._callbacks.popleft()[1])
+                try:
+                    await self.listener(batch)
+                except Exception:
+                    for callback in callbacks:
+                        callback(False)
+                    raise
+                for callback in callbacks:
+                    callback(True)
+
+    async def flush(self) -> None:
+        """Deliver buffered donates now"""
+        await self._deliver()
+
+    async def close(self) -> None:
+        """Deliver buffered donates"""
+        await self.flush()
+
+    def __repr__(self) -> str:
+        return f"<AsyncDonateBatcher listener={self.name} buffered={len(self._buffer)}>"
+
+
+def add_batch_listener(handler: Union[EventHandler, AsyncEventHandler],
+                       listener: Callable,
+                       max_size: int = 100,
+                       max_delay: float = 0.2
+                       ) -> Union[DonateBatcher, AsyncDonateBatcher]:
+    """Register ``listener`` on a donate event handler behind a batcher
+
+        :param handler: Donate event handler
+        :param listener: Function, or coroutine function for async handlers, called with lists of donates
+        :param max_size: Donates per batch
+        :param max_delay: Seconds the first donate of a batch may wait
+
+        :return: The registered batcher
+    """
+    if isinstance(handler, AsyncEventHandler):
+        batcher = AsyncDonateBatcher(listener, max_size, max_delay)
+    else:
+        batcher = DonateBatcher(listener, max_size, max_delay)
+    handler.add_listener(batcher)
+    return batcher
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Iterable
+
+from .async_client import AsyncDonatello
+from .connection import ConnectionOptions
+from .metrics import Metrics
+from .ratelimit import Priority, RateLimiter
+from .retry import CircuitBreaker, RetryPolicy
+
+if TYPE_CHECKING:
+    from .models import ClientList, DonateList, User
+
+
+class BulkError(Exception):
+    """API error response of a single token"""
+
+    def __init__(self, token: str, response: dict) -> None:
+        super().__init__(f"Token {token[:6]}...: {response.get('message', response)}")
+        self.response = response
+
+
+class BulkResult:
+    """Outcome of a call for a single token"""
+    __slots__ = ("token", "result", "error", "elapsed")
+
+    def __init__(self, token: str, result: Any = None, error: Exception = None, elapsed: float = 0.0) -> None:
+        self.token = token
+        self.result = result
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        """Whether the call succeeded"""
+        return self.error is None
+
+    def __str__(self) -> str:
+        return f"<BulkResult token={self.token[:6]}... ok={self.ok} elapsed={self.elapsed:.3f}>"
+
+    def __repr__(self) -> str:
+        return f"<BulkResult token={self.token[:6]}... ok={self.ok} elapsed={self.elapsed:.3f}>"
+
+
+class BulkFetcher:
+    def __init__(self,
+                 concurrency: int = 50,
+                 trusted: bool = False,
+                 connection: ConnectionOptions = None,
+                 session=None,
+                 rate_limiter: RateLimiter = None,
+                 retry_policy: RetryPolicy = None,
+                 circuit_breaker: CircuitBreaker = None,
+                 metrics: Metrics = None,
+                 logging_level: int = logging.INFO
+                 ) -> None:
+        """Concurrent API calls for many tokens over one connection pool
+
+            Every token gets a lightweight :class:`AsyncDonatello` on a shared
+            aiohttp session, which sends the token in its own ``X-Token``
+            header. At most ``concurrency`` calls run at once, tokens are read
+            lazily and results are yielded as calls finish, in completion
+            order. Failures don't stop the run, they are returned as results
+            with ``error`` set.
+
+            :param concurrency: Maximum calls in flight, also the pool size of the owned session
+            :param trusted: Build models from responses without pydantic validation
+            :param connection: Connection timeouts and keep-alive settings
+            :param session: Shared ``aiohttp.ClientSession``, not closed by the fetcher
+            :param rate_limiter: Request scheduler, every call is sent with bulk priority
+            :param retry_policy: Retries per call, defaults to 3 attempts with backoff
+            :param circuit_breaker: Per-host circuit breaker
+            :param metrics: Records request metrics
+            :param logging_level: Logging level
+
+            :type concurrency: int
+            :type trusted: bool
+            :type connection: ConnectionOptions
+            :type rate_limiter: RateLimiter
+            :type retry_policy: RetryPolicy
+            :type circuit_breaker: CircuitBreaker
+            :type metrics: Metrics
+            :type logging_level: int
+
+            Usage::
+
+                >>> from donatello import BulkFetcher
+
+                >>> async def report(tokens):
+                >>>     async with BulkFetcher(concurrency=100) as bulk:
+                >>>         async for item in bulk.get_me(tokens):
+                >>>             if item.ok:
+                >>>                 print(item.result.nickname, item.result.donates.total_amount)
+                >>>             else:
+                >>>                 print(f"Failed: {item.error}")
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self._concurrency = concurrency
+        self._trusted = trusted
+        self._connection = connection or ConnectionOptions()
+        self._shared_session = session
+        self._rate_limiter = rate_limiter
+        self._retry_policy = retry_policy
+        self._circuit_breaker = circuit_breaker
+        self._metrics = metrics
+        self._logging_level = logging_level
+        self._session = None
+
+    def _client(self, token: str) -> AsyncDonatello:
+        if self._session is None:
+            self._session = self._shared_session or self._connection.async_session(
+                limit=self._concurrency)
+        return AsyncDonatello(token,
+                              logging_level=self._logging_level,
+                              trusted=self._trusted,
+                              rate_limiter=self._rate_limiter,
+                              priority=Priority.BULK,
+                              connection=self._connection,
+                              session=self._session,
+                              retry_policy=self._retry_policy,
+                              circuit_breaker=self._circuit_breaker,
+                              metrics=self._metrics)
+
+    async def _call(self, token: str, call: Callable[[AsyncDonatello], Awaitable[Any]]) -> BulkResult:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        client = self._client(token)
+        errors = []
+
+        @client.on_error
+        async def capture(event) -> None:
+            errors.append(event[0])
+
+        try:
+            result = await call(client)
+        except Exception as e:
+            # API error responses fail decoding, report the response instead
+            if errors and isinstance(errors[0], dict):
+                e = BulkError(token, errors[0])
+            return BulkResult(token, error=e, elapsed=loop.time() - started)
+        if errors:
+            error = BulkError(token, errors[0]) if isinstance(errors[0], dict) else errors[0]
+            return BulkResult(token, result, error, loop.time() - started)
+        return BulkResult(token, result, elapsed=loop.time() - started)
+
+    async def run(self,
+                  tokens: Iterable[str],
+                  call: Callable[[AsyncDonatello], Awaitable[Any]]
+                  ) -> AsyncIterator[BulkResult]:
+        """Await ``call`` with a client for every token
+
+            :param tokens: Donatello API tokens
+            :param call: Coroutine function receiving the token's client
+
+            :return: Results in completion order
+            :rtype: AsyncIterator[BulkResult]
+
+            Usage::
+
+                >>> async for item in bulk.run(tokens, lambda client: client.get_donates(per_page=100)):
+                >>>     print(item.token, item.result)
+        """
+        pending = iter(tokens)
+        results: asyncio.Queue = asyncio.Queue(self._concurrency)
+
+        async def worker() -> None:
+            for token in pending:
+                await results.put(await self._call(token, call))
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(self._concurrency)]
+        done = asyncio.ensure_future(asyncio.gather(*workers))
+        try:
+            while not (done.done() and results.empty()):
+                getter = asyncio.ensure_future(results.get())
+                await asyncio.wait((getter, done), return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    yield getter.result()
+                else:
+                    getter.cancel()
+            # Re-raise a failure of the tokens iterable
+            done.result()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(done, return_exceptions=True)
+
+    def get_me(self, tokens: Iterable[str]) -> AsyncIterator[BulkResult]:
+        """:meth:`AsyncDonatello.get_me` for every token, results hold :class:`User`"""
+        return self.run(tokens, lambda client: client.get_me())
+
+    def get_donates(self, tokens: Iterable[str], page: int = 0, per_page: int = 20) -> AsyncIterator[BulkResult]:
+        """:meth:`AsyncDonatello.get_donates` for every token, results hold :class:`DonateList`"""
+        return self.run(tokens, lambda client: client.get_donates(page=page, per_page=per_page))
+
+    def get_clients(self, tokens: Iterable[str]) -> AsyncIterator[BulkResult]:
+        """:meth:`AsyncDonatello.get_clients` for every token, results hold :class:`ClientList`"""
+        return self.run(tokens, lambda client: client.get_clients())
+
+    async def close(self) -> None:
+        """Close the owned aiohttp session"""
+        if self._session is not None and self._session is not self._shared_session:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self) -> BulkFetcher:
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    def __repr__(self) -> str:
+        return f"<BulkFetcher concurrency={self._concurrency}>"
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar, Union
+
+if TYPE_CHECKING:
+    import asyncio
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+
+class _Call:
+    """In-flight sync load shared by concurrent callers"""
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException = None
+
+
+class ResponseCache:
+    def __init__(self,
+                 ttl: Union[float, Dict[str, float]] = 60,
+                 max_size: int = 128
+                 ) -> None:
+        """TTL and LRU bounded cache with request coalescing
+
+            Keys are ``(endpoint, ...)`` tuples. Concurrent callers asking
+            for the same key while it is loading share one request.
+
+            :param ttl: Seconds a response stays fresh, or a dict of seconds per endpoint. Endpoints missing from the dict are not cached
+            :param max_size: Maximum cached responses, least recently used are evicted first
+
+            :type ttl: Union[float, Dict[str, float]]
+            :type max_size: int
+
+            Usage::
+
+                >>> from donatello import Donatello
+                >>> client = Donatello("your_token", cache_ttl={"me": 30, "clients": 10})
+                >>> client.get_me()  # Request
+                >>> client.get_me()  # Cached for 30 seconds
+        """
+        self._ttl = ttl
+        self._max_size = max_size
+        self._entries: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Hashable, asyncio.Future] = {}
+        # Bumped on invalidation, loads started before it are not stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def ttl(self, key: Hashable) -> float:
+        """Freshness of a key in seconds"""
+        if isinstance(self._ttl, dict):
+            return self._ttl.get(key[0], 0)
+        return self._ttl
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Fresh cached value or ``default``"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, generation: int = None) -> None:
+        """Cache a value, skipped if the cache was invalidated since ``generation``"""
+        ttl = self.ttl(key)
+        if ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, endpoint: str = None) -> None:
+        """Drop cached responses of an endpoint or all of them"""
+        with self._lock:
+            self._generation += 1
+            if endpoint is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == endpoint]:
+                    del self._entries[key]
+
+    def fetch(self, key: Hashable, loader: Callable[[], T]) -> T:
+        """Cached value or the result of ``loader``, shared between threads"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                generation = self._generation
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = loader()
+            self.set(key, call.result, generation)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def afetch(self, key: Hashable, loader: Callable[[], Awaitable[T]]) -> T:
+        """Cached value or the result of ``loader``, shared between tasks"""
+        import asyncio
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        task = self._tasks.get(key)
+        if task is None:
+            generation = self._generation
+            task = self._tasks[key] = asyncio.ensure_future(loader())
+
+            def done(task: asyncio.Future) -> None:
+                if self._tasks.get(key) is task:
+                    del self._tasks[key]
+                if not task.cancelled() and task.exception() is None:
+                    self.set(key, task.result(), generation)
+
+            task.add_done_callback(done)
+        # Shielded, so one cancelled caller doesn't cancel the others
+        return await asyncio.shield(task)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f"<ResponseCache size={len(self)} hits={self.hits} misses={self.misses}>"
@@ -1,19 +1,28 @@
-try:
-    import ujson as json  # type: ignore # noqa
-except ImportError:
-    import json
+from __future__ import annotations
 
 import logging
 import threading
 import time
-from typing import Union
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from math import ceil
+from urllib.parse import urlsplit
+from typing import TYPE_CHECKING, Dict, Iterator, Union
 
+from . import models
 from .base import BaseClient
-from .models import ClientList, DonateList, LongpoolDonate, User
+from .connection import ConnectionOptions
+from .dedup import DonateDeduplicator
+from .events import HandlerStats, ThreadedEventHandler
+from .journal import EventJournal
+from .metrics import Metrics
+from .polling import PollingPolicy
+from .ratelimit import Priority, RateLimiter
+from .retry import CircuitBreaker, RetryPolicy, transient_errors
+from .streaming import CHUNK_SIZE, PageParser, loads
 
-logging.basicConfig(
-    format="[%(asctime)s] %(levelname)s: %(message)s", level=logging.INFO)
-logging.getLogger("requests").setLevel(logging.WARNING)
+if TYPE_CHECKING:
+    from .models import ClientList, Donate, DonateList, LongpoolDonate, User
 
 
 class Donatello(BaseClient):
@@ -22,7 +31,22 @@ class Donatello(BaseClient):
                  token: str,
                  widget_id: str = None,
                  longpool_timeout: int = 1,
-                 logging_level: int = logging.INFO
+                 logging_level: int = logging.INFO,
+                 polling_policy: PollingPolicy = None,
+                 trusted: bool = False,
+                 cache_ttl: Union[float, Dict[str, float]] = None,
+                 cache_size: int = 128,
+                 rate_limiter: RateLimiter = None,
+                 priority: Priority = None,
+                 connection: ConnectionOptions = None,
+                 session=None,
+                 retry_policy: RetryPolicy = None,
+                 circuit_breaker: CircuitBreaker = None,
+                 deduplicator: DonateDeduplicator = None,
+                 journal: EventJournal = None,
+                 metrics: Metrics = None,
+                 dispatch_workers: int = 0,
+                 dispatch_queue_size: int = 1000
         ) -> None:
         """Donatello API wrapper
 
@@ -30,11 +54,40 @@ class Donatello(BaseClient):
             :param widget_id: Donatello widget ID
             :param longpool_timeout: Long polling timeout
             :param logging_level: Logging level
+            :param polling_policy: Long polling interval policy
+            :param trusted: Build models from responses without pydantic validation
+            :param cache_ttl: Cache ``get_me``/``get_clients`` responses for this many seconds, or a dict of seconds per endpoint
+            :param cache_size: Maximum cached responses
+            :param rate_limiter: Request scheduler, can be shared between clients
+            :param priority: Rate limiter priority of every request, by default donate pages are bulk and the rest live
+            :param connection: Connection pool and timeout settings
+            :param session: Shared session, not closed by the client
+            :param retry_policy: Retries of idempotent requests, defaults to 3 attempts with backoff
+            :param circuit_breaker: Per-host circuit breaker, can be shared between clients
+            :param deduplicator: Drops long polling donates that were already delivered
+            :param journal: Records long polling donates until listeners handled them, replayed on start
+            :param metrics: Records request, polling and listener metrics, can be shared between clients
+            :param dispatch_workers: Run donate listeners in this many worker threads, 0 calls them on the polling thread
+            :param dispatch_queue_size: Maximum queued donates per worker before polling waits
 
             :type token: str
             :type widget_id: str
             :type longpool_timeout: int
             :type logging_level: int
+            :type polling_policy: PollingPolicy
+            :type trusted: bool
+            :type cache_ttl: Union[float, Dict[str, float]]
+            :type cache_size: int
+            :type rate_limiter: RateLimiter
+            :type priority: Priority
+            :type connection: ConnectionOptions
+            :type retry_policy: RetryPolicy
+            :type circuit_breaker: CircuitBreaker
+            :type deduplicator: DonateDeduplicator
+            :type journal: EventJournal
+            :type metrics: Metrics
+            :type dispatch_workers: int
+            :type dispatch_queue_size: int
 
             :return: Donatello API wrapper
             :rtype: Donatello
@@ -71,12 +124,48 @@ class Donatello(BaseClient):
                          widget_id=widget_id,
                          longpool_timeout=longpool_timeout,
                          logging_level=logging_level,
+                         polling_policy=polling_policy,
+                         trusted=trusted,
+                         cache_ttl=cache_ttl,
+                         cache_size=cache_size,
+                         rate_limiter=rate_limiter,
+                         priority=priority,
+                         connection=connection,
+                         session=session,
+                         retry_policy=retry_policy,
+                         circuit_breaker=circuit_breaker,
+                         deduplicator=deduplicator,
+                         journal=journal,
+                         metrics=metrics,
                          is_async=False)
 
+        self._polling_thread: threading.Thread = None
+        self._wakeup = threading.Event()
+        if dispatch_workers:
+            self._on_donate = ThreadedEventHandler(workers=dispatch_workers,
+                                                   queue_size=dispatch_queue_size,
+                                                   error_callback=self._error_handler)
+            self._instrument()
+
+    @property
+    def dispatch_queue_depth(self) -> int:
+        """Number of donate listener calls waiting for a worker"""
+        if isinstance(self._on_donate, ThreadedEventHandler):
+            return self._on_donate.queue_depth
+        return 0
+
+    @property
+    def dispatch_stats(self) -> Dict[str, HandlerStats]:
+        """Donate listener counters when dispatching to workers"""
+        if isinstance(self._on_donate, ThreadedEventHandler):
+            return self._on_donate.stats
+        return {}
+
     def _request(self,
                  method: str,
                  url: str,
                  endpoint: str,
+                 priority: Priority = Priority.LIVE,
                  **kwargs
         ) -> dict:
         """Make a request to API
@@ -85,16 +174,62 @@ class Donatello(BaseClient):
             :param method: HTTP method
             :param url: API url
             :param endpoint: API endpoint
+            :param priority: Rate limiter priority
             :param **kwargs: Additional arguments for requests.request
         """
-        resp = self._session.request(
-            method, url + endpoint, **kwargs)
-        data: dict = json.loads(resp.text)
-        self._logger.debug(f"Response: {data}")
+        kwargs.setdefault("headers", self._headers)
+        kwargs.setdefault("timeout", self._connection.request_timeout)
+        resp = self._send(method, url, endpoint, priority, **kwargs)
+        data: dict = loads(resp.content)
+        self._logger.debug("Response: %s", data)
         if data.get("success") is False:
             self._error_handler(data)
         return data
 
+    def _send(self, method: str, url: str, endpoint: str, priority: Priority, **kwargs):
+        """Send a request with retries and circuit breaking
+            Returns :class: `requests.Response` of the last attempt
+        """
+        host = urlsplit(url).netloc
+        metrics = self._metrics
+        attempts = self._retry_policy.attempts_for(method)
+        for attempt in range(1, attempts + 1):
+            if self._circuit_breaker is not None:
+                self._circuit_breaker.check(host)
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire(priority if self._priority is None else self._priority)
+            started = time.perf_counter() if metrics is not None else 0
+            try:
+                resp = self._session.request(method, url + endpoint, **kwargs)
+            except transient_errors() as e:
+                if metrics is not None:
+                    self._observe_request(endpoint, started, failed=True)
+                self._record_failure(host)
+                if attempt == attempts:
+                    raise
+                self._logger.warning(f"{method} {endpoint} failed: {e!r}, retrying")
+            else:
+                if metrics is not None:
+                    self._observe_request(endpoint, started, failed=resp.status_code >= 400)
+                if resp.status_code not in self._retry_policy.statuses:
+                    self._record_success(host)
+                    return resp
+                self._record_failure(host)
+                if attempt == attempts:
+                    return resp
+                # A streamed body is never read, release its connection before retrying
+                resp.close()
+                self._logger.warning(f"{method} {endpoint} returned {resp.status_code}, retrying")
+            if metrics is not None:
+                metrics.inc("request_retries_total", endpoint=endpoint)
+            time.sleep(self._retry_policy.delay(attempt))
+
+    def _cached(self, endpoint: str, loader):
+        """Serve a response from the cache when enabled"""
+        if self._cache is None:
+            return loader()
+        return self._cache.fetch((endpoint,), loader)
+
     def _error_handler(self, message: Union[str, dict]) -> None:
         """Handle errors
             :param message: Error message
@@ -106,43 +241,183 @@ class Donatello(BaseClient):
         """Get user info
             Returns :class: `User` with user info
         """
-        self._user = User(**self._request("GET", self._api_url, "me"))
+        self._user = self._cached(
+            "me", lambda: self._decode(models.User, self._request("GET", self._api_url, "me")))
         return self._user
 
     def get_donates(self, page: int = 0, per_page: int = 20) -> DonateList:
         """Get donates
             Returns :class: `DonateList` with donates
+
+            Sent with bulk priority when a rate limiter is set
         """
-        return DonateList(**self._request("GET", self._api_url, "donates", params={
+        return self._decode(models.DonateList, self._request("GET", self._api_url, "donates",
+                                                      priority=Priority.BULK, params={
             "page": page,
             "size": per_page
         }))
 
+    def iter_donates(self, per_page: int = 20, prefetch: int = 4) -> Iterator[Donate]:
+        """Iterate over all donates page by page
+            Returns iterator of :class: `Donate`
+
+            Up to ``prefetch`` next pages are fetched in a thread pool while
+            the current one is consumed, so memory is bounded by the prefetch
+            window instead of the full history.
+
+            :param per_page: Donates per page
+            :param prefetch: Number of pages fetched ahead, at least 1
+
+            Usage::
+
+                >>> for donate in client.iter_donates(per_page=100):
+                >>>     print(donate)
+        """
+        if prefetch < 1:
+            raise ValueError("prefetch must be at least 1")
+        first = self.get_donates(0, per_page)
+        yield from first
+        if first.last or not first.content:
+            return
+
+        pages = ceil(first.total / per_page)
+        next_page = 1
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=prefetch)
+        try:
+            while True:
+                while len(pending) < prefetch and next_page < pages:
+                    pending.append(executor.submit(
+                        self.get_donates, next_page, per_page))
+                    next_page += 1
+                if not pending:
+                    return
+                donates = pending.popleft().result()
+                yield from donates
+                if donates.last or not donates.content:
+                    return
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stream_donates(self, per_page: int = 100, page: int = 0) -> Iterator[Donate]:
+        """Iterate over donates while pages are downloading
+            Returns iterator of :class: `Donate`
+
+            Each page is parsed incrementally from the raw response bytes and
+            donates are yielded as soon as they are read, so memory stays flat
+            for any ``per_page``. Pages are fetched one after another with bulk
+            priority, a failed page is retried only before its first donate.
+
+            :param per_page: Donates per page
+            :param page: First page
+
+            Usage::
+
+                >>> for donate in client.stream_donates(per_page=1000):
+                >>>     print(donate)
+        """
+        while True:
+            resp = self._send("GET", self._api_url, "donates", Priority.BULK, stream=True,
+                              headers=self._headers, timeout=self._connection.request_timeout,
+                              params={"page": page, "size": per_page})
+            parser = PageParser()
+            try:
+                if resp.status_code >= 400:
+                    self._error_handler(loads(resp.content))
+                    return
+                for chunk in resp.iter_content(CHUNK_SIZE):
+                    for item in parser.feed(chunk):
+                        yield self._decode(models.Donate, item)
+                fields = parser.close()
+            finally:
+                resp.close()
+            if fields.get("success") is False:
+                self._error_handler(fields)
+                return
+            if fields.get("last", True) or parser.items < per_page:
+                return
+            page += 1
+
     def get_clients(self) -> ClientList:
         """Get clients
             Returns :class: `ClientList` with clients
         """
-        return ClientList(**self._request("GET", self._api_url, "clients"))
+        return self._cached(
+            "clients", lambda: self._decode(models.ClientList, self._request("GET", self._api_url, "clients")))
+
+    def _dispatch_donate(self,
+                         data: dict,
+                         seq: int = None,
+                         replay: bool = False,
+                         received: float = None
+        ) -> bool:
+        """Decode and dispatch a long polling donate
+            Returns ``True`` if it reached listeners
+
+            The journal entry is acknowledged once all listeners succeeded,
+            batch listeners once the donate was delivered in a batch.
+        """
+        donate = self._decode(models.LongpoolDonate, data)
+        if not self._is_new(donate) and not replay:
+            self._journal_ack(seq)
+            return False
+        self._polling_stats.donates += 1
+        self._invalidate_cache()
+        if seq is None and self._metrics is None:
+            self._on_donate.handle_event([donate])
+            return True
+
+        def done() -> None:
+            self._journal_ack(seq)
+            self._observe_donate(received)
+
+        self._on_donate.handle_event([donate], on_done=done)
+        return True
+
+    def _replay_journal(self) -> None:
+        """Dispatch donates left unacknowledged by a previous run"""
+        if self._journal is None:
+            return
+        pending = self._journal.pending()
+        if pending:
+            self._logger.info(f"Replaying {len(pending)} journaled donates")
+        for seq, data in pending:
+            try:
+                self._dispatch_donate(data, seq, replay=True)
+            except Exception as e:
+                self._error_handler(e)
 
     def _long_polling(self) -> None:
         """Long polling method"""
         self._logger.info("Long polling started.")
         self._on_ready.handle_event(self.get_me())
+        self._replay_journal()
+        stats = self._polling_stats
         while not self._stop_long_polling:
+            donated = False
             try:
+                stats.requests += 1
                 resp = self._request("GET", self._widget_url, "info")
                 if resp.get("clientName"):
-                    self._on_donate.handle_event([LongpoolDonate(**resp)])
+                    received = time.perf_counter() if self._metrics is not None else None
+                    donated = self._dispatch_donate(resp, self._journal_append(resp), received=received)
                 elif not resp.get("success"):
+                    stats.errors += 1
                     self._error_handler(resp)
             except Exception as e:
+                stats.errors += 1
                 self._error_handler(e)
-            time.sleep(self._longpool_timeout)
+            self._wakeup.wait(self._polling_policy.next_interval(stats, donated))
 
     def start(self) -> None:
         """Start long polling"""
         if self._is_long_polling:
-            threading.Thread(target=self._long_polling).start()
+            self._stop_long_polling = False
+            self._wakeup.clear()
+            if isinstance(self._on_donate, ThreadedEventHandler):
+                self._on_donate.start()
+            self._polling_thread = threading.Thread(target=self._long_polling, name="donatello-polling")
+            self._polling_thread.start()
         else:
             self._logger.warning(
                 "Long polling is disabled. You can't use on_donate, on_error events.")
@@ -150,9 +425,27 @@ class Donatello(BaseClient):
                 "You can enable long polling by specifying widget ID in constructor.")
 
     def stop(self) -> None:
-        """Stop long polling"""
+        """Stop long polling
+
+            Waits for the polling thread to finish its current request
+            and for the dispatch workers to hand out queued donates, unless
+            called from them, then delivers the buffered batches.
+        """
         self._stop_long_polling = True
+        self._wakeup.set()
+        thread, self._polling_thread = self._polling_thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        if isinstance(self._on_donate, ThreadedEventHandler):
+            self._on_donate.close(wait=True)
+        for batcher in self._batchers:
+            batcher.close()
         self._logger.info("Long polling stopped.")
 
+    def close(self) -> None:
+        """Close requests session"""
+        if self._owns_session:
+            self._session.close()
+
     def __del__(self) -> None:
         self.stop()
\ No newline at end of file
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+try:
+    import ujson as json  # type: ignore # noqa
+except ImportError:
+    import json
+
+from typing import Optional, Tuple
+
+
+class ConnectionOptions:
+    def __init__(self,
+                 pool_size: int = 10,
+                 keepalive: bool = True,
+                 keepalive_timeout: float = 15,
+                 connect_timeout: float = 10,
+                 read_timeout: float = 30,
+                 dns_cache_ttl: int = 10,
+                 base_url: str = None
+                 ) -> None:
+        """HTTP connection pool and timeout settings
+
+            Pass to a client as ``connection=`` or build a session once and
+            share it between clients with ``session=``.
+
+            :param pool_size: Maximum pooled connections
+            :param keepalive: Reuse connections between requests
+            :param keepalive_timeout: Seconds an idle connection is kept open, aiohttp only
+            :param connect_timeout: Seconds to wait for a connection, ``None`` waits forever
+            :param read_timeout: Seconds to wait for response data, ``None`` waits forever
+            :param dns_cache_ttl: Seconds DNS lookups are cached, aiohttp only
+            :param base_url: Scheme and host of the API, defaults to ``https://donatello.to``. Point it at a :class:`~donatello.testing.MockServer` to run without network
+
+            :type pool_size: int
+            :type keepalive: bool
+            :type keepalive_timeout: float
+            :type connect_timeout: float
+            :type read_timeout: float
+            :type dns_cache_ttl: int
+            :type base_url: str
+
+            Usage::
+
+                >>> from donatello import ConnectionOptions, Donatello
+                >>> options = ConnectionOptions(pool_size=50, connect_timeout=3, read_timeout=10)
+                >>> session = options.session()
+                >>> clients = [Donatello(token, session=session, connection=options) for token in tokens]
+        """
+        self.pool_size = pool_size
+        self.keepalive = keepalive
+        self.keepalive_timeout = keepalive_timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.base_url = base_url
+
+    @property
+    def request_timeout(self) -> Optional[Tuple[Optional[float], Optional[float]]]:
+        """``timeout`` argument for requests"""
+        if self.connect_timeout is None and self.read_timeout is None:
+            return None
+        return (self.connect_timeout, self.read_timeout)
+
+    def session(self):
+        """Create a pooled :class:`requests.Session`"""
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        if not self.keepalive:
+            session.headers["Connection"] = "close"
+        return session
+
+    def connector(self, limit: int = None):
+        """Create an :class:`aiohttp.TCPConnector`
+
+            :param limit: Overrides ``pool_size``
+        """
+        import aiohttp
+        if self.keepalive:
+            return aiohttp.TCPConnector(limit=limit or self.pool_size,
+                                        ttl_dns_cache=self.dns_cache_ttl,
+                                        keepalive_timeout=self.keepalive_timeout)
+        return aiohttp.TCPConnector(limit=limit or self.pool_size,
+                                    ttl_dns_cache=self.dns_cache_ttl,
+                                    force_close=True)
+
+    def async_session(self, limit: int = None):
+        """Create a pooled :class:`aiohttp.ClientSession`
+
+            :param limit: Overrides ``pool_size``
+        """
+        import aiohttp
+        timeout = aiohttp.ClientTimeout(sock_connect=self.connect_timeout,
+                                        sock_read=self.read_timeout)
+        return aiohttp.ClientSession(connector=self.connector(limit),
+                                     timeout=timeout,
+                                     json_serialize=json.dumps)
+
+    def __repr__(self) -> str:
+        return (f"<ConnectionOptions pool_size={self.pool_size} keepalive={self.keepalive} "
+                f"connect_timeout={self.connect_timeout} read_timeout={self.read_timeout} "
+                f"dns_cache_ttl={self.dns_cache_ttl}>")
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .models import LongpoolDonate
+
+
+def fingerprint(donate: LongpoolDonate) -> str:
+    """Stable donate identity across process restarts"""
+    key = "\x1f".join((str(donate.widget_id or ""), donate.created_at.isoformat(),
+                       donate.client_name, str(donate.amount), donate.message))
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+class DonateDeduplicator:
+    def __init__(self, max_size: int = 10000, checkpoint: str = None) -> None:
+        """Drops long polling donates that were already delivered
+
+            Remembers fingerprints of the last ``max_size`` donates, built
+            from ``created_at``, ``client_name``, ``amount``, ``message``
+            and the widget ID. Lookups are O(1) and memory stays bounded.
+            With ``checkpoint`` fingerprints are appended to a file and
+            loaded on start, so restarts don't deliver donates again.
+
+            :param max_size: Number of remembered donates
+            :param checkpoint: Fingerprints file path
+
+            :type max_size: int
+            :type checkpoint: str
+
+            Usage::
+
+                >>> from donatello import DonateDeduplicator, Donatello
+                >>> dedup = DonateDeduplicator(checkpoint="donates.seen")
+                >>> client = Donatello("your_token", "widget_id", deduplicator=dedup)
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._max_size = max_size
+        self._seen: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+        self._checkpoint = checkpoint
+        self._file = None
+        self._lines = 0
+        self.duplicates = 0
+        if checkpoint is not None:
+            self._load()
+
+    def _load(self) -> None:
+        if os.path.exists(self._checkpoint):
+            with open(self._checkpoint, encoding="ascii") as f:
+                for line in f:
+                    self._remember(line.strip())
+                    self._lines += 1
+        self._file = open(self._checkpoint, "a", encoding="ascii")
+
+    def _remember(self, key: str) -> None:
+        self._seen[key] = None
+        self._seen.move_to_end(key)
+        if len(self._seen) > self._max_size:
+            self._seen.popitem(last=False)
+
+    def _compact(self) -> None:
+        """Rewrite the checkpoint with remembered fingerprints only"""
+        self._file.close()
+        temp = self._checkpoint + ".tmp"
+        with open(temp, "w", encoding="ascii") as f:
+            f.writelines(key + "\n" for key in self._seen)
+        os.replace(temp, self._checkpoint)
+        self._file = open(self._checkpoint, "a", encoding="ascii")
+        self._lines = len(self._seen)
+
+    def is_new(self, donate: LongpoolDonate) -> bool:
+        """Record a donate, returns ``False`` if it was already seen"""
+        key = fingerprint(donate)
+        with self._lock:
+            if key in self._seen:
+                self._seen.move_to_end(key)
+                self.duplicates += 1
+                return False
+            self._remember(key)
+            if self._file is not None:
+                self._file.write(key + "\n")
+                self._file.flush()
+                self._lines += 1
+                if self._lines > 2 * self._max_size:
+                    self._compact()
+            return True
+
+    def __contains__(self, donate: LongpoolDonate) -> bool:
+        return fingerprint(donate) in self._seen
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def close(self) -> None:
+        """Close the checkpoint file"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __repr__(self) -> str:
+        return f"<DonateDeduplicator size={len(self)} max_size={self._max_size} duplicates={self.duplicates}>"
@@ -1,38 +1,412 @@
+import logging
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List
+
+from .metrics import Metrics
+
+if TYPE_CHECKING:
+    import asyncio
+
+
+def _listener_name(listener) -> str:
+    # Wrappers like batchers are named after the listener they wrap
+    name = getattr(listener, "name", None)
+    if isinstance(name, str):
+        return name
+    return getattr(listener, "__qualname__", repr(listener))
+
+
 class EventHandler:
     """An event handler for functions"""
     def __init__(self):
         """Initialise a list of listeners"""
         self.__listeners = []
-    
+        self._metrics: Metrics = None
+        self._event: str = None
+
+    @property
+    def listeners(self) -> list:
+        """Registered listeners"""
+        return self.__listeners
+
     def add_listener(self, listener):
         """Add a listener to the list"""
         self.__listeners.append(listener)
 
-    def handle_event(self, event_data):
-        """Call all listeners"""
-        for listener in self.__listeners:
-            listener(event_data)
-    
+    def instrument(self, metrics: Metrics, event: str) -> None:
+        """Record listener durations as ``handler_duration_seconds``
+
+            :param metrics: Metrics to record into
+            :param event: Event name label
+        """
+        self._metrics = metrics
+        self._event = event
+
+    def _observe(self, listener, started: float) -> None:
+        self._metrics.observe("handler_duration_seconds", time.perf_counter() - started,
+                              event=self._event, handler=_listener_name(listener))
+
+    def handle_event(self, event_data, on_done: Callable[[], None] = None):
+        """Call all listeners
+
+            :param on_done: Called once all listeners succeeded, deferred
+                listeners like batchers report after delivering the event
+        """
+        if on_done is None and self._metrics is None:
+            for listener in self.__listeners:
+                listener(event_data)
+            return
+        listeners = list(self.__listeners)
+        if on_done is not None and not listeners:
+            on_done()
+            return
+        completion = _Completion(len(listeners), on_done) if on_done is not None else None
+        for listener in listeners:
+            started = time.perf_counter()
+            try:
+                _call_listener(listener, event_data, completion)
+            finally:
+                if self._metrics is not None:
+                    self._observe(listener, started)
+
     def remove_listener(self, listener):
         """Remove a listener from the list"""
         self.__listeners.remove(listener)
 
 
+class HandlerStats:
+    """Dispatch counters of a single listener"""
+    __slots__ = ("calls", "errors", "total_wait", "total_time", "max_time")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        # Seconds spent queued and running
+        self.total_wait = 0.0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    @property
+    def avg_time(self) -> float:
+        """Average listener run time in seconds"""
+        return self.total_time / self.calls if self.calls else 0.0
+
+    def __str__(self) -> str:
+        return f"<HandlerStats calls={self.calls} errors={self.errors} total_wait={self.total_wait:.3f} avg_time={self.avg_time:.3f} max_time={self.max_time:.3f}>"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class _Completion:
+    """Calls ``done`` once every listener of an event succeeded"""
+    __slots__ = ("remaining", "failed", "done", "lock")
+
+    def __init__(self, remaining: int, done: Callable[[], None]) -> None:
+        self.remaining = remaining
+        self.failed = False
+        self.done = done
+        self.lock = threading.Lock()
+
+    def finish(self, ok: bool) -> None:
+        with self.lock:
+            self.remaining -= 1
+            self.failed = self.failed or not ok
+            if self.remaining or self.failed:
+                return
+        try:
+            self.done()
+        except Exception:
+            logging.getLogger("donatello").exception("Completion callback failed")
+
+
+def _call_listener(listener, event_data, completion: "_Completion" = None) -> None:
+    """Call a listener, handing the completion to deferred listeners
+
+        Listeners with a true ``deferred`` attribute take a second argument
+        and call it with ``True`` or ``False`` once the event was handled,
+        the rest count as succeeded when they return.
+    """
+    if completion is None:
+        listener(event_data)
+    elif getattr(listener, "deferred", False):
+        listener(event_data, completion.finish)
+    else:
+        listener(event_data)
+        completion.finish(True)
+
+
+class ThreadedEventHandler(EventHandler):
+    """An event handler calling functions in a worker pool
+
+        ``handle_event`` only enqueues events, listeners run on worker
+        threads. Every listener is pinned to one worker, so each listener
+        sees events in order while different listeners run concurrently.
+        When a worker queue is full ``handle_event`` blocks until there is
+        room, which slows polling down instead of growing memory. After
+        :meth:`close` events are dropped until :meth:`start` is called.
+
+        :param workers: Number of worker threads
+        :param queue_size: Maximum queued events per worker
+        :param error_callback: Called with exceptions raised by listeners
+
+        :type workers: int
+        :type queue_size: int
+        :type error_callback: callable
+    """
+    def __init__(self,
+                 workers: int = 4,
+                 queue_size: int = 1000,
+                 error_callback: Callable[[Exception], None] = None):
+        super().__init__()
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self._error_callback = error_callback
+        self._workers = workers
+        self._queue_size = queue_size
+        self._queues: List[queue.Queue] = []
+        self._threads: List[threading.Thread] = []
+        self._assigned: Dict[Callable, int] = {}
+        self._next_worker = 0
+        self._stats: Dict[Callable, HandlerStats] = {}
+        self._closed = False
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger("donatello")
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of queued listener calls"""
+        return sum(q.qsize() for q in self._queues)
+
+    @property
+    def stats(self) -> Dict[str, HandlerStats]:
+        """Dispatch counters per listener name"""
+        return {_listener_name(listener): stats
+                for listener, stats in self._stats.items()}
+
+    def add_listener(self, listener):
+        """Add a listener and pin it to a worker"""
+        super().add_listener(listener)
+        if listener not in self._assigned:
+            self._assigned[listener] = self._next_worker % self._workers
+            self._next_worker += 1
+            self._stats[listener] = HandlerStats()
+
+    def remove_listener(self, listener):
+        """Remove a listener from the list"""
+        super().remove_listener(listener)
+        if listener not in self.listeners:
+            self._assigned.pop(listener, None)
+
+    def _start(self) -> None:
+        self._queues = [queue.Queue(self._queue_size) for _ in range(self._workers)]
+        for q in self._queues:
+            thread = threading.Thread(target=self._worker, args=(q,), name="donatello-dispatch")
+            thread.start()
+            self._threads.append(thread)
+
+    def start(self) -> None:
+        """Accept events again after :meth:`close`, workers start with the first event"""
+        with self._lock:
+            self._closed = False
+
+    def handle_event(self, event_data, on_done: Callable[[], None] = None):
+        """Enqueue the event for all listeners
+
+            Events arriving after :meth:`close` are dropped and ``on_done``
+            is not called for them.
+
+            :param on_done: Called on a worker once all listeners succeeded
+        """
+        with self._lock:
+            if self._closed:
+                self._logger.warning("Dispatcher is closed, event dropped")
+                return
+            if not self._threads:
+                self._start()
+        listeners = []
+        for listener in list(self.listeners):
+            # None when the listener was removed since the copy
+            worker = self._assigned.get(listener)
+            if worker is not None:
+                listeners.append((listener, worker))
+        if on_done is not None and not listeners:
+            on_done()
+            return
+        completion = _Completion(len(listeners), on_done) if on_done is not None else None
+        queued_at = time.monotonic()
+        for listener, worker in listeners:
+            self._queues[worker].put((listener, event_data, queued_at, completion))
+
+    def _worker(self, jobs: queue.Queue) -> None:
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            listener, event_data, queued_at, completion = job
+            stats = self._stats[listener]
+            started = time.monotonic()
+            try:
+                _call_listener(listener, event_data, completion)
+            except Exception as e:
+                if completion is not None:
+                    completion.finish(False)
+                stats.errors += 1
+                if self._error_callback is None:
+                    self._logger.exception(f"Listener {listener!r} failed")
+                else:
+                    try:
+                        self._error_callback(e)
+                    except Exception:
+                        self._logger.exception("Error callback failed")
+            finished = time.monotonic()
+            stats.calls += 1
+            stats.total_wait += started - queued_at
+            stats.total_time += finished - started
+            stats.max_time = max(stats.max_time, finished - started)
+            if self._metrics is not None:
+                self._metrics.observe("handler_duration_seconds", finished - started,
+                                      event=self._event, handler=_listener_name(listener))
+
+    def close(self, wait: bool = True) -> None:
+        """Stop workers after the queued events are handled
+
+            :param wait: Wait for the workers to finish
+        """
+        with self._lock:
+            self._closed = True
+            threads, self._threads = self._threads, []
+        if threads:
+            for q in self._queues:
+                q.put(None)
+        if wait:
+            for thread in threads:
+                # A listener may stop the client from a worker
+                if thread is not threading.current_thread():
+                    thread.join()
+
+
 class AsyncEventHandler:
-    """An event handler for async functions"""
-    def __init__(self):
+    """An event handler for async functions
+
+        By default listeners are awaited one after another and exceptions
+        propagate to the caller. With ``concurrent=True`` listeners run
+        concurrently, so dispatch takes as long as the slowest listener,
+        and their exceptions are passed to ``error_callback``.
+
+        :param concurrent: Run listeners concurrently
+        :param max_concurrency: Maximum listeners running at once
+        :param timeout: Seconds a listener may run before it is cancelled
+        :param error_callback: Coroutine function called with listener exceptions
+
+        :type concurrent: bool
+        :type max_concurrency: int
+        :type timeout: float
+        :type error_callback: callable
+    """
+    def __init__(self,
+                 concurrent: bool = False,
+                 max_concurrency: int = None,
+                 timeout: float = None,
+                 error_callback: Callable[[Exception], Awaitable[None]] = None):
         """Initialise a list of listeners"""
         self.__listeners = []
+        self._concurrent = concurrent
+        self._max_concurrency = max_concurrency
+        self._timeout = timeout
+        self._error_callback = error_callback
+        self._semaphore: "asyncio.Semaphore" = None
+        self._metrics: Metrics = None
+        self._event: str = None
+        self._logger = logging.getLogger("donatello")
+
+    @property
+    def listeners(self) -> list:
+        """Registered listeners"""
+        return self.__listeners
 
     def add_listener(self, listener: callable):
         """Add a listener to the list"""
         self.listeners.append(listener)
 
-    async def handle_event(self, event_data: dict):
-        """Call all listeners"""
-        for listener in self.listeners:
+    def instrument(self, metrics: Metrics, event: str) -> None:
+        """Record listener durations as ``handler_duration_seconds``
+
+            :param metrics: Metrics to record into
+            :param event: Event name label
+        """
+        self._metrics = metrics
+        self._event = event
+
+    async def _run(self, listener: callable, event_data: dict, completion: _Completion = None):
+        """Await a listener, timing it when instrumented"""
+        if self._metrics is None:
+            return await self._await(listener, event_data, completion)
+        started = time.perf_counter()
+        try:
+            await self._await(listener, event_data, completion)
+        finally:
+            self._metrics.observe("handler_duration_seconds", time.perf_counter() - started,
+                                  event=self._event, handler=_listener_name(listener))
+
+    @staticmethod
+    async def _await(listener: callable, event_data: dict, completion: _Completion = None):
+        """Await a listener, handing the completion to deferred listeners"""
+        if completion is None:
+            await listener(event_data)
+        elif getattr(listener, "deferred", False):
+            await listener(event_data, completion.finish)
+        else:
             await listener(event_data)
+            completion.finish(True)
+
+    async def handle_event(self, event_data: dict, on_done: Callable[[], None] = None) -> bool:
+        """Call all listeners
+            Returns ``True`` if every listener succeeded
+
+            :param on_done: Called once all listeners succeeded, deferred
+                listeners like batchers report after delivering the event
+        """
+        listeners = list(self.listeners)
+        if on_done is not None and not listeners:
+            on_done()
+            return True
+        completion = _Completion(len(listeners), on_done) if on_done is not None else None
+        if not self._concurrent:
+            for listener in listeners:
+                await self._run(listener, event_data, completion)
+            return True
+        import asyncio
+        if self._max_concurrency and self._semaphore is None:
+            # Created lazily to bind to the running loop
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        results = await asyncio.gather(*(self._call(listener, event_data, completion) for listener in listeners))
+        return all(results)
+
+    async def _call(self, listener: callable, event_data: dict, completion: _Completion = None) -> bool:
+        """Call a single listener, reporting its exceptions"""
+        import asyncio
+        try:
+            if self._semaphore is None:
+                await asyncio.wait_for(self._run(listener, event_data, completion), self._timeout)
+            else:
+                async with self._semaphore:
+                    await asyncio.wait_for(self._run(listener, event_data, completion), self._timeout)
+            return True
+        except Exception as e:
+            if completion is not None:
+                completion.finish(False)
+            if self._error_callback is None:
+                self._logger.exception(f"Listener {listener!r} failed")
+                return False
+            try:
+                await self._error_callback(e)
+            except Exception:
+                self._logger.exception("Error callback failed")
+            return False
 
     def remove_listener(self, listener: callable):
         """Remove a listener from the list"""
-        self.listeners.remove(listener)
\ No newline at end of file
+        self.listeners.remove(listener)
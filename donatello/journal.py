@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+try:
+    import ujson as json  # type: ignore # noqa
+except ImportError:
+    import json
+
+import mmap
+import os
+import struct
+import threading
+import zlib
+from typing import Dict, Iterator, List, Tuple
+
+# type, sequence number, payload length, payload crc32
+_HEADER = struct.Struct("<BQII")
+_EVENT = 1
+_ACK = 2
+
+
+class EventJournal:
+    def __init__(self,
+                 path: str,
+                 sync_interval: float = 0.05,
+                 compact_after: int = 1000
+                 ) -> None:
+        """Durable append-only journal of long polling payloads
+
+            Every donate payload is appended before dispatch and acknowledged
+            once all listeners succeeded. Unacknowledged payloads are
+            replayed by the client on the next ``start()``.
+
+            Appends are flushed to the OS immediately, which survives a
+            process crash, while ``fsync`` runs in the background at most
+            every ``sync_interval`` seconds for all pending appends at once
+            (group commit). Replay and compaction read the file through
+            ``mmap``. A torn record at the end of the file is dropped.
+
+            :param path: Journal file path
+            :param sync_interval: Seconds between group fsyncs, 0 fsyncs every append
+            :param compact_after: Rewrite the file after this many acknowledgements
+
+            :type path: str
+            :type sync_interval: float
+            :type compact_after: int
+
+            Usage::
+
+                >>> from donatello import Donatello, EventJournal
+                >>> client = Donatello("your_token", "widget_id", journal=EventJournal("donates.journal"))
+        """
+        self._path = path
+        self._sync_interval = sync_interval
+        self._compact_after = compact_after
+        self._lock = threading.Lock()
+        # Payload offset per unacknowledged seq, in append order
+        self._unacked: Dict[int, int] = {}
+        self._sequence = 0
+        self._acks = 0
+        self._dirty = False
+
+        end = self._scan()
+        self._file = open(path, "ab")
+        if self._file.tell() != end:
+            self._file.truncate(end)
+            # Offsets of new records are taken from the file position
+            self._file.seek(end)
+
+        self._closed = threading.Event()
+        self._syncer = None
+        if sync_interval > 0:
+            self._syncer = threading.Thread(target=self._sync_loop, name="donatello-journal", daemon=True)
+            self._syncer.start()
+
+    def _records(self, data) -> Iterator[Tuple[int, int, int, int, int]]:
+        """Yield (type, seq, offset, length, end) of valid records"""
+        offset = 0
+        size = len(data)
+        while offset + _HEADER.size <= size:
+            kind, seq, length, crc = _HEADER.unpack_from(data, offset)
+            start = offset + _HEADER.size
+            end = start + length
+            if kind not in (_EVENT, _ACK) or end > size or zlib.crc32(data[start:end]) != crc:
+                return
+            yield kind, seq, start, length, end
+            offset = end
+
+    def _scan(self) -> int:
+        """Load unacknowledged entries, returns end of the last valid record"""
+        if not os.path.exists(self._path) or os.path.getsize(self._path) == 0:
+            return 0
+        end = 0
+        with open(self._path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for kind, seq, start, length, end in self._records(data):
+                self._sequence = max(self._sequence, seq)
+                if kind == _EVENT:
+                    self._unacked[seq] = start
+                else:
+                    self._unacked.pop(seq, None)
+        return end
+
+    def _write(self, kind: int, seq: int, payload: bytes = b"") -> None:
+        self._file.write(_HEADER.pack(kind, seq, len(payload), zlib.crc32(payload)) + payload)
+        self._file.flush()
+        if self._sync_interval > 0:
+            self._dirty = True
+        else:
+            os.fsync(self._file.fileno())
+
+    def _sync_loop(self) -> None:
+        while not self._closed.wait(self._sync_interval):
+            with self._lock:
+                if self._dirty and not self._file.closed:
+                    self._dirty = False
+                    os.fsync(self._file.fileno())
+
+    def append(self, payload: dict) -> int:
+        """Record a payload before dispatch
+
+            :param payload: Raw long polling response
+            :return: Sequence number to acknowledge
+        """
+        data = json.dumps(payload).encode()
+        with self._lock:
+            self._sequence += 1
+            seq = self._sequence
+            self._unacked[seq] = self._file.tell() + _HEADER.size
+            self._write(_EVENT, seq, data)
+        return seq
+
+    def ack(self, seq: int) -> None:
+        """Mark a payload as handled"""
+        with self._lock:
+            if self._unacked.pop(seq, None) is None:
+                return
+            self._write(_ACK, seq)
+            self._acks += 1
+            if self._compact_after and self._acks >= self._compact_after:
+                self._compact()
+
+    @staticmethod
+    def _record(data, start: int) -> bytes:
+        """Payload of the event record at ``start``, read through its header"""
+        _, _, length, _ = _HEADER.unpack_from(data, start - _HEADER.size)
+        return data[start - _HEADER.size:start + length]
+
+    def pending(self) -> List[Tuple[int, dict]]:
+        """Unacknowledged payloads in append order"""
+        with self._lock:
+            if not self._unacked:
+                return []
+            self._file.flush()
+            with open(self._path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return []
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    # Read at the recorded offsets, acknowledgements are not rescanned
+                    return [(seq, json.loads(self._record(data, start)[_HEADER.size:].decode()))
+                            for seq, start in self._unacked.items()]
+
+    def __len__(self) -> int:
+        return len(self._unacked)
+
+    def compact(self) -> None:
+        """Rewrite the journal with unacknowledged payloads only"""
+        with self._lock:
+            self._compact()
+
+    def _compact(self) -> None:
+        self._file.flush()
+        if os.fstat(self._file.fileno()).st_size == 0:
+            # Nothing was written since the last compaction, mmap rejects empty files
+            return
+        temp = self._path + ".tmp"
+        unacked = {}
+        with open(self._path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data, \
+                open(temp, "wb") as out:
+            for seq, start in self._unacked.items():
+                unacked[seq] = out.tell() + _HEADER.size
+                out.write(self._record(data, start))
+            out.flush()
+            os.fsync(out.fileno())
+        self._file.close()
+        os.replace(temp, self._path)
+        self._file = open(self._path, "ab")
+        self._unacked = unacked
+        self._acks = 0
+        self._dirty = False
+
+    def close(self) -> None:
+        """Sync and close the journal"""
+        self._closed.set()
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+
+    def __repr__(self) -> str:
+        return f"<EventJournal path={self._path} pending={len(self)}>"
@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+import random
+import threading
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple, Union
+
+from .events import AsyncEventHandler
+from .models.amounts import parse_amount
+
+if TYPE_CHECKING:
+    from .async_client import AsyncDonatello
+    from .client import Donatello
+    from .models import Client, Donate, LongpoolDonate
+
+# Levels of the skip list, enough for millions of donors
+_MAX_LEVEL = 24
+
+
+class _Node:
+    __slots__ = ("item", "next", "width")
+
+    def __init__(self, item: Optional[Tuple[int, str]], level: int) -> None:
+        self.item = item
+        self.next: List[Optional[_Node]] = [None] * level
+        # Positions skipped by each forward link
+        self.width: List[int] = [0] * level
+
+
+class _SkipList:
+    """Indexable skip list, insert, remove and rank are O(log n)"""
+    __slots__ = ("_head", "_level", "_size")
+
+    def __init__(self) -> None:
+        self._head = _Node(None, _MAX_LEVEL)
+        self._level = 0
+        self._size = 0
+
+    def _path(self, item: Tuple[int, str]) -> Tuple[List[_Node], List[int]]:
+        """Last node before ``item`` and its position on every level"""
+        chain = [self._head] * self._level
+        positions = [0] * self._level
+        node, position = self._head, 0
+        for level in reversed(range(self._level)):
+            following = node.next[level]
+            while following is not None and following.item < item:
+                position += node.width[level]
+                node, following = following, following.next[level]
+            chain[level] = node
+            positions[level] = position
+        return chain, positions
+
+    def insert(self, item: Tuple[int, str]) -> None:
+        level = 1
+        while level < _MAX_LEVEL and random.random() < 0.5:
+            level += 1
+        head = self._head
+        for new in range(self._level, level):
+            # Links from the head to the end skip every item
+            head.next[new] = None
+            head.width[new] = self._size + 1
+        self._level = max(self._level, level)
+        chain, positions = self._path(item)
+        node = _Node(item, level)
+        position = positions[0] + 1
+        for index in range(level):
+            previous = chain[index]
+            skipped = position - positions[index]
+            node.next[index] = previous.next[index]
+            node.width[index] = previous.width[index] - skipped + 1
+            previous.next[index] = node
+            previous.width[index] = skipped
+        for index in range(level, self._level):
+            chain[index].width[index] += 1
+        self._size += 1
+
+    def remove(self, item: Tuple[int, str]) -> None:
+        chain, _ = self._path(item)
+        node = chain[0].next[0]
+        if node is None or node.item != item:
+            raise KeyError(item)
+        for index in range(len(node.next)):
+            previous = chain[index]
+            previous.width[index] += node.width[index] - 1
+            previous.next[index] = node.next[index]
+        for index in range(len(node.next), self._level):
+            chain[index].width[index] -= 1
+        self._size -= 1
+
+    def index(self, item: Tuple[int, str]) -> int:
+        """Number of items ordered before ``item``"""
+        _, positions = self._path(item)
+        return positions[0] if positions else 0
+
+    def first(self, k: int) -> List[Tuple[int, str]]:
+        items = []
+        node = self._head.next[0] if self._level else None
+        while node is not None and len(items) < k:
+            items.append(node.item)
+            node = node.next[0]
+        return items
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class _Ranking:
+    """Totals per key kept ordered by total, largest first"""
+    __slots__ = ("totals", "_order")
+
+    def __init__(self) -> None:
+        self.totals: Dict[str, int] = {}
+        # (-total, key) ascending, ties ordered by key
+        self._order = _SkipList()
+
+    def set(self, key: str, total: int) -> None:
+        old = self.totals.get(key)
+        if old is not None:
+            self._order.remove((-old, key))
+        self.totals[key] = total
+        self._order.insert((-total, key))
+
+    def add(self, key: str, amount: int) -> int:
+        total = self.totals.get(key, 0) + amount
+        self.set(key, total)
+        return total
+
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        return [(key, -total) for total, key in self._order.first(k)]
+
+    def rank(self, key: str) -> Optional[int]:
+        total = self.totals.get(key)
+        if total is None:
+            return None
+        return self._order.index((-total, key)) + 1
+
+    def __len__(self) -> int:
+        return len(self.totals)
+
+
+class GoalProgress:
+    """Amount raised for a goal"""
+    __slots__ = ("name", "target", "currency", "amounts", "donates")
+
+    def __init__(self, name: str, target: int = 0, currency: str = "UAH") -> None:
+        self.name = name
+        self.target = target
+        self.currency = currency
+        # Raised per currency, only ``currency`` counts towards the target
+        self.amounts: Dict[str, int] = {}
+        self.donates = 0
+
+    @property
+    def raised(self) -> int:
+        """Amount raised in the goal currency"""
+        return self.amounts.get(self.currency, 0)
+
+    @property
+    def remaining(self) -> int:
+        """Amount left to the target"""
+        return max(self.target - self.raised, 0)
+
+    @property
+    def ratio(self) -> float:
+        """Raised share of the target, can exceed 1"""
+        return self.raised / self.target if self.target else 0.0
+
+    def __str__(self) -> str:
+        return f"<GoalProgress name={self.name} raised={self.raised} target={self.target} currency={self.currency} donates={self.donates}>"
+
+    def __repr__(self) -> str:
+        return f"<GoalProgress name={self.name} raised={self.raised} target={self.target} currency={self.currency} donates={self.donates}>"
+
+
+class Leaderboard:
+    def __init__(self, currency: str = "UAH") -> None:
+        """Running donate totals per donor, currency and goal
+
+            Totals are updated incrementally from donates, so top donors, a
+            donor's rank and goal progress are answered without API requests.
+            Donor totals are kept per currency in an indexable skip list, an
+            update and a rank lookup are O(log n) and top-K walks K entries. Seed it
+            once with :meth:`seed`, then :meth:`attach` it to a client or
+            supervisor to follow new donates.
+
+            Long polling amounts are strings, they are normalized to integers
+            with :func:`~donatello.models.parse_amount` on ingestion.
+
+            :param currency: Account currency, ``get_clients`` totals are in it
+
+            :type currency: str
+
+            Usage::
+
+                >>> from donatello import Donatello, Leaderboard
+                >>> client = Donatello("your_token", "widget_id")
+                >>> board = Leaderboard()
+                >>> board.seed(client)
+                >>> board.set_goal("New camera", 20000)
+                >>> board.attach(client)
+
+                >>> @client.on_donate
+                >>> def on_donate(donates):
+                >>>     print(board.top(5))
+                >>>     print(board.goal("New camera"))
+        """
+        self.currency = currency
+        self._donors: Dict[str, _Ranking] = {}
+        self._currencies: Dict[str, int] = {}
+        self._goals: Dict[str, GoalProgress] = {}
+        self._lock = threading.Lock()
+        self.donates = 0
+
+    def add(self, donate: Union[Donate, LongpoolDonate]) -> None:
+        """Count a donate
+
+            :param donate: :class:`Donate`, :class:`LongpoolDonate` or :class:`CompactDonate`
+        """
+        amount = parse_amount(donate.amount)
+        currency = donate.currency
+        goal = getattr(donate, "goal_widget_name", None) or getattr(donate, "goal", "")
+        with self._lock:
+            ranking = self._donors.get(currency)
+            if ranking is None:
+                ranking = self._donors[currency] = _Ranking()
+            ranking.add(donate.client_name, amount)
+            self._currencies[currency] = self._currencies.get(currency, 0) + amount
+            if goal:
+                progress = self._goals.get(goal)
+                if progress is None:
+                    progress = self._goals[goal] = GoalProgress(goal, currency=self.currency)
+                progress.amounts[currency] = progress.amounts.get(currency, 0) + amount
+                progress.donates += 1
+            self.donates += 1
+
+    def __call__(self, event) -> None:
+        """Listener for sync donate events, a donate or a list of donates"""
+        for donate in event if isinstance(event, list) else (event,):
+            self.add(donate)
+
+    async def _listener(self, donate: LongpoolDonate) -> None:
+        self.add(donate)
+
+    def attach(self, source) -> None:
+        """Follow donates of a client, supervisor or sharded runner
+
+            :param source: :class:`Donatello`, :class:`AsyncDonatello`, :class:`AsyncSupervisor` or :class:`ShardedRunner`
+        """
+        if isinstance(source._on_donate, AsyncEventHandler):
+            source.on_donate(self._listener)
+        else:
+            source.on_donate(self)
+
+    def seed_clients(self, clients: Iterable[Client]) -> None:
+        """Replace donor totals in the account currency with API totals
+
+            :param clients: ``get_clients()`` result
+        """
+        with self._lock:
+            ranking = self._donors.get(self.currency)
+            if ranking is None:
+                ranking = self._donors[self.currency] = _Ranking()
+            total = self._currencies.get(self.currency, 0)
+            for client in clients:
+                total += client.total_amount - ranking.totals.get(client.client_name, 0)
+                ranking.set(client.client_name, client.total_amount)
+            self._currencies[self.currency] = total
+
+    def seed_donates(self, donates: Iterable[Donate]) -> None:
+        """Count donate history
+
+            :param donates: Donates, e.g. ``iter_donates()``
+        """
+        for donate in donates:
+            self.add(donate)
+
+    def seed(self, client: Donatello, history: bool = False) -> None:
+        """Seed from the API once
+
+            By default donor totals come from one ``get_clients`` request.
+            With ``history`` every donate is read instead, which also fills
+            currency and goal totals.
+
+            :param client: Sync client
+            :param history: Read the whole donate history
+        """
+        if history:
+            self.seed_donates(client.stream_donates(per_page=100))
+        else:
+            self.seed_clients(client.get_clients())
+
+    async def aseed(self, client: AsyncDonatello, history: bool = False) -> None:
+        """Seed from the API once with an async client, see :meth:`seed`"""
+        if history:
+            async for donate in client.astream_donates(per_page=100):
+                self.add(donate)
+        else:
+            self.seed_clients(await client.get_clients())
+
+    def set_goal(self, name: str, target: int, currency: str = None) -> GoalProgress:
+        """Set the target of a goal
+
+            :param name: Goal widget name, as in ``goal_widget_name``
+            :param target: Amount to raise
+            :param currency: Currency of the target, defaults to the account currency
+        """
+        with self._lock:
+            progress = self._goals.get(name)
+            if progress is None:
+                progress = self._goals[name] = GoalProgress(name)
+            progress.target = target
+            progress.currency = currency or self.currency
+            return progress
+
+    def goal(self, name: str) -> Optional[GoalProgress]:
+        """Progress of a goal, ``None`` before its first donate or target"""
+        return self._goals.get(name)
+
+    @property
+    def goals(self) -> Dict[str, GoalProgress]:
+        """Progress of every known goal"""
+        return dict(self._goals)
+
+    def top(self, k: int = 10, currency: str = None) -> List[Tuple[str, int]]:
+        """Top donors as ``(client_name, total)``
+
+            :param k: Number of donors
+            :param currency: Defaults to the account currency
+        """
+        with self._lock:
+            ranking = self._donors.get(currency or self.currency)
+            return ranking.top(k) if ranking is not None else []
+
+    def rank(self, client_name: str, currency: str = None) -> Optional[int]:
+        """1-based place of a donor, ``None`` if they didn't donate"""
+        with self._lock:
+            ranking = self._donors.get(currency or self.currency)
+            return ranking.rank(client_name) if ranking is not None else None
+
+    def total(self, client_name: str = None, currency: str = None) -> int:
+        """Total of a donor, or of all donates without ``client_name``"""
+        currency = currency or self.currency
+        if client_name is None:
+            return self._currencies.get(currency, 0)
+        ranking = self._donors.get(currency)
+        return ranking.totals.get(client_name, 0) if ranking is not None else 0
+
+    @property
+    def currencies(self) -> Dict[str, int]:
+        """Total of all donates per currency"""
+        return dict(self._currencies)
+
+    def __len__(self) -> int:
+        ranking = self._donors.get(self.currency)
+        return len(ranking) if ranking is not None else 0
+
+    def __repr__(self) -> str:
+        return f"<Leaderboard donors={len(self)} donates={self.donates} goals={len(self._goals)}>"
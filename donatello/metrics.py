@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_HELP = {
+    "request_duration_seconds": "HTTP request attempt duration per endpoint",
+    "requests_total": "HTTP request attempts per endpoint",
+    "request_errors_total": "Failed HTTP request attempts per endpoint",
+    "request_retries_total": "Retried HTTP requests per endpoint",
+    "donates_total": "Long polling donates dispatched to listeners",
+    "donate_latency_seconds": "Time from long polling response to all donate listeners finished",
+    "handler_duration_seconds": "Listener run time per event and listener",
+}
+
+_Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class Histogram:
+    """Fixed bucket histogram"""
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        # The last slot counts values above every bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def __repr__(self) -> str:
+        return f"<Histogram count={self.count} sum={self.sum:.3f}>"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(labels: Iterable[Tuple[str, str]], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Metrics:
+    def __init__(self,
+                 buckets: Iterable[float] = DEFAULT_BUCKETS,
+                 callback: Callable[[str, Dict[str, str], float], None] = None,
+                 namespace: str = "donatello"
+                 ) -> None:
+        """Request, polling and dispatch metrics
+
+            Pass one instance to any number of clients and supervisors as
+            ``metrics=``. Without it nothing is measured. Observations are
+            kept as counters and fixed bucket histograms, exported with
+            :meth:`render` in Prometheus text format, and passed to
+            ``callback`` as they happen.
+
+            :param buckets: Histogram upper bounds in seconds
+            :param callback: Called with metric name, labels and value on every observation
+            :param namespace: Metric name prefix
+
+            :type buckets: Iterable[float]
+            :type callback: callable
+            :type namespace: str
+
+            Usage::
+
+                >>> from donatello import Donatello, Metrics
+                >>> metrics = Metrics()
+                >>> client = Donatello("your_token", "widget_id", metrics=metrics)
+                >>> print(metrics.render())
+        """
+        self._buckets = tuple(sorted(buckets))
+        self._callback = callback
+        self._namespace = namespace
+        self._counters: Dict[_Key, float] = {}
+        self._histograms: Dict[_Key, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        """Increase a counter"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+        if self._callback is not None:
+            self._callback(name, labels, amount)
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Add a value to a histogram"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self._buckets)
+            histogram.observe(value)
+        if self._callback is not None:
+            self._callback(name, labels, value)
+
+    def counter(self, name: str, **labels: str) -> float:
+        """Current value of a counter"""
+        return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def histogram(self, name: str, **labels: str) -> Histogram:
+        """Histogram of a metric, ``None`` before the first observation"""
+        return self._histograms.get((name, tuple(sorted(labels.items()))))
+
+    def render(self) -> str:
+        """Export all metrics in Prometheus text format"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            histograms = [(key, list(h.counts), h.sum, h.count) for key, h in histograms]
+
+        lines: List[str] = []
+        described = set()
+
+        def describe(name: str, kind: str) -> str:
+            full = f"{self._namespace}_{name}"
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {full} {_HELP.get(name, name)}")
+                lines.append(f"# TYPE {full} {kind}")
+            return full
+
+        for (name, labels), value in counters:
+            full = describe(name, "counter")
+            lines.append(f"{full}{_labels(labels)} {value:g}")
+        for (name, labels), counts, total, count in histograms:
+            full = describe(name, "histogram")
+            cumulative = 0
+            for bound, bucket in zip(self._buckets, counts):
+                cumulative += bucket
+                bucket_labels = _labels(labels, f'le="{bound:g}"')
+                lines.append(f"{full}_bucket{bucket_labels} {cumulative}")
+            bucket_labels = _labels(labels, 'le="+Inf"')
+            lines.append(f"{full}_bucket{bucket_labels} {count}")
+            lines.append(f"{full}_sum{_labels(labels)} {total:g}")
+            lines.append(f"{full}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Drop all observations"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def __repr__(self) -> str:
+        return f"<Metrics counters={len(self._counters)} histograms={len(self._histograms)}>"
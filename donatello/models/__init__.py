@@ -1,7 +1,50 @@
-from .client import Client
-from .client_list import ClientList
-from .donate import Donate
-from .donate_list import DonateList
-from .longpool_donale import LongpoolDonate
-from .user import User
-from .user_donates import UserDonates
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+# Models are imported on first access, pydantic is loaded with the first one
+_LAZY = {
+    "parse_amount": ".amounts",
+    "Client": ".client",
+    "ClientList": ".client_list",
+    "DonateColumns": ".columns",
+    "CompactDonate": ".compact",
+    "CompactDonates": ".compact",
+    "decode_trusted": ".decode",
+    "Donate": ".donate",
+    "DonateList": ".donate_list",
+    "LongpoolDonate": ".longpool_donale",
+    "parse_datetime": ".timestamps",
+    "parse_datetimes": ".timestamps",
+    "User": ".user",
+    "UserDonates": ".user_donates",
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from .amounts import parse_amount
+    from .client import Client
+    from .client_list import ClientList
+    from .columns import DonateColumns
+    from .compact import CompactDonate, CompactDonates
+    from .decode import decode_trusted
+    from .donate import Donate
+    from .donate_list import DonateList
+    from .longpool_donale import LongpoolDonate
+    from .timestamps import parse_datetime, parse_datetimes
+    from .user import User
+    from .user_donates import UserDonates
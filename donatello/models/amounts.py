@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Union
+
+
+@lru_cache(maxsize=1024)
+def _parse(value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return int(Decimal(value).to_integral_value(ROUND_HALF_UP))
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value!r}") from None
+
+
+def parse_amount(value: Union[str, int, float]) -> int:
+    """Normalize a donate amount to an integer
+
+        Long polling donates carry amounts as strings like ``"100"`` or
+        ``"99.50"``, fractions are rounded half up. Repeated values are
+        served from a bounded LRU cache.
+
+        :param value: API amount, integers are returned as is
+        :return: Amount as an integer
+
+        :raises ValueError: If value isn't a number
+    """
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(Decimal(value).to_integral_value(ROUND_HALF_UP))
+    return _parse(value.strip())
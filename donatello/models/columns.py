@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from array import array
+from typing import Dict, Iterable, List
+
+from .donate import Donate
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError(
+            "Columnar export requires numpy: pip install donatello-py[numpy]") from None
+    return numpy
+
+
+class DonateColumns:
+    """Columnar donates history backed by NumPy arrays
+
+        Strings are interned into integer codes: ``client[i]`` indexes
+        :attr:`clients` and ``currency[i]`` indexes :attr:`currencies`.
+
+        :ivar amount: ``int64`` amounts
+        :ivar currency: ``int32`` currency codes
+        :ivar client: ``int32`` client name codes
+        :ivar created_at: ``datetime64[s]`` timestamps
+        :ivar clients: Client names by code
+        :ivar currencies: Currency names by code
+
+        Usage::
+
+            >>> from donatello.models import DonateColumns
+            >>> columns = DonateColumns.from_donates(client.iter_donates(per_page=100))
+            >>> print(columns.total_by_client())
+            >>> print(columns.total_by_day())
+    """
+
+    def __init__(self, amount, currency, client, created_at,
+                 clients: List[str], currencies: List[str]) -> None:
+        self.amount = amount
+        self.currency = currency
+        self.client = client
+        self.created_at = created_at
+        self.clients = clients
+        self.currencies = currencies
+
+    @classmethod
+    def from_donates(cls, donates: Iterable[Donate]) -> DonateColumns:
+        """Build columns from any donates iterable
+
+            The iterable is consumed once, so a paginated iterator like
+            :meth:`Donatello.iter_donates` is exported without keeping its
+            pages in memory.
+
+            :param donates: Donates to export
+            :return: Donates columns
+        """
+        np = _numpy()
+        amounts = array("q")
+        currencies = array("i")
+        clients = array("i")
+        created_at = []
+        currency_codes: Dict[str, int] = {}
+        client_codes: Dict[str, int] = {}
+        for donate in donates:
+            amounts.append(donate.amount)
+            currency = currency_codes.get(donate.currency)
+            if currency is None:
+                currency = currency_codes[donate.currency] = len(currency_codes)
+            currencies.append(currency)
+            client = client_codes.get(donate.client_name)
+            if client is None:
+                client = client_codes[donate.client_name] = len(client_codes)
+            clients.append(client)
+            created_at.append(donate.created_at)
+        return cls(amount=np.frombuffer(amounts, dtype=np.int64),
+                   currency=np.frombuffer(currencies, dtype=np.int32),
+                   client=np.frombuffer(clients, dtype=np.int32),
+                   created_at=np.array(created_at, dtype="datetime64[s]"),
+                   clients=list(client_codes),
+                   currencies=list(currency_codes))
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+    def to_dict(self) -> Dict[str, object]:
+        """Columns as a dict of arrays, e.g. for ``pandas.DataFrame``"""
+        np = _numpy()
+        return {
+            "amount": self.amount,
+            "currency": np.array(self.currencies, dtype=object)[self.currency],
+            "client_name": np.array(self.clients, dtype=object)[self.client],
+            "created_at": self.created_at,
+        }
+
+    def total_by_client(self) -> Dict[str, int]:
+        """Total amount per client name"""
+        np = _numpy()
+        totals = np.bincount(self.client, weights=self.amount, minlength=len(self.clients))
+        return dict(zip(self.clients, totals.astype(np.int64).tolist()))
+
+    def total_by_currency(self) -> Dict[str, int]:
+        """Total amount per currency"""
+        np = _numpy()
+        totals = np.bincount(self.currency, weights=self.amount, minlength=len(self.currencies))
+        return dict(zip(self.currencies, totals.astype(np.int64).tolist()))
+
+    def total_by_day(self) -> Dict[object, int]:
+        """Total amount per calendar day"""
+        np = _numpy()
+        days, index = np.unique(self.created_at.astype("datetime64[D]"), return_inverse=True)
+        totals = np.bincount(index, weights=self.amount, minlength=len(days))
+        return dict(zip(days.tolist(), totals.astype(np.int64).tolist()))
+
+    def __repr__(self) -> str:
+        return f"<DonateColumns donates={len(self)} clients={len(self.clients)} currencies={len(self.currencies)}>"
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+from array import array
+from calendar import timegm
+from datetime import datetime as Datetime
+from datetime import timedelta
+from typing import Dict, Iterable, Iterator, List, Union
+
+from .donate import Donate
+
+_EPOCH = Datetime(1970, 1, 1)
+
+
+class _Interner:
+    """Maps repeated strings to integer codes"""
+    __slots__ = ("codes", "values")
+
+    def __init__(self) -> None:
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class CompactDonate:
+    """Read-only view of a single donate in :class:`CompactDonates`
+
+        Has the same attributes as :class:`Donate`.
+    """
+    __slots__ = ("_donates", "_index")
+
+    def __init__(self, donates: CompactDonates, index: int) -> None:
+        self._donates = donates
+        self._index = index
+
+    @property
+    def id(self) -> str:
+        return self._donates._ids[self._index]
+
+    @property
+    def client_name(self) -> str:
+        return self._donates._clients.values[self._donates._client_codes[self._index]]
+
+    @property
+    def message(self) -> str:
+        return self._donates._messages[self._index]
+
+    @property
+    def amount(self) -> int:
+        return self._donates._amounts[self._index]
+
+    @property
+    def currency(self) -> str:
+        return self._donates._currencies.values[self._donates._currency_codes[self._index]]
+
+    @property
+    def goal(self) -> str:
+        return self._donates._goals.values[self._donates._goal_codes[self._index]]
+
+    @property
+    def is_published(self) -> bool:
+        return bool(self._donates._published[self._index])
+
+    @property
+    def created_at(self) -> Datetime:
+        return _EPOCH + timedelta(seconds=self._donates._created_at[self._index])
+
+    def to_donate(self) -> Donate:
+        """Build a regular :class:`Donate` model"""
+        return Donate(pubId=self.id, clientName=self.client_name, message=self.message,
+                      amount=self.amount, currency=self.currency, goal=self.goal,
+                      isPublished=self.is_published, createdAt=self.created_at)
+
+    def __str__(self) -> str:
+        return f"<CompactDonate id={self.id} client_name={self.client_name} message={self.message} amount={self.amount} currency={self.currency} goal={self.goal} is_published={self.is_published} created_at={self.created_at}>"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    def __lt__(self, other: Union[CompactDonate, Donate]) -> bool:
+        return self.amount < other.amount
+
+
+class CompactDonates:
+    """Memory-compact donates collection
+
+        Numbers and timestamps are kept in typed arrays, client names,
+        currencies and goals are interned. Items are :class:`CompactDonate`
+        views with the same attributes as :class:`Donate`, so a million
+        donates take tens of megabytes instead of gigabytes.
+
+        Usage::
+
+            >>> from donatello.models import CompactDonates
+            >>> history = CompactDonates(client.iter_donates(per_page=100))
+            >>> print(len(history), history[0].client_name, history[0].amount)
+    """
+
+    def __init__(self, donates: Iterable[Donate] = ()) -> None:
+        self._ids: List[str] = []
+        self._messages: List[str] = []
+        self._amounts = array("q")
+        self._created_at = array("q")
+        self._published = array("b")
+        self._client_codes = array("i")
+        self._currency_codes = array("i")
+        self._goal_codes = array("i")
+        self._clients = _Interner()
+        self._currencies = _Interner()
+        self._goals = _Interner()
+        self.extend(donates)
+
+    def append(self, donate: Donate) -> None:
+        """Add a donate"""
+        self._ids.append(donate.id)
+        self._messages.append(donate.message)
+        self._amounts.append(donate.amount)
+        self._created_at.append(timegm(donate.created_at.timetuple()))
+        self._published.append(donate.is_published)
+        self._client_codes.append(self._clients.code(donate.client_name))
+        self._currency_codes.append(self._currencies.code(donate.currency))
+        self._goal_codes.append(self._goals.code(donate.goal))
+
+    def extend(self, donates: Iterable[Donate]) -> None:
+        """Add donates from any iterable"""
+        for donate in donates:
+            self.append(donate)
+
+    @property
+    def clients(self) -> List[str]:
+        """Distinct client names"""
+        return list(self._clients.values)
+
+    @property
+    def currencies(self) -> List[str]:
+        """Distinct currencies"""
+        return list(self._currencies.values)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, item: int) -> CompactDonate:
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("donate index out of range")
+        return CompactDonate(self, item)
+
+    def __iter__(self) -> Iterator[CompactDonate]:
+        for index in range(len(self)):
+            yield CompactDonate(self, index)
+
+    def __repr__(self) -> str:
+        return f"<CompactDonates donates={len(self)} clients={len(self._clients.values)} currencies={len(self._currencies.values)}>"
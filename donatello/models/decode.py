@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from datetime import datetime as Datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, TypeVar, get_args, get_origin
+
+from pydantic import BaseModel
+
+from .timestamps import parse_datetime
+
+Model = TypeVar("Model", bound=BaseModel)
+
+# (field name, alias, required, converter) for every model field
+_Plan = List[Tuple[str, str, bool, Optional[Callable[[Any], Any]]]]
+_plans: Dict[Type[BaseModel], _Plan] = {}
+
+_MISSING = object()
+
+
+def _converter(annotation: Any) -> Optional[Callable[[Any], Any]]:
+    """Build a converter for a resolved field annotation"""
+    if annotation is Datetime:
+        return parse_datetime
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return lambda value: decode_trusted(annotation, value)
+    if get_origin(annotation) in (list, List):
+        (item,) = get_args(annotation)
+        if isinstance(item, type) and issubclass(item, BaseModel):
+            return lambda values: [decode_trusted(item, value) for value in values]
+    return None
+
+
+def _plan(model: Type[BaseModel]) -> _Plan:
+    plan = _plans.get(model)
+    if plan is None:
+        plan = [(name, field.alias or name, field.is_required(), _converter(field.annotation))
+                for name, field in model.model_fields.items()]
+        _plans[model] = plan
+    return plan
+
+
+def decode_trusted(model: Type[Model], data: dict, **values: Any) -> Model:
+    """Build a model from a trusted API payload without validation
+
+        Maps aliases, converts ``created_at`` and nested models and hands
+        the result to ``model_construct``, so the object equals
+        ``model(**data)`` for well-formed API responses. Malformed payloads
+        are not detected, use the regular constructor for untrusted input.
+
+        :param model: Model class
+        :param data: API response using field aliases
+        :param values: Extra values by field name, override ``data``
+
+        :return: Model instance
+
+        Usage::
+
+            >>> from donatello.models import DonateList, decode_trusted
+            >>> donates = decode_trusted(DonateList, response)
+    """
+    plan = _plans.get(model) or _plan(model)
+    get = data.get
+    fields = {}
+    for name, alias, required, convert in plan:
+        value = get(alias, _MISSING)
+        if value is _MISSING:
+            if required and name not in values:
+                raise KeyError(f"{model.__name__} payload is missing {alias!r}")
+        elif convert is None:
+            fields[name] = value
+        else:
+            fields[name] = convert(value)
+    if values:
+        fields.update(values)
+    return model.model_construct(**fields)
@@ -6,6 +6,8 @@ from typing import Dict, Union
 
 from pydantic import BaseModel, Field, validator
 
+from .timestamps import parse_datetime
+
 
 class Donate(BaseModel):
     id: str = Field(alias="pubId")
@@ -19,7 +21,7 @@ class Donate(BaseModel):
 
     @validator("created_at", pre=True)
     def validate_created_at(cls, value) -> Datetime:
-        return Datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+        return parse_datetime(value)
 
     def __str__(self) -> str:
         return f"<Donate id={self.id} client_name={self.client_name} message={self.message} amount={self.amount} currency={self.currency} goal={self.goal} is_published={self.is_published} created_at={self.created_at}>"
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
-from typing import Dict, List, Sequence, Union
+from typing import TYPE_CHECKING, Dict, List, Sequence, Union
 
 from pydantic import BaseModel, Field
 
 from .donate import Donate
 
+if TYPE_CHECKING:
+    from .columns import DonateColumns
+
 
 class DonateList(BaseModel):
 
@@ -27,6 +30,11 @@ class DonateList(BaseModel):
     def __len__(self) -> int:
         return len(self.content)
 
+    def to_columns(self) -> DonateColumns:
+        """Export donates into NumPy columns, see :class:`DonateColumns`"""
+        from .columns import DonateColumns
+        return DonateColumns.from_donates(self.content)
+
     def __str__(self) -> str:
         return f"<DonateList content={self.content} page={self.page} size={self.size} num={self.num} first={self.first} last={self.last} total={self.total}>"
     
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 from datetime import datetime as Datetime
-from typing import Dict, Union
+from typing import Dict, Optional, Union
 
 from pydantic import BaseModel, Field, validator
 
+from .timestamps import parse_datetime
+
 
 class LongpoolDonate(BaseModel):
     client_name: str = Field(alias="clientName")
@@ -25,10 +27,11 @@ class LongpoolDonate(BaseModel):
     is_subscription: bool = Field(alias="isSubscription")
     uploaded_voice: str = Field(alias="uploadedVoice")
     name: str = Field(alias="name")
+    widget_id: Optional[str] = Field(default=None, exclude=True)
 
     @validator("created_at", pre=True)
     def validate_created_at(cls, value) -> Datetime:
-        return Datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+        return parse_datetime(value)
 
     def __str__(self) -> str:
         return f"<LongpoolDonate client_name={self.client_name} message={self.message} amount={self.amount} currency={self.currency} source={self.source} image={self.image} sound={self.sound} video={self.video} interaction_media={self.interaction_media} interaction_media_start_time={self.interaction_media_start_time} goal_widget_name={self.goal_widget_name} manually_approved={self.manually_approved} ban={self.ban} is_published={self.is_published} created_at={self.created_at} is_subscription={self.is_subscription} uploaded_voice={self.uploaded_voice} name={self.name}>"
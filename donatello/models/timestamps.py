@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from datetime import datetime as Datetime
+from functools import lru_cache
+from typing import Iterable, List, Union
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+@lru_cache(maxsize=4096)
+def _parse(value: str) -> Datetime:
+    # Fixed width "YYYY-MM-DD HH:MM:SS", sliced instead of strptime
+    if len(value) != 19 or value[4] != "-" or value[7] != "-" or value[10] != " " \
+            or value[13] != ":" or value[16] != ":":
+        return Datetime.strptime(value, DATETIME_FORMAT)
+    return Datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                    int(value[11:13]), int(value[14:16]), int(value[17:19]))
+
+
+def parse_datetime(value: Union[str, Datetime]) -> Datetime:
+    """Parse an API timestamp like ``2023-05-01 12:00:00``
+
+        Repeated values are served from a bounded LRU cache, many donates
+        share the same second during raids.
+
+        :param value: API timestamp, datetimes are returned as is
+        :return: Parsed datetime
+
+        :raises ValueError: If value doesn't match the API format
+    """
+    if isinstance(value, Datetime):
+        return value
+    return _parse(value)
+
+
+def parse_datetimes(values: Iterable[Union[str, Datetime]]) -> List[Datetime]:
+    """Parse a page of API timestamps at once
+
+        Each distinct value is parsed once per call.
+
+        :param values: API timestamps
+        :return: Parsed datetimes in the same order
+    """
+    parsed = {}
+    result = []
+    for value in values:
+        dt = parsed.get(value)
+        if dt is None:
+            dt = parsed[value] = parse_datetime(value)
+        result.append(dt)
+    return result
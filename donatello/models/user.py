@@ -5,6 +5,8 @@ from typing import Dict, Union
 
 from pydantic import BaseModel, Field, validator
 
+from .timestamps import parse_datetime
+
 from .user_donates import UserDonates
 
 
@@ -20,7 +22,7 @@ class User(BaseModel):
 
     @validator("created_at", pre=True)
     def validate_created_at(cls, value) -> Datetime:
-        return Datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+        return parse_datetime(value)
 
     def __str__(self) -> str:
         return f"<User nickname={self.nickname} id={self.public_id} page={self.page} is_active={self.is_active} is_public={self.is_public} donates={self.donates} created_at={self.created_at}>"
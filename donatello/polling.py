@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import random
+
+
+class PollingStats:
+    """Long polling counters of a single widget"""
+    __slots__ = ("requests", "donates", "errors", "interval")
+
+    def __init__(self, interval: float = 0.0) -> None:
+        self.requests = 0
+        self.donates = 0
+        self.errors = 0
+        # Base interval chosen by the polling policy, without jitter
+        self.interval = interval
+
+    def __str__(self) -> str:
+        return f"<PollingStats requests={self.requests} donates={self.donates} errors={self.errors} interval={self.interval}>"
+
+    def __repr__(self) -> str:
+        return f"<PollingStats requests={self.requests} donates={self.donates} errors={self.errors} interval={self.interval}>"
+
+
+class PollingPolicy:
+    """Fixed long polling interval
+
+        Base class for polling policies. Policies keep no per-widget state,
+        everything they need is stored in the widget's :class:`PollingStats`.
+
+        :param interval: Seconds between requests
+        :type interval: float
+    """
+
+    def __init__(self, interval: float = 1) -> None:
+        self.interval = interval
+
+    def create_stats(self) -> PollingStats:
+        """Create stats for a new widget"""
+        return PollingStats(self.interval)
+
+    def next_interval(self, stats: PollingStats, donated: bool) -> float:
+        """Seconds to wait before the next request
+
+            :param stats: Stats of the polled widget
+            :param donated: Whether the last request returned a donate
+        """
+        return self.interval
+
+
+class AdaptivePolling(PollingPolicy):
+    """Exponential backoff while a widget is idle
+
+        The interval grows by ``factor`` after every empty response and snaps
+        back to ``min_interval`` right after a donate.
+
+        :param min_interval: Interval right after a donate
+        :param max_interval: Upper bound of the interval
+        :param factor: Backoff multiplier for idle responses
+        :param jitter: Relative random spread applied to every interval
+
+        :type min_interval: float
+        :type max_interval: float
+        :type factor: float
+        :type jitter: float
+
+        Usage::
+
+            >>> from donatello import Donatello
+            >>> from donatello.polling import AdaptivePolling
+            >>> policy = AdaptivePolling(min_interval=0.5, max_interval=15)
+            >>> client = Donatello("your_token", "widget_id", polling_policy=policy)
+    """
+
+    def __init__(self,
+                 min_interval: float = 1,
+                 max_interval: float = 30,
+                 factor: float = 2,
+                 jitter: float = 0.1
+                 ) -> None:
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("Expected 0 < min_interval <= max_interval")
+        if factor < 1:
+            raise ValueError("factor must be at least 1")
+        if not 0 <= jitter < 1:
+            raise ValueError("jitter must be in [0, 1)")
+        super().__init__(min_interval)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.jitter = jitter
+
+    def next_interval(self, stats: PollingStats, donated: bool) -> float:
+        if donated:
+            stats.interval = self.min_interval
+        else:
+            stats.interval = min(stats.interval * self.factor, self.max_interval)
+        interval = stats.interval
+        if self.jitter:
+            interval *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return min(max(interval, self.min_interval), self.max_interval)
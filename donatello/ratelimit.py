@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import threading
+import time
+from enum import IntEnum
+
+
+class Priority(IntEnum):
+    """Request priority for :class:`RateLimiter`"""
+    #: Long polling and other latency sensitive requests
+    LIVE = 0
+    #: Pagination and backfills, served from spare capacity
+    BULK = 1
+
+
+class RateLimiter:
+    def __init__(self, rate: float = 5, burst: int = 10, reserve: float = 2) -> None:
+        """Token bucket request scheduler
+
+            One limiter can be shared by any number of :class:`Donatello`
+            and :class:`AsyncDonatello` instances, also across threads.
+            Bulk requests only take a token while at least ``reserve``
+            tokens stay in the bucket and no live request is waiting, so
+            backfills never delay donate alerts.
+
+            :param rate: Tokens added per second
+            :param burst: Bucket capacity
+            :param reserve: Tokens kept for live requests
+
+            :type rate: float
+            :type burst: int
+            :type reserve: float
+
+            Usage::
+
+                >>> from donatello import AsyncDonatello, Donatello, RateLimiter
+                >>> limiter = RateLimiter(rate=5, burst=10)
+                >>> live = Donatello("your_token", "widget_id", rate_limiter=limiter)
+                >>> backfill = AsyncDonatello("your_token", rate_limiter=limiter)
+        """
+        if rate <= 0 or burst < 1:
+            raise ValueError("Expected rate > 0 and burst >= 1")
+        if not 0 <= reserve < burst:
+            raise ValueError("reserve must be in [0, burst)")
+        self._rate = rate
+        self._burst = burst
+        self._reserve = reserve
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._live_waiting = 0
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self) -> float:
+        """Currently available tokens"""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def _try_acquire(self, priority: Priority) -> float:
+        """Take a token, returns 0 on success or seconds to wait"""
+        with self._lock:
+            self._refill()
+            if priority is Priority.LIVE:
+                needed = 1
+            elif self._live_waiting:
+                return 1 / self._rate
+            else:
+                needed = 1 + self._reserve
+            if self._tokens >= needed:
+                self._tokens -= 1
+                return 0
+            return (needed - self._tokens) / self._rate
+
+    def _waiting(self, priority: Priority, delta: int) -> None:
+        if priority is Priority.LIVE:
+            with self._lock:
+                self._live_waiting += delta
+
+    def acquire(self, priority: Priority = Priority.LIVE) -> None:
+        """Block until a request may be sent
+
+            :param priority: Request priority
+        """
+        wait = self._try_acquire(priority)
+        if not wait:
+            return
+        self._waiting(priority, 1)
+        try:
+            while wait:
+                time.sleep(wait)
+                wait = self._try_acquire(priority)
+        finally:
+            self._waiting(priority, -1)
+
+    async def acquire_async(self, priority: Priority = Priority.LIVE) -> None:
+        """Wait until a request may be sent without blocking the event loop
+
+            :param priority: Request priority
+        """
+        wait = self._try_acquire(priority)
+        if not wait:
+            return
+        import asyncio
+        self._waiting(priority, 1)
+        try:
+            while wait:
+                await asyncio.sleep(wait)
+                wait = self._try_acquire(priority)
+        finally:
+            self._waiting(priority, -1)
+
+    def __repr__(self) -> str:
+        return f"<RateLimiter rate={self._rate} burst={self._burst} reserve={self._reserve}>"
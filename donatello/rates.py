@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Union
+
+from .events import AsyncEventHandler
+from .models.amounts import parse_amount
+
+if TYPE_CHECKING:
+    from .models import Donate, LongpoolDonate
+
+
+class _Window:
+    """Ring buffer of time buckets with running totals"""
+    __slots__ = ("seconds", "width", "counts", "amounts", "count", "totals", "head")
+
+    def __init__(self, seconds: float, buckets: int) -> None:
+        self.seconds = seconds
+        self.width = seconds / buckets
+        self.counts = [0] * buckets
+        # Amount per currency of each bucket, None while empty
+        self.amounts: List[Optional[Dict[str, int]]] = [None] * buckets
+        self.count = 0
+        self.totals: Dict[str, int] = {}
+        # Absolute index of the newest bucket
+        self.head: Optional[int] = None
+
+    def advance(self, now: float) -> None:
+        """Expire buckets that slid out of the window"""
+        index = int(now // self.width)
+        if self.head is None:
+            self.head = index
+            return
+        if index <= self.head:
+            return
+        size = len(self.counts)
+        for absolute in range(self.head + 1, self.head + 1 + min(index - self.head, size)):
+            slot = absolute % size
+            self.count -= self.counts[slot]
+            self.counts[slot] = 0
+            amounts = self.amounts[slot]
+            if amounts is not None:
+                for currency, amount in amounts.items():
+                    left = self.totals[currency] - amount
+                    if left:
+                        self.totals[currency] = left
+                    else:
+                        del self.totals[currency]
+                self.amounts[slot] = None
+        self.head = index
+
+    def add(self, at: float, amount: int, currency: str) -> None:
+        self.advance(at)
+        index = int(at // self.width)
+        if index <= self.head - len(self.counts):
+            # Older than the window
+            return
+        slot = index % len(self.counts)
+        self.counts[slot] += 1
+        self.count += 1
+        amounts = self.amounts[slot]
+        if amounts is None:
+            amounts = self.amounts[slot] = {}
+        amounts[currency] = amounts.get(currency, 0) + amount
+        self.totals[currency] = self.totals.get(currency, 0) + amount
+
+
+class DonateRates:
+    def __init__(self,
+                 windows: Iterable[float] = (60, 300, 3600),
+                 buckets: int = 60,
+                 spike_factor: float = 3.0,
+                 spike_min_donates: int = 5,
+                 on_spike: Callable[[float], None] = None,
+                 clock: Callable[[], float] = time.monotonic
+                 ) -> None:
+        """Sliding window donate counts and amounts
+
+            Every window is a ring of ``buckets`` time buckets with running
+            totals, so adding a donate and reading any window are O(1) no
+            matter how many donates arrived. Windows slide by one bucket, a
+            60 second window with 60 buckets is exact to a second. Amounts
+            are kept per currency and normalized to integers with
+            :func:`~donatello.models.parse_amount` when a donate is added.
+
+            A spike is the donate rate of the shortest window reaching
+            ``spike_factor`` times the rate of the longest one. ``on_spike``
+            is called with that ratio once when a spike starts.
+
+            :param windows: Window lengths in seconds
+            :param buckets: Buckets per window
+            :param spike_factor: Rate ratio that counts as a spike
+            :param spike_min_donates: Donates in the shortest window needed for a spike
+            :param on_spike: Called with the rate ratio when a spike starts
+            :param clock: Seconds clock, donates are bucketed by arrival time
+
+            :type windows: Iterable[float]
+            :type buckets: int
+            :type spike_factor: float
+            :type spike_min_donates: int
+            :type on_spike: callable
+            :type clock: callable
+
+            Usage::
+
+                >>> from donatello import DonateRates, Donatello
+                >>> client = Donatello("your_token", "widget_id")
+                >>> rates = DonateRates(on_spike=lambda ratio: print(f"Raid! x{ratio:.1f}"))
+                >>> rates.attach(client)
+
+                >>> @client.on_donate
+                >>> def on_donate(donates):
+                >>>     print(f"{rates.per_minute(60):.0f} donates/min, {rates.amount(3600)} UAH in the last hour")
+        """
+        windows = sorted(set(windows))
+        if not windows or buckets < 1:
+            raise ValueError("At least one window and one bucket are needed")
+        self._windows: Dict[float, _Window] = {seconds: _Window(seconds, buckets) for seconds in windows}
+        self._short = self._windows[windows[0]]
+        self._long = self._windows[windows[-1]]
+        self._spike_factor = spike_factor
+        self._spike_min_donates = spike_min_donates
+        self._on_spike = on_spike
+        self._clock = clock
+        self._started = clock()
+        self._lock = threading.Lock()
+        # Spike state as of the last donate
+        self.spiking = False
+        self.donates = 0
+
+    @property
+    def windows(self) -> List[float]:
+        """Tracked window lengths in seconds"""
+        return list(self._windows)
+
+    def _window(self, seconds: float) -> _Window:
+        window = self._windows.get(seconds)
+        if window is None:
+            raise ValueError(f"Window of {seconds} seconds is not tracked, use one of {self.windows}")
+        window.advance(self._clock())
+        return window
+
+    def add(self, donate: Union[Donate, LongpoolDonate], at: float = None) -> None:
+        """Count a donate
+
+            :param donate: Any donate model
+            :param at: Arrival time on ``clock``, now by default
+        """
+        amount = parse_amount(donate.amount)
+        at = self._clock() if at is None else at
+        with self._lock:
+            for window in self._windows.values():
+                window.add(at, amount, donate.currency)
+            self.donates += 1
+            ratio = self._ratio()
+            spiking = self._spiking(ratio)
+            started = spiking and not self.spiking
+            self.spiking = spiking
+        if started and self._on_spike is not None:
+            self._on_spike(ratio)
+
+    def __call__(self, event) -> None:
+        """Listener for sync donate events, a donate or a list of donates"""
+        for donate in event if isinstance(event, list) else (event,):
+            self.add(donate)
+
+    async def _listener(self, donate: LongpoolDonate) -> None:
+        self.add(donate)
+
+    def attach(self, source) -> None:
+        """Follow donates of a client, supervisor or sharded runner
+
+            :param source: :class:`Donatello`, :class:`AsyncDonatello`, :class:`AsyncSupervisor` or :class:`ShardedRunner`
+        """
+        if isinstance(source._on_donate, AsyncEventHandler):
+            source.on_donate(self._listener)
+        else:
+            source.on_donate(self)
+
+    def count(self, window: float) -> int:
+        """Donates within the last ``window`` seconds"""
+        with self._lock:
+            return self._window(window).count
+
+    def per_minute(self, window: float) -> float:
+        """Average donates per minute over the last ``window`` seconds"""
+        return self.count(window) * 60 / window
+
+    def amount(self, window: float, currency: str = "UAH") -> int:
+        """Donated amount in a currency within the last ``window`` seconds"""
+        with self._lock:
+            return self._window(window).totals.get(currency, 0)
+
+    def amounts(self, window: float) -> Dict[str, int]:
+        """Donated amount per currency within the last ``window`` seconds"""
+        with self._lock:
+            return dict(self._window(window).totals)
+
+    def _ratio(self) -> float:
+        now = self._clock()
+        self._short.advance(now)
+        self._long.advance(now)
+        if not self._short.count:
+            return 0.0
+        # Until the longest window filled up its rate is over the elapsed time
+        long_seconds = max(min(self._long.seconds, now - self._started), self._short.seconds)
+        return (self._short.count / self._short.seconds) / (self._long.count / long_seconds)
+
+    def _spiking(self, ratio: float) -> bool:
+        return ratio >= self._spike_factor and self._short.count >= self._spike_min_donates
+
+    def spike_ratio(self) -> float:
+        """Donate rate of the shortest window divided by the rate of the longest"""
+        with self._lock:
+            return self._ratio()
+
+    def is_spike(self) -> bool:
+        """Whether donates currently arrive ``spike_factor`` times faster than usual"""
+        with self._lock:
+            return self._spiking(self._ratio())
+
+    def __repr__(self) -> str:
+        return f"<DonateRates windows={self.windows} donates={self.donates} spiking={self.spiking}>"
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import random
+import sys
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, Tuple
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while a host's circuit is open"""
+
+    def __init__(self, host: str, retry_in: float) -> None:
+        super().__init__(f"Circuit for {host} is open, next probe in {retry_in:.1f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+def transient_errors() -> Tuple[type, ...]:
+    """Exception types worth retrying for the loaded HTTP libraries
+
+        A library that was never imported can't raise, so this doesn't
+        import aiohttp for sync clients or requests for async ones. Errors
+        of the request itself, like an invalid URL or header, are left out:
+        retrying can't fix them and they say nothing about the host.
+    """
+    modules = sys.modules
+    return _transient_errors("asyncio" in modules, "aiohttp" in modules, "requests" in modules)
+
+
+@lru_cache(maxsize=None)
+def _transient_errors(with_asyncio: bool, with_aiohttp: bool, with_requests: bool) -> Tuple[type, ...]:
+    errors = [ConnectionError, TimeoutError]
+    if with_asyncio:
+        import asyncio
+        errors.append(asyncio.TimeoutError)
+    if with_aiohttp:
+        import aiohttp
+        errors.extend((aiohttp.ClientConnectionError, aiohttp.ClientPayloadError))
+    if with_requests:
+        import requests
+        errors.extend((requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError))
+    return tuple(errors)
+
+
+class RetryPolicy:
+    def __init__(self,
+                 attempts: int = 3,
+                 backoff: float = 0.5,
+                 max_backoff: float = 10,
+                 jitter: float = 0.5,
+                 statuses: Iterable[int] = (429, 500, 502, 503, 504),
+                 methods: Iterable[str] = ("GET", "HEAD", "OPTIONS")
+                 ) -> None:
+        """Retry with exponential backoff for idempotent requests
+
+            :param attempts: Total attempts including the first one
+            :param backoff: Delay before the first retry in seconds
+            :param max_backoff: Upper bound of the delay
+            :param jitter: Relative random spread of every delay
+            :param statuses: HTTP statuses that are retried
+            :param methods: HTTP methods that are retried
+
+            :type attempts: int
+            :type backoff: float
+            :type max_backoff: float
+            :type jitter: float
+
+            Usage::
+
+                >>> from donatello import CircuitBreaker, Donatello, RetryPolicy
+                >>> client = Donatello("your_token", "widget_id",
+                >>>                    retry_policy=RetryPolicy(attempts=5),
+                >>>                    circuit_breaker=CircuitBreaker())
+        """
+        if attempts < 1:
+            raise ValueError("attempts must be at least 1")
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(method.upper() for method in methods)
+
+    def attempts_for(self, method: str) -> int:
+        """Number of attempts allowed for a method"""
+        return self.attempts if method.upper() in self.methods else 1
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait after the given failed attempt, starting at 1"""
+        delay = min(self.backoff * 2 ** (attempt - 1), self.max_backoff)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def __repr__(self) -> str:
+        return f"<RetryPolicy attempts={self.attempts} backoff={self.backoff} max_backoff={self.max_backoff}>"
+
+
+class _Circuit:
+    __slots__ = ("failures", "opened_at", "probing")
+
+    def __init__(self) -> None:
+        self.failures = 0
+        self.opened_at: float = None
+        self.probing = False
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30) -> None:
+        """Per-host circuit breaker
+
+            After ``failure_threshold`` consecutive failures requests to the
+            host fail fast with :class:`CircuitOpenError`. Once
+            ``recovery_timeout`` passes, a single probe request is let
+            through: success closes the circuit, failure opens it again.
+            Share one instance between clients to protect the whole process.
+
+            :param failure_threshold: Consecutive failures that open the circuit
+            :param recovery_timeout: Seconds before a probe is allowed
+
+            :type failure_threshold: int
+            :type recovery_timeout: float
+        """
+        self._failure_threshold = failure_threshold
+        self._recovery_timeout = recovery_timeout
+        self._circuits: Dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def state(self, host: str) -> str:
+        """Circuit state of a host"""
+        circuit = self._circuits.get(host)
+        if circuit is None or circuit.opened_at is None:
+            return self.CLOSED
+        if circuit.probing or time.monotonic() - circuit.opened_at >= self._recovery_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def check(self, host: str) -> None:
+        """Allow a request to the host or raise :class:`CircuitOpenError`"""
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None or circuit.opened_at is None:
+                return
+            now = time.monotonic()
+            elapsed = now - circuit.opened_at
+            if elapsed < self._recovery_timeout:
+                raise CircuitOpenError(host, self._recovery_timeout - elapsed)
+            # Restarting the timer lets another probe through if this one never reports back
+            circuit.opened_at = now
+            circuit.probing = True
+
+    def record_success(self, host: str) -> None:
+        """Close the host's circuit"""
+        with self._lock:
+            self._circuits.pop(host, None)
+
+    def record_failure(self, host: str) -> None:
+        """Count a failure, opening the circuit at the threshold"""
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None:
+                circuit = self._circuits[host] = _Circuit()
+            circuit.failures += 1
+            if circuit.probing or circuit.failures >= self._failure_threshold:
+                circuit.opened_at = time.monotonic()
+                circuit.probing = False
+
+    def __repr__(self) -> str:
+        return f"<CircuitBreaker failure_threshold={self._failure_threshold} recovery_timeout={self._recovery_timeout}>"
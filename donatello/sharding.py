@@ -0,0 +1,421 @@
+import asyncio
+import bisect
+import hashlib
+import inspect
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Tuple
+
+from .batching import add_batch_listener
+from .connection import ConnectionOptions
+from .events import EventHandler
+from .models import LongpoolDonate
+from .polling import PollingPolicy
+from .supervisor import AsyncSupervisor
+
+# Donates cross the process boundary as a tuple of field values in this order
+_FIELDS = tuple(LongpoolDonate.model_fields)
+
+
+def _pack(donate: LongpoolDonate) -> tuple:
+    return tuple(getattr(donate, name) for name in _FIELDS)
+
+
+def _unpack(values: tuple) -> LongpoolDonate:
+    # Already validated in the worker
+    return LongpoolDonate.model_construct(**dict(zip(_FIELDS, values)))
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    def __init__(self, nodes: Iterable[int] = (), replicas: int = 64) -> None:
+        """Consistent hash ring
+
+            Removing a node only moves the keys that node owned.
+
+            :param nodes: Initial node IDs
+            :param replicas: Virtual points per node, more spread keys evenly
+
+            :type nodes: Iterable[int]
+            :type replicas: int
+        """
+        self._replicas = replicas
+        self._points: List[int] = []
+        self._owners: Dict[int, int] = {}
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self) -> List[int]:
+        """Node IDs on the ring"""
+        return sorted(set(self._owners.values()))
+
+    def add(self, node: int) -> None:
+        """Add a node to the ring"""
+        for replica in range(self._replicas):
+            point = _hash(f"{node}:{replica}")
+            if point not in self._owners:
+                bisect.insort(self._points, point)
+            self._owners[point] = node
+
+    def remove(self, node: int) -> None:
+        """Remove a node from the ring"""
+        points = [point for point, owner in self._owners.items() if owner == node]
+        for point in points:
+            del self._owners[point]
+        removed = set(points)
+        self._points = [point for point in self._points if point not in removed]
+
+    def node_for(self, key: str) -> int:
+        """Node owning a key"""
+        if not self._points:
+            raise LookupError("Hash ring is empty")
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[self._points[index]]
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+
+# Seconds between command queue reads and worker liveness checks
+_CHECK_INTERVAL = 0.5
+
+
+async def _worker_main(supervisor: AsyncSupervisor, commands) -> None:
+    loop = asyncio.get_running_loop()
+    polling = asyncio.ensure_future(supervisor.run())
+    # The process exits when polling dies, so the parent restarts the shard
+    while not polling.done():
+        try:
+            command = await loop.run_in_executor(None, commands.get, True, _CHECK_INTERVAL)
+        except queue.Empty:
+            continue
+        if command is None:
+            supervisor.stop()
+            break
+        if command[0] == "add":
+            supervisor.add_widget(command[1], command[2])
+        elif command[0] == "remove":
+            supervisor.remove_widget(command[1])
+    await polling
+
+
+def _run_worker(index: int,
+                widgets: List[Tuple[str, str]],
+                commands,
+                events,
+                options: dict,
+                handler: Callable,
+                forward: bool
+                ) -> None:
+    """Worker process entry point, polls its shard with an AsyncSupervisor"""
+    supervisor = AsyncSupervisor(**options)
+    for token, widget_id in widgets:
+        supervisor.add_widget(token, widget_id)
+
+    if handler is not None:
+        @supervisor.on_donate
+        async def handle(donate: LongpoolDonate):
+            result = handler(donate)
+            if inspect.isawaitable(result):
+                await result
+
+    if forward:
+        @supervisor.on_donate
+        async def forward_donate(donate: LongpoolDonate):
+            events.put(("donate", index, donate.widget_id, _pack(donate)))
+
+    @supervisor.on_error
+    async def forward_error(event):
+        error, widget_id = event
+        events.put(("error", index, widget_id, repr(error)))
+
+    asyncio.run(_worker_main(supervisor, commands))
+
+
+class _Worker:
+    """Parent side of a worker process"""
+    __slots__ = ("index", "process", "commands", "restarts")
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.process = None
+        self.commands = None
+        # Monotonic times of recent restarts
+        self.restarts: Deque[float] = deque()
+
+
+class ShardedRunner:
+    def __init__(self,
+                 workers: int = None,
+                 concurrency: int = 10,
+                 longpool_timeout: int = 1,
+                 logging_level: int = logging.INFO,
+                 polling_policy: PollingPolicy = None,
+                 trusted: bool = False,
+                 connection: ConnectionOptions = None,
+                 handler: Callable[[LongpoolDonate], None] = None,
+                 forward: bool = True,
+                 max_restarts: int = 3,
+                 restart_window: float = 60
+                 ) -> None:
+        """Long polling sharded over worker processes
+
+            Widgets are spread over ``workers`` processes with consistent
+            hashing, each process polls its shard with an
+            :class:`AsyncSupervisor`. Donates are handled in the worker by
+            ``handler`` and/or forwarded to the parent as compact tuples,
+            where ``on_donate`` listeners receive them. A crashed worker is
+            restarted with its widgets. After ``max_restarts`` crashes within
+            ``restart_window`` seconds it is dropped from the ring and only its
+            widgets are rebalanced over the remaining workers.
+
+            Workers use the ``spawn`` start method, so ``handler`` and
+            ``polling_policy`` must be picklable and the script needs an
+            ``if __name__ == "__main__"`` guard.
+
+            :param workers: Number of worker processes, defaults to the CPU count
+            :param concurrency: In-flight requests per worker
+            :param longpool_timeout: Long polling timeout per widget
+            :param logging_level: Logging level
+            :param polling_policy: Long polling interval policy
+            :param trusted: Build donates from responses without pydantic validation
+            :param connection: Connection timeouts and keep-alive settings of every worker
+            :param handler: Module level function or coroutine function called with donates in the worker
+            :param forward: Send donates to the parent ``on_donate`` listeners
+            :param max_restarts: Crashes within ``restart_window`` before a worker is dropped
+            :param restart_window: Seconds crashes are counted for
+
+            :type workers: int
+            :type concurrency: int
+            :type longpool_timeout: int
+            :type logging_level: int
+            :type polling_policy: PollingPolicy
+            :type trusted: bool
+            :type connection: ConnectionOptions
+            :type handler: callable
+            :type forward: bool
+            :type max_restarts: int
+            :type restart_window: float
+
+            Usage::
+
+                >>> from donatello import ShardedRunner
+                >>> from donatello.models import LongpoolDonate
+
+                >>> def on_donate(donate: LongpoolDonate):
+                >>>     print(f"{donate.widget_id}: {donate.amount} {donate.currency}")
+
+                >>> if __name__ == "__main__":
+                >>>     runner = ShardedRunner(workers=4)
+                >>>     for token, widget_id in widgets:
+                >>>         runner.add_widget(token, widget_id)
+                >>>     runner.on_donate(on_donate)
+                >>>     runner.start()
+                >>>     runner.join()
+        """
+        workers = workers or multiprocessing.cpu_count()
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self._options = {
+            "concurrency": concurrency,
+            "longpool_timeout": longpool_timeout,
+            "logging_level": logging_level,
+            "polling_policy": polling_policy,
+            "trusted": trusted,
+            "connection": connection,
+        }
+        self._handler = handler
+        self._forward = forward
+        self._max_restarts = max_restarts
+        self._restart_window = restart_window
+
+        self._logger = logging.getLogger("donatello")
+        self._logger.setLevel(logging_level)
+
+        self._context = multiprocessing.get_context("spawn")
+        self._events = None
+        self._workers = {index: _Worker(index) for index in range(workers)}
+        self._ring = HashRing(self._workers)
+        self._widgets: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        self._on_donate = EventHandler()
+        self._on_error = EventHandler()
+        self._batchers = []
+
+        self._monitor: threading.Thread = None
+        self._stopping = False
+        self._stop_long_polling = False
+
+    @property
+    def shards(self) -> Dict[int, List[str]]:
+        """Widget IDs per live worker"""
+        with self._lock:
+            shards = {index: [] for index in self._ring.nodes}
+            for widget_id in self._widgets:
+                shards[self._ring.node_for(widget_id)].append(widget_id)
+            return shards
+
+    def add_widget(self, token: str, widget_id: str) -> None:
+        """Register a widget, also while running
+
+            :param token: Donatello API token of the widget owner
+            :param widget_id: Donatello widget ID
+        """
+        with self._lock:
+            self._widgets[widget_id] = token
+            worker = self._workers[self._ring.node_for(widget_id)]
+            if worker.commands is not None:
+                worker.commands.put(("add", token, widget_id))
+
+    def remove_widget(self, widget_id: str) -> None:
+        """Stop polling a widget
+
+            :param widget_id: Donatello widget ID
+        """
+        with self._lock:
+            if self._widgets.pop(widget_id, None) is None:
+                return
+            worker = self._workers[self._ring.node_for(widget_id)]
+            if worker.commands is not None:
+                worker.commands.put(("remove", widget_id))
+
+    def on_donate(self, listener):
+        """Decorator for donate event, called in the parent process"""
+        self._on_donate.add_listener(listener)
+        return listener
+
+    def on_donate_batch(self, listener=None, max_size: int = 100, max_delay: float = 0.2):
+        """Decorator for batches of donate events, called in the parent process"""
+        def register(listener):
+            self._batchers.append(add_batch_listener(self._on_donate, listener, max_size, max_delay))
+            return listener
+        return register if listener is None else register(listener)
+
+    def on_error(self, listener):
+        """Decorator for error event, receives ``[error, widget_id]``"""
+        self._on_error.add_listener(listener)
+        return listener
+
+    def _shard(self, index: int) -> List[Tuple[str, str]]:
+        return [(token, widget_id) for widget_id, token in self._widgets.items()
+                if self._ring.node_for(widget_id) == index]
+
+    def _spawn(self, worker: _Worker) -> None:
+        worker.commands = self._context.Queue()
+        worker.process = self._context.Process(
+            target=_run_worker,
+            args=(worker.index, self._shard(worker.index), worker.commands, self._events,
+                  self._options, self._handler, self._forward),
+            name=f"donatello-shard-{worker.index}",
+            daemon=True)
+        worker.process.start()
+
+    def start(self) -> None:
+        """Start worker processes and return"""
+        self._stopping = False
+        self._stop_long_polling = False
+        self._events = self._context.Queue()
+        with self._lock:
+            for worker in self._workers.values():
+                self._spawn(worker)
+        self._monitor = threading.Thread(target=self._run_monitor, name="donatello-shards")
+        self._monitor.start()
+        self._logger.info(
+            f"Long polling started for {len(self._widgets)} widgets in {len(self._workers)} processes")
+
+    def _dispatch(self, message: tuple) -> None:
+        kind, _, widget_id, payload = message
+        try:
+            if kind == "donate":
+                self._on_donate.handle_event(_unpack(payload))
+            else:
+                self._logger.error(f"Widget {widget_id} error: {payload}")
+                self._on_error.handle_event([payload, widget_id])
+        except Exception as e:
+            self._logger.exception(f"Listener failed: {e}")
+
+    def _run_monitor(self) -> None:
+        """Dispatch forwarded events and restart crashed workers"""
+        check_at = time.monotonic() + _CHECK_INTERVAL
+        while not self._stop_long_polling:
+            try:
+                self._dispatch(self._events.get(timeout=max(check_at - time.monotonic(), 0)))
+            except queue.Empty:
+                pass
+            # Checked on a timer, a busy event queue must not delay recovery
+            now = time.monotonic()
+            if now < check_at:
+                continue
+            check_at = now + _CHECK_INTERVAL
+            with self._lock:
+                for worker in list(self._workers.values()):
+                    if not worker.process.is_alive() and not self._stopping:
+                        self._recover(worker)
+        # Drain events the workers sent before stopping
+        while True:
+            try:
+                self._dispatch(self._events.get_nowait())
+            except (queue.Empty, OSError, ValueError):
+                return
+
+    def _recover(self, worker: _Worker) -> None:
+        now = time.monotonic()
+        worker.restarts.append(now)
+        while worker.restarts and now - worker.restarts[0] > self._restart_window:
+            worker.restarts.popleft()
+        code = worker.process.exitcode
+        if len(worker.restarts) <= self._max_restarts:
+            self._logger.warning(f"Shard {worker.index} exited with {code}, restarting")
+            self._spawn(worker)
+            return
+
+        moved = [widget_id for token, widget_id in self._shard(worker.index)]
+        del self._workers[worker.index]
+        self._ring.remove(worker.index)
+        if not self._workers:
+            self._logger.error(f"Shard {worker.index} keeps crashing, no workers left")
+            self._stopping = self._stop_long_polling = True
+            return
+        self._logger.error(
+            f"Shard {worker.index} keeps crashing, moving {len(moved)} widgets to other workers")
+        for widget_id in moved:
+            target = self._workers[self._ring.node_for(widget_id)]
+            target.commands.put(("add", self._widgets[widget_id], widget_id))
+
+    def join(self, timeout: float = None) -> None:
+        """Wait until the runner is stopped"""
+        if self._monitor is not None:
+            self._monitor.join(timeout)
+
+    def stop(self, timeout: float = 5) -> None:
+        """Stop worker processes
+
+            :param timeout: Seconds to wait for each worker before terminating it
+        """
+        self._stopping = True
+        with self._lock:
+            workers = list(self._workers.values())
+            for worker in workers:
+                if worker.commands is not None:
+                    worker.commands.put(None)
+        for worker in workers:
+            if worker.process is None:
+                continue
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        self._stop_long_polling = True
+        if self._monitor is not None and self._monitor is not threading.current_thread():
+            self._monitor.join()
+        for batcher in self._batchers:
+            batcher.close()
+        self._logger.info("Long polling stopped")
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime as Datetime
+from typing import Iterable, Iterator, List, Optional
+
+from .models import Donate, parse_datetime
+from .models.timestamps import DATETIME_FORMAT
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS donates (
+    pub_id TEXT PRIMARY KEY,
+    client_name TEXT NOT NULL,
+    message TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    currency TEXT NOT NULL,
+    goal TEXT NOT NULL,
+    is_published INTEGER NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS donates_created_at ON donates (created_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class DonateStore:
+    def __init__(self, path: str = "donates.db", batch_size: int = 100) -> None:
+        """Local SQLite store of donates with an incremental sync cursor
+
+            Donates are keyed by ``pubId``. The store remembers the newest
+            ``created_at`` it has seen, so later syncs stop paging as soon
+            as they reach already known donates.
+
+            :param path: SQLite database path
+            :param batch_size: Number of donates written per transaction
+
+            :type path: str
+            :type batch_size: int
+
+            Usage::
+
+                >>> from donatello import Donatello, DonateStore
+                >>> client = Donatello("your_token")
+                >>> store = DonateStore("donates.db")
+                >>> print(f"New donates: {store.sync(client)}")
+                >>> for donate in store:
+                >>>     print(donate)
+        """
+        self._batch_size = batch_size
+        self._db = sqlite3.connect(path)
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    @property
+    def high_water_mark(self) -> Optional[Datetime]:
+        """Newest ``created_at`` of a fully synced donate"""
+        row = self._db.execute(
+            "SELECT value FROM meta WHERE key = 'high_water_mark'").fetchone()
+        return parse_datetime(row[0]) if row else None
+
+    def __contains__(self, pub_id: str) -> bool:
+        return self._db.execute(
+            "SELECT 1 FROM donates WHERE pub_id = ?", (pub_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM donates").fetchone()[0]
+
+    def __iter__(self) -> Iterator[Donate]:
+        """Iterate over stored donates, newest first"""
+        cursor = self._db.execute(
+            "SELECT pub_id, client_name, message, amount, currency, goal, is_published, created_at "
+            "FROM donates ORDER BY created_at DESC")
+        for row in cursor:
+            yield Donate(pubId=row[0], clientName=row[1], message=row[2], amount=row[3],
+                         currency=row[4], goal=row[5], isPublished=bool(row[6]), createdAt=row[7])
+
+    def add(self, donates: Iterable[Donate]) -> int:
+        """Store donates, ignoring already known ones
+
+            :param donates: Donates to store
+            :return: Number of new donates
+        """
+        rows = [(donate.id, donate.client_name, donate.message, donate.amount, donate.currency,
+                 donate.goal, int(donate.is_published), donate.created_at.strftime(DATETIME_FORMAT))
+                for donate in donates]
+        before = self._db.total_changes
+        self._db.executemany(
+            "INSERT OR IGNORE INTO donates VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        self._db.commit()
+        return self._db.total_changes - before
+
+    def _set_high_water_mark(self, value: Datetime) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('high_water_mark', ?)",
+            (value.strftime(DATETIME_FORMAT),))
+        self._db.commit()
+
+    def _is_synced(self, donate: Donate, mark: Optional[Datetime]) -> bool:
+        """Whether paging can stop at this donate"""
+        return mark is not None and donate.created_at <= mark and donate.id in self
+
+    def _flush(self, batch: List[Donate]) -> int:
+        added = self.add(batch)
+        batch.clear()
+        return added
+
+    def sync(self, client, per_page: int = 20, prefetch: int = 2) -> int:
+        """Fetch donates newer than the high-water mark
+
+            Donates are expected newest first, as the API returns them.
+            The high-water mark only moves after a sync completes, so an
+            interrupted sync is resumed on the next call.
+
+            :param client: Donatello client
+            :param per_page: Donates per page
+            :param prefetch: Number of pages fetched ahead
+
+            :type client: Donatello
+
+            :return: Number of new donates
+            :rtype: int
+        """
+        mark = self.high_water_mark
+        newest = mark
+        added = 0
+        batch: List[Donate] = []
+        donates = client.iter_donates(per_page=per_page, prefetch=prefetch)
+        try:
+            for donate in donates:
+                if self._is_synced(donate, mark):
+                    break
+                if newest is None or donate.created_at > newest:
+                    newest = donate.created_at
+                batch.append(donate)
+                if len(batch) >= self._batch_size:
+                    added += self._flush(batch)
+        finally:
+            donates.close()
+        added += self._flush(batch)
+        if newest is not None:
+            self._set_high_water_mark(newest)
+        return added
+
+    async def async_sync(self, client, per_page: int = 20, prefetch: int = 2) -> int:
+        """Fetch donates newer than the high-water mark
+
+            Async version of :meth:`sync`.
+
+            :param client: Donatello async client
+            :param per_page: Donates per page
+            :param prefetch: Number of pages fetched ahead
+
+            :type client: AsyncDonatello
+
+            :return: Number of new donates
+            :rtype: int
+        """
+        mark = self.high_water_mark
+        newest = mark
+        added = 0
+        batch: List[Donate] = []
+        donates = client.aiter_donates(per_page=per_page, prefetch=prefetch)
+        try:
+            async for donate in donates:
+                if self._is_synced(donate, mark):
+                    break
+                if newest is None or donate.created_at > newest:
+                    newest = donate.created_at
+                batch.append(donate)
+                if len(batch) >= self._batch_size:
+                    added += self._flush(batch)
+        finally:
+            await donates.aclose()
+        added += self._flush(batch)
+        if newest is not None:
+            self._set_high_water_mark(newest)
+        return added
+
+    def close(self) -> None:
+        """Close database connection"""
+        self._db.close()
+
+    def __repr__(self) -> str:
+        return f"<DonateStore donates={len(self)} high_water_mark={self.high_water_mark}>"
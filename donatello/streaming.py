@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+try:
+    import orjson
+
+    loads = orjson.loads
+except ImportError:
+    try:
+        import ujson as json  # type: ignore # noqa
+    except ImportError:
+        import json
+
+    loads = json.loads
+
+import codecs
+import json as _json
+import re
+from typing import Any, List, Tuple
+
+#: Bytes read from the socket at once
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# The C accelerated scanner of the standard library decodes one value at an offset
+_decoder = _json.JSONDecoder()
+_scanstring = _json.decoder.scanstring
+
+_START, _FIELDS, _ITEMS, _DONE = range(4)
+
+
+class _Incomplete(Exception):
+    """More bytes are needed"""
+
+
+class PageParser:
+    def __init__(self, key: str = "content") -> None:
+        """Incremental parser of a paginated API response
+
+            Feed raw response bytes as they arrive. Every value of the ``key``
+            array is returned as soon as it was read completely, the page
+            fields are collected on the side. Only the unparsed tail of the
+            stream is buffered, so memory stays flat however large the page is.
+
+            Values are decoded by the C scanner of the standard library, which
+            can resume at any offset. Whole responses elsewhere are decoded
+            from bytes with ``loads``, orjson or ujson when installed.
+
+            :param key: Name of the top level array to stream
+
+            :type key: str
+
+            Usage::
+
+                >>> from donatello.streaming import PageParser
+                >>> parser = PageParser()
+                >>> for chunk in response.iter_content(65536):
+                >>>     for item in parser.feed(chunk):
+                >>>         print(item["clientName"])
+                >>> page = parser.close()  # Page fields, the array is empty
+        """
+        self._key = key
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._text = ""
+        self._pos = 0
+        self._state = _START
+        self._fields = {}
+        self.items = 0
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """Parse the next chunk, returns the array values completed by it"""
+        self._text = self._text[self._pos:] + self._utf8.decode(chunk)
+        self._pos = 0
+        items = []
+        try:
+            self._parse(items)
+        except _Incomplete:
+            pass
+        self.items += len(items)
+        return items
+
+    def _skip(self, pos: int) -> int:
+        """Skip whitespace, raises if the buffer ends"""
+        pos = _WHITESPACE.match(self._text, pos).end()
+        if pos == len(self._text):
+            raise _Incomplete
+        return pos
+
+    def _value(self, pos: int) -> Tuple[Any, int]:
+        """Decode the value at ``pos``, raises if it may be cut off"""
+        try:
+            value, end = _decoder.raw_decode(self._text, pos)
+        except _json.JSONDecodeError:
+            raise _Incomplete
+        # A number at the end of the buffer may continue in the next chunk
+        if end == len(self._text):
+            raise _Incomplete
+        return value, end
+
+    def _parse(self, items: list) -> None:
+        text = self._text
+        while self._state != _DONE:
+            pos = self._skip(self._pos)
+            char = text[pos]
+            if self._state == _START:
+                if char != "{":
+                    raise ValueError(f"Expected a JSON object, got {char!r}")
+                self._state = _FIELDS
+                self._pos = pos + 1
+            elif self._state == _FIELDS:
+                if char == "}":
+                    self._state = _DONE
+                    self._pos = pos + 1
+                    return
+                if char == ",":
+                    pos = self._skip(pos + 1)
+                try:
+                    key, pos = _scanstring(text, pos + 1)
+                except _json.JSONDecodeError:
+                    raise _Incomplete
+                pos = self._skip(pos)
+                pos = self._skip(pos + 1)  # colon
+                if key == self._key and text[pos] == "[":
+                    self._fields[key] = []
+                    self._state = _ITEMS
+                    self._pos = pos + 1
+                else:
+                    self._fields[key], self._pos = self._value(pos)
+            else:
+                if char == "]":
+                    self._state = _FIELDS
+                    self._pos = pos + 1
+                    continue
+                if char == ",":
+                    pos = self._skip(pos + 1)
+                item, self._pos = self._value(pos)
+                items.append(item)
+
+    def close(self) -> dict:
+        """Page fields with an empty ``key`` array
+
+            :raises ValueError: If the response ended in the middle of the page
+        """
+        if self._state != _DONE:
+            raise ValueError("Response ended in the middle of the page")
+        return self._fields
+
+    def __repr__(self) -> str:
+        return f"<PageParser items={self.items}>"
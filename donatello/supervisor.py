@@ -0,0 +1,297 @@
+try:
+    import ujson as json  # type: ignore # noqa
+except ImportError:
+    import json
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit
+
+from .base import BASE_URL, WIDGET_PATH
+from .batching import add_batch_listener
+from .connection import ConnectionOptions
+from .dedup import DonateDeduplicator
+from .events import AsyncEventHandler
+from .metrics import Metrics
+from .models import LongpoolDonate, decode_trusted
+from .polling import PollingPolicy, PollingStats
+from .ratelimit import Priority, RateLimiter
+from .retry import CircuitBreaker, CircuitOpenError
+
+
+class _Widget:
+    """Polling state of a single registered widget"""
+    __slots__ = ("token", "widget_id", "url", "host", "headers", "stats")
+
+    def __init__(self, token: str, widget_id: str, stats: PollingStats, base_url: str) -> None:
+        self.token = token
+        self.widget_id = widget_id
+        self.url = base_url + WIDGET_PATH.format(widget_id=widget_id, token=token) + "info"
+        self.host = urlsplit(self.url).netloc
+        self.headers = {"X-Token": token}
+        self.stats = stats
+
+
+class AsyncSupervisor:
+    def __init__(self,
+                 concurrency: int = 10,
+                 longpool_timeout: int = 1,
+                 logging_level: int = logging.INFO,
+                 polling_policy: PollingPolicy = None,
+                 trusted: bool = False,
+                 rate_limiter: RateLimiter = None,
+                 connection: ConnectionOptions = None,
+                 session=None,
+                 circuit_breaker: CircuitBreaker = None,
+                 deduplicator: DonateDeduplicator = None,
+                 metrics: Metrics = None
+                 ) -> None:
+        """Long polling supervisor for many widgets
+
+            Polls every registered widget over one shared aiohttp session.
+            Only ``concurrency`` worker tasks and connections exist no matter
+            how many widgets are registered.
+
+            :param concurrency: Maximum number of in-flight requests
+            :param longpool_timeout: Long polling timeout per widget
+            :param logging_level: Logging level
+            :param polling_policy: Long polling interval policy, defaults to a fixed ``longpool_timeout``
+            :param trusted: Build donates from responses without pydantic validation
+            :param rate_limiter: Request scheduler, can be shared with clients
+            :param connection: Connection timeouts and keep-alive settings, the pool size is ``concurrency``
+            :param session: Shared ``aiohttp.ClientSession``, not closed by the supervisor
+            :param circuit_breaker: Per-host circuit breaker, can be shared with clients
+            :param deduplicator: Drops donates that were already delivered, fingerprints include the widget ID
+            :param metrics: Records request, polling and listener metrics, can be shared with clients
+
+            :type concurrency: int
+            :type longpool_timeout: int
+            :type logging_level: int
+            :type polling_policy: PollingPolicy
+            :type trusted: bool
+            :type rate_limiter: RateLimiter
+            :type connection: ConnectionOptions
+            :type circuit_breaker: CircuitBreaker
+            :type deduplicator: DonateDeduplicator
+            :type metrics: Metrics
+
+            Usage::
+
+                >>> from donatello import AsyncSupervisor
+                >>> from donatello.models import LongpoolDonate
+                >>> supervisor = AsyncSupervisor(concurrency=20)
+                >>> supervisor.add_widget("token_1", "widget_1")
+                >>> supervisor.add_widget("token_2", "widget_2")
+
+                >>> @supervisor.on_donate
+                >>> async def on_donate(donate: LongpoolDonate):
+                >>>     print(f"{donate.widget_id}: {donate.amount} {donate.currency}")
+
+                >>> @supervisor.on_error # Receives [error, widget_id]
+                >>> async def on_error(error):
+                >>>     print(error)
+                >>> supervisor.start()
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if longpool_timeout <= 0:
+            # Idle workers sleep for it between schedule checks
+            raise ValueError("longpool_timeout must be positive")
+        self._concurrency = concurrency
+        self._longpool_timeout = longpool_timeout
+        self._polling_policy = polling_policy or PollingPolicy(longpool_timeout)
+        self._trusted = trusted
+        self._rate_limiter = rate_limiter
+        self._connection = connection or ConnectionOptions()
+        self._base_url = (self._connection.base_url or BASE_URL).rstrip("/")
+        self._shared_session = session
+        self._circuit_breaker = circuit_breaker
+        self._deduplicator = deduplicator
+        self._metrics = metrics
+
+        self._logger = logging.getLogger("donatello")
+        self._logger.setLevel(logging_level)
+
+        self._on_donate = AsyncEventHandler()
+        self._on_error = AsyncEventHandler()
+        self._batchers = []
+        if metrics is not None:
+            self._on_donate.instrument(metrics, "donate")
+            self._on_error.instrument(metrics, "error")
+
+        self._widgets: Dict[str, _Widget] = {}
+        # Heap of (due time, sequence, widget), the sequence breaks ties
+        self._schedule: List[Tuple[float, int, _Widget]] = []
+        self._sequence = itertools.count()
+
+        self._session = None
+        self._stop_long_polling = False
+
+    @property
+    def widgets(self) -> List[str]:
+        """Registered widget IDs"""
+        return list(self._widgets)
+
+    @property
+    def polling_stats(self) -> Dict[str, PollingStats]:
+        """Long polling request counters per widget ID"""
+        return {widget_id: widget.stats for widget_id, widget in self._widgets.items()}
+
+    def add_widget(self, token: str, widget_id: str) -> None:
+        """Register a widget for long polling
+
+            :param token: Donatello API token of the widget owner
+            :param widget_id: Donatello widget ID
+        """
+        widget = _Widget(token, widget_id, self._polling_policy.create_stats(), self._base_url)
+        self._widgets[widget_id] = widget
+        heapq.heappush(self._schedule, (0.0, next(self._sequence), widget))
+
+    def remove_widget(self, widget_id: str) -> None:
+        """Stop polling a widget
+
+            :param widget_id: Donatello widget ID
+        """
+        # Stale schedule entries are dropped by the workers
+        self._widgets.pop(widget_id, None)
+
+    def on_donate(self, listener):
+        """Decorator for donate event"""
+        self._on_donate.add_listener(listener)
+        return listener
+
+    def on_donate_batch(self, listener=None, max_size: int = 100, max_delay: float = 0.2):
+        """Decorator for batches of donate events, see :meth:`Donatello.on_donate_batch`"""
+        def register(listener):
+            self._batchers.append(add_batch_listener(self._on_donate, listener, max_size, max_delay))
+            return listener
+        return register if listener is None else register(listener)
+
+    def on_error(self, listener):
+        """Decorator for error event"""
+        self._on_error.add_listener(listener)
+        return listener
+
+    async def _error_handler(self, error, widget_id: str) -> None:
+        """Log an error and pass it to error listeners"""
+        self._logger.error(f"Widget {widget_id} error: {error}")
+        try:
+            await self._on_error.handle_event([error, widget_id])
+        except Exception as e:
+            self._logger.exception(f"Error listener failed: {e}")
+
+    def _observe_request(self, started: float, failed: bool) -> None:
+        """Record a long polling request"""
+        metrics = self._metrics
+        metrics.observe("request_duration_seconds", time.perf_counter() - started, endpoint="info")
+        metrics.inc("requests_total", endpoint="info")
+        if failed:
+            metrics.inc("request_errors_total", endpoint="info")
+
+    async def _poll(self, widget: _Widget) -> bool:
+        """Make a single long polling request for a widget
+
+            Returns whether the widget received a donate
+        """
+        stats = widget.stats
+        breaker = self._circuit_breaker
+        metrics = self._metrics
+        started = None
+        try:
+            if breaker is not None:
+                breaker.check(widget.host)
+            if self._rate_limiter is not None:
+                await self._rate_limiter.acquire_async(Priority.LIVE)
+            stats.requests += 1
+            if metrics is not None:
+                started = time.perf_counter()
+            async with self._session.get(widget.url, headers=widget.headers) as resp:
+                data: dict = await resp.json(loads=json.loads)
+            if metrics is not None:
+                self._observe_request(started, resp.status >= 400)
+        except Exception as e:
+            if started is not None:
+                self._observe_request(started, True)
+            if breaker is not None and not isinstance(e, CircuitOpenError):
+                breaker.record_failure(widget.host)
+            stats.errors += 1
+            await self._error_handler(e, widget.widget_id)
+            return False
+        if breaker is not None:
+            breaker.record_success(widget.host)
+        if data.get("clientName"):
+            received = time.perf_counter() if metrics is not None else None
+            try:
+                if self._trusted:
+                    donate = decode_trusted(LongpoolDonate, data, widget_id=widget.widget_id)
+                else:
+                    donate = LongpoolDonate(**data, widget_id=widget.widget_id)
+                if self._deduplicator is not None and not self._deduplicator.is_new(donate):
+                    return False
+                stats.donates += 1
+                if await self._on_donate.handle_event(donate) and metrics is not None:
+                    metrics.inc("donates_total")
+                    metrics.observe("donate_latency_seconds", time.perf_counter() - received)
+            except Exception as e:
+                stats.errors += 1
+                await self._error_handler(e, widget.widget_id)
+            return True
+        if data.get("success") is False:
+            stats.errors += 1
+            await self._error_handler(data, widget.widget_id)
+        return False
+
+    async def _worker(self) -> None:
+        """Poll widgets as they become due"""
+        loop = asyncio.get_running_loop()
+        while not self._stop_long_polling:
+            if not self._schedule:
+                await asyncio.sleep(self._longpool_timeout)
+                continue
+            due, _, widget = self._schedule[0]
+            delay = due - loop.time()
+            if delay > 0:
+                # Wake up at least once per interval to notice new widgets
+                await asyncio.sleep(min(delay, self._longpool_timeout))
+                continue
+            heapq.heappop(self._schedule)
+            if self._widgets.get(widget.widget_id) is not widget:
+                continue
+            donated = await self._poll(widget)
+            delay = self._polling_policy.next_interval(widget.stats, donated)
+            heapq.heappush(self._schedule, (
+                loop.time() + delay, next(self._sequence), widget))
+
+    async def run(self) -> None:
+        """Run long polling for all registered widgets until stopped"""
+        self._stop_long_polling = False
+        self._session = self._shared_session or self._connection.async_session(
+            limit=self._concurrency)
+        self._logger.info(
+            f"Long polling started for {len(self._widgets)} widgets")
+        try:
+            await asyncio.gather(
+                *(self._worker() for _ in range(self._concurrency)))
+        finally:
+            for batcher in self._batchers:
+                await batcher.close()
+            await self.close()
+            self._logger.info("Long polling stopped")
+
+    def start(self) -> None:
+        """Start long polling"""
+        asyncio.run(self.run())
+
+    def stop(self) -> None:
+        """Stop long polling"""
+        self._stop_long_polling = True
+
+    async def close(self) -> None:
+        """Close aiohttp session"""
+        if self._session is not None and self._session is not self._shared_session:
+            await self._session.close()
+        self._session = None
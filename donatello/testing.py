@@ -0,0 +1,340 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import random
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Iterable, List, Optional
+
+from aiohttp import web
+
+from .base import API_PATH, WIDGET_PATH
+from .connection import ConnectionOptions
+
+CURRENCIES = ("UAH", "UAH", "UAH", "USD", "EUR")
+AMOUNTS = (10, 20, 50, 100, 200, 500, 1000)
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class _Widget:
+    """Long polling state of a widget on the server"""
+    __slots__ = ("queue", "event", "credit", "last")
+
+    def __init__(self) -> None:
+        self.queue: Deque[dict] = deque()
+        self.event: Optional[asyncio.Event] = None
+        self.credit = 0.0
+        self.last: Optional[float] = None
+
+
+class MockServer:
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 latency: float = 0,
+                 jitter: float = 0,
+                 error_rate: float = 0,
+                 error_status: int = 503,
+                 donate_rate: float = 0,
+                 hold: float = 0,
+                 history: int = 1000,
+                 clients: int = 50,
+                 tokens: Iterable[str] = None,
+                 seed: int = None
+                 ) -> None:
+        """Local stand-in for the Donatello API
+
+            Serves ``me``, ``donates``, ``clients`` and the long polling
+            ``info`` endpoint of any widget from generated data, so clients,
+            supervisors and benchmarks run without network. Point clients at
+            it with ``connection=server.connection()``.
+
+            Run it on the current event loop with ``async with``, or in a
+            background thread with ``with`` for sync clients. Donates arrive
+            on every widget at ``donate_rate`` per second and can be added
+            with :meth:`inject`, they are also recorded in the history and
+            client totals.
+
+            :param host: Interface to listen on
+            :param port: Port to listen on, a free one by default
+            :param latency: Seconds added to every response
+            :param jitter: Up to this many random seconds added on top of ``latency``
+            :param error_rate: Share of requests answered with ``error_status``
+            :param error_status: HTTP status of injected errors
+            :param donate_rate: Generated donates per second per polled widget
+            :param hold: Seconds an ``info`` request waits for a donate before answering empty
+            :param history: Donates generated in the history on start
+            :param clients: Distinct donor names
+            :param tokens: Accepted tokens, any token by default
+            :param seed: Random seed of generated data and errors
+
+            :type host: str
+            :type port: int
+            :type latency: float
+            :type jitter: float
+            :type error_rate: float
+            :type error_status: int
+            :type donate_rate: float
+            :type hold: float
+            :type history: int
+            :type clients: int
+            :type tokens: Iterable[str]
+            :type seed: int
+
+            Usage::
+
+                >>> from donatello import AsyncDonatello, Donatello
+                >>> from donatello.testing import MockServer
+
+                >>> with MockServer(latency=0.01) as server:
+                >>>     client = Donatello("token", connection=server.connection())
+                >>>     print(client.get_me())
+
+                >>> async with MockServer(donate_rate=5, hold=1) as server:
+                >>>     client = AsyncDonatello("token", "widget_id", connection=server.connection())
+                >>>     server.inject("widget_id", amount=100)
+        """
+        self._host = host
+        self._port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.donate_rate = donate_rate
+        self.hold = hold
+        self._tokens = None if tokens is None else frozenset(tokens)
+        self._random = random.Random(seed)
+        self._clients = [f"client_{index}" for index in range(clients)]
+
+        #: Requests served per endpoint
+        self.requests: Dict[str, int] = {"me": 0, "donates": 0, "clients": 0, "info": 0}
+        self._sequence = itertools.count()
+        self._history: List[dict] = []
+        self._totals: Dict[str, int] = {}
+        self._widgets: Dict[str, _Widget] = {}
+        started = datetime.now() - timedelta(seconds=history)
+        for index in range(history):
+            self._record(self._donate(created_at=started + timedelta(seconds=index)))
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._error: Optional[BaseException] = None
+
+    @property
+    def url(self) -> str:
+        """Scheme, host and port of the running server"""
+        return f"http://{self._host}:{self._port}"
+
+    def connection(self, **kwargs) -> ConnectionOptions:
+        """Connection options pointing at the server
+
+            :param kwargs: Other :class:`ConnectionOptions` arguments
+        """
+        return ConnectionOptions(base_url=self.url, **kwargs)
+
+    def _donate(self,
+                client_name: str = None,
+                amount: int = None,
+                currency: str = None,
+                message: str = None,
+                goal: str = "",
+                created_at: datetime = None
+                ) -> dict:
+        index = next(self._sequence)
+        return {
+            "pubId": f"M{index:08d}",
+            "clientName": client_name or self._random.choice(self._clients),
+            "message": f"Donate #{index}" if message is None else message,
+            "amount": self._random.choice(AMOUNTS) if amount is None else int(amount),
+            "currency": currency or self._random.choice(CURRENCIES),
+            "goal": goal,
+            "isPublished": True,
+            "createdAt": (created_at or datetime.now()).strftime(DATETIME_FORMAT),
+        }
+
+    @staticmethod
+    def _longpool(donate: dict) -> dict:
+        """Long polling payload of a history donate"""
+        return {
+            "clientName": donate["clientName"], "name": donate["clientName"],
+            "message": donate["message"], "amount": str(donate["amount"]),
+            "currency": donate["currency"], "source": "mock", "image": "", "sound": "",
+            "video": "", "interactionMedia": "", "interactionMediaStartTime": "",
+            "goalWidgetName": donate["goal"], "manuallyApproved": False, "ban": False,
+            "isPublished": True, "createdAt": donate["createdAt"], "isSubscription": False,
+            "uploadedVoice": "",
+        }
+
+    def _record(self, donate: dict) -> None:
+        self._history.append(donate)
+        name = donate["clientName"]
+        self._totals[name] = self._totals.get(name, 0) + donate["amount"]
+
+    def _widget(self, widget_id: str) -> _Widget:
+        widget = self._widgets.get(widget_id)
+        if widget is None:
+            widget = self._widgets[widget_id] = _Widget()
+        return widget
+
+    def _deliver(self, widget_id: str, donate: dict) -> None:
+        """Record a donate and queue it for a widget, runs on the server loop"""
+        self._record(donate)
+        widget = self._widget(widget_id)
+        widget.queue.append(self._longpool(donate))
+        if widget.event is not None:
+            widget.event.set()
+
+    def inject(self, widget_id: str, **fields) -> dict:
+        """Queue a donate for the next ``info`` request of a widget
+
+            Safe to call from any thread.
+
+            :param widget_id: Widget ID
+            :param fields: ``client_name``, ``amount``, ``currency``, ``message`` or ``goal``, random by default
+
+            :return: Long polling payload the widget will receive
+            :rtype: dict
+        """
+        donate = self._donate(**fields)
+        loop = self._loop
+        if loop is None or self._thread is None or threading.current_thread() is self._thread:
+            self._deliver(widget_id, donate)
+        else:
+            loop.call_soon_threadsafe(self._deliver, widget_id, donate)
+        return self._longpool(donate)
+
+    def _accrue(self, widget_id: str, widget: _Widget, now: float) -> None:
+        """Generate donates due by ``donate_rate`` since the last request"""
+        if widget.last is not None:
+            widget.credit += (now - widget.last) * self.donate_rate
+        widget.last = now
+        while widget.credit >= 1:
+            widget.credit -= 1
+            self._deliver(widget_id, self._donate())
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        name = request.match_info.route.name
+        if name in self.requests:
+            self.requests[name] += 1
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        token = request.match_info.get("token") or request.headers.get("X-Token")
+        if self._tokens is not None and token not in self._tokens:
+            return web.json_response({"success": False, "message": "Invalid token"}, status=401)
+        if self.error_rate and self._random.random() < self.error_rate:
+            return web.json_response({"success": False, "message": "Mock server error"},
+                                     status=self.error_status)
+        return await handler(request)
+
+    async def _me(self, request: web.Request) -> web.Response:
+        token = request.headers.get("X-Token", "")
+        return web.json_response({
+            "nickname": f"creator_{token[:8]}", "pubId": f"U{token[:8]}", "page": f"creator_{token[:8]}",
+            "isActive": True, "isPublic": True,
+            "donates": {"totalAmount": sum(self._totals.values()), "totalCount": len(self._history)},
+            "createdAt": self._history[0]["createdAt"] if self._history else "2023-01-01 00:00:00",
+        })
+
+    async def _donates(self, request: web.Request) -> web.Response:
+        page = int(request.query.get("page", 0))
+        size = int(request.query.get("size", 20))
+        total = len(self._history)
+        # Newest first
+        end = max(total - page * size, 0)
+        content = self._history[max(end - size, 0):end][::-1]
+        return web.json_response({
+            "content": content, "page": page, "size": size, "num": len(content),
+            "first": page == 0, "last": end - size <= 0, "total": total,
+        })
+
+    async def _clients_list(self, request: web.Request) -> web.Response:
+        return web.json_response({"clients": [
+            {"clientName": name, "totalAmount": amount} for name, amount in self._totals.items()]})
+
+    async def _info(self, request: web.Request) -> web.Response:
+        widget_id = request.match_info["widget_id"]
+        widget = self._widget(widget_id)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.hold
+        while True:
+            self._accrue(widget_id, widget, loop.time())
+            if widget.queue:
+                return web.json_response(widget.queue.popleft())
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return web.json_response({"success": True})
+            if self.donate_rate:
+                remaining = min(remaining, (1 - widget.credit) / self.donate_rate)
+            if widget.event is None:
+                widget.event = asyncio.Event()
+            widget.event.clear()
+            try:
+                await asyncio.wait_for(widget.event.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self) -> None:
+        """Start serving on the running event loop"""
+        self._loop = asyncio.get_running_loop()
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get(API_PATH + "me", self._me, name="me")
+        app.router.add_get(API_PATH + "donates", self._donates, name="donates")
+        app.router.add_get(API_PATH + "clients", self._clients_list, name="clients")
+        app.router.add_get(WIDGET_PATH.format(widget_id="{widget_id}", token="{token}") + "info",
+                           self._info, name="info")
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self._host, self._port).start()
+        self._port = self._runner.addresses[0][1]
+
+    async def close(self) -> None:
+        """Stop serving"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> MockServer:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    async def _serve(self, ready: threading.Event) -> None:
+        """Serve in the background thread until stopped"""
+        self._stopped = asyncio.Event()
+        try:
+            await self.start()
+        except BaseException as e:
+            self._error = e
+            return
+        finally:
+            ready.set()
+        try:
+            await self._stopped.wait()
+        finally:
+            await self.close()
+
+    def __enter__(self) -> MockServer:
+        ready = threading.Event()
+        self._thread = threading.Thread(target=asyncio.run, args=(self._serve(ready),),
+                                        name="donatello-mock", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if self._error is not None:
+            raise self._error
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._loop.call_soon_threadsafe(self._stopped.set)
+        self._thread.join()
+        self._thread = None
+
+    def __repr__(self) -> str:
+        return f"<MockServer url={self.url} widgets={len(self._widgets)} history={len(self._history)}>"
@@ -43,6 +43,10 @@ extras_require = {
     ],
     'speed': [
         'ujson>=3.5.4',
+        'orjson>=3',
+    ],
+    'numpy': [
+        'numpy>=1.21',
     ],
     # 'test': [
     #     'coverage[toml]',
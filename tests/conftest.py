@@ -0,0 +1,33 @@
+import time
+
+import pytest
+
+from donatello.testing import MockServer
+
+
+@pytest.fixture
+def server():
+    """Mock API in a background thread, usable by sync and async clients"""
+    with MockServer(history=250, seed=1) as server:
+        yield server
+
+
+@pytest.fixture
+def wait():
+    """Poll a condition until it holds or the timeout runs out"""
+    def wait(condition, timeout: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+    return wait
+
+
+@pytest.fixture
+def redeliver(server):
+    """Queue a long polling payload for a widget again, as a retried delivery would"""
+    def redeliver(widget_id: str, payload: dict) -> None:
+        server._loop.call_soon_threadsafe(server._widget(widget_id).queue.append, dict(payload))
+    return redeliver
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+
+from donatello import AsyncSupervisor, Donatello, EventJournal, PollingPolicy
+from donatello.batching import AsyncDonateBatcher, DonateBatcher
+
+
+def test_full_batches_are_delivered_at_once():
+    batches = []
+    batcher = DonateBatcher(batches.append, max_size=3, max_delay=10)
+    for index in range(7):
+        batcher(index)
+    assert batches == [[0, 1, 2], [3, 4, 5]]
+    batcher.close()
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_remainder_of_a_large_event_times_out(wait):
+    batches = []
+    batcher = DonateBatcher(batches.append, max_size=3, max_delay=0.05)
+    batcher(list(range(5)))
+    assert wait(lambda: len(batches) == 2, timeout=1)
+    assert batches == [[0, 1, 2], [3, 4]]
+    batcher.close()
+
+
+def test_completion_waits_for_delivery():
+    batches, done = [], []
+    batcher = DonateBatcher(batches.append, max_size=2, max_delay=10)
+    batcher(0, done.append)
+    assert done == []
+    batcher(1, done.append)
+    assert batches == [[0, 1]]
+    assert done == [True, True]
+
+    def crash(batch):
+        raise RuntimeError("insert failed")
+
+    failing = DonateBatcher(crash, max_size=1)
+    try:
+        failing(0, done.append)
+    except RuntimeError:
+        pass
+    assert done == [True, True, False]
+    failing.close()
+
+
+def test_async_batches():
+    async def main() -> list:
+        batches = []
+
+        async def store(batch):
+            batches.append(batch)
+
+        batcher = AsyncDonateBatcher(store, max_size=3, max_delay=0.05)
+        for index in range(4):
+            await batcher(index)
+        assert batches == [[0, 1, 2]]
+        await asyncio.sleep(0.2)
+        return batches
+
+    assert asyncio.run(main()) == [[0, 1, 2], [3]]
+
+
+def test_client_delivers_batches(server, wait):
+    client = Donatello("token", "widget", connection=server.connection(), longpool_timeout=0.02,
+                       logging_level=logging.ERROR)
+    batches = []
+    client.on_donate_batch(batches.append, max_size=3, max_delay=0.2)
+    client.start()
+    for index in range(4):
+        server.inject("widget", message=str(index))
+    assert wait(lambda: sum(map(len, batches)) == 4)
+    client.stop()
+    assert [donate.message for batch in batches for donate in batch] == ["0", "1", "2", "3"]
+    assert all(len(batch) <= 3 for batch in batches)
+
+
+def test_supervisor_flushes_on_stop(server):
+    async def main() -> list:
+        supervisor = AsyncSupervisor(connection=server.connection(), polling_policy=PollingPolicy(0.02),
+                                     logging_level=logging.ERROR)
+        supervisor.add_widget("token", "widget")
+        batches = []
+
+        @supervisor.on_donate_batch(max_size=100, max_delay=60)
+        async def store(donates):
+            batches.append(donates)
+
+        polling = asyncio.ensure_future(supervisor.run())
+        server.inject("widget")
+        await asyncio.sleep(0.3)
+        assert batches == []
+        supervisor.stop()
+        await polling
+        return batches
+
+    assert [len(batch) for batch in asyncio.run(main())] == [1]
+
+
+def test_batch_acked_after_delivery(server, tmp_path, wait):
+    journal = EventJournal(str(tmp_path / "donates.journal"))
+    client = Donatello("token", "widget", connection=server.connection(), longpool_timeout=0.02,
+                       journal=journal, logging_level=logging.ERROR)
+    batches = []
+
+    @client.on_donate_batch(max_size=10, max_delay=0.5)
+    def store(donates):
+        batches.append(donates)
+
+    client.start()
+    server.inject("widget")
+    assert wait(lambda: len(journal) == 1)
+    assert not batches
+    assert wait(lambda: batches)
+    assert wait(lambda: len(journal) == 0)
+    client.stop()
+    journal.close()
+
+
+def test_stop_delivers_queued_donates_in_batches(server, wait):
+    client = Donatello("token", "widget", connection=server.connection(), longpool_timeout=0.02,
+                       dispatch_workers=2, logging_level=logging.ERROR)
+    batches = []
+
+    @client.on_donate_batch(max_size=100, max_delay=60)
+    def store(donates):
+        batches.append(donates)
+
+    assert repr(client._batchers[0]).startswith("<DonateBatcher listener=test_stop_delivers")
+    client.start()
+    server.inject("widget")
+    assert wait(lambda: server.requests["info"] >= 3)
+    client.stop()
+    assert [len(batch) for batch in batches] == [1]
+    assert client._batchers[0]._thread is None
+
+    client.start()
+    server.inject("widget")
+    requests = server.requests["info"]
+    assert wait(lambda: server.requests["info"] >= requests + 2)
+    client.stop()
+    assert [len(batch) for batch in batches] == [1, 1]
@@ -0,0 +1,47 @@
+import asyncio
+import logging
+import time
+
+from donatello import BulkError, BulkFetcher, RetryPolicy
+from donatello.testing import MockServer
+
+
+def test_results_per_token():
+    async def main() -> None:
+        tokens = [f"token_{index}" for index in range(6)]
+        async with MockServer(tokens=tokens[:5], history=10) as server:
+            server.latency = 0.1
+            async with BulkFetcher(concurrency=3, connection=server.connection(),
+                                   retry_policy=RetryPolicy(attempts=1), logging_level=logging.CRITICAL) as bulk:
+                started = time.monotonic()
+                results = [item async for item in bulk.get_me(tokens)]
+                elapsed = time.monotonic() - started
+
+        assert sorted(item.token for item in results) == tokens
+        by_token = {item.token: item for item in results}
+        assert all(by_token[token].ok for token in tokens[:5])
+        assert by_token["token_0"].result.nickname == "creator_token_0"
+        assert isinstance(by_token["token_5"].error, BulkError)
+        assert server.requests["me"] == 6
+        # Two rounds of three concurrent calls
+        assert 0.2 <= elapsed < 0.45
+
+    asyncio.run(main())
+
+
+def test_failing_tokens_iterable_is_raised():
+    async def main() -> str:
+        def tokens():
+            yield "token"
+            raise RuntimeError("token source failed")
+
+        async with MockServer(history=0) as server:
+            async with BulkFetcher(concurrency=2, connection=server.connection(),
+                                   logging_level=logging.CRITICAL) as bulk:
+                try:
+                    async for _ in bulk.get_clients(tokens()):
+                        pass
+                except RuntimeError as e:
+                    return str(e)
+
+    assert asyncio.run(main()) == "token source failed"
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import threading
+
+from donatello import AsyncDonatello, Donatello
+from donatello.cache import ResponseCache
+
+
+def test_responses_are_cached_per_endpoint(server):
+    client = Donatello("token", connection=server.connection(), cache_ttl={"me": 60},
+                       logging_level=logging.ERROR)
+    assert client.get_me() == client.get_me()
+    client.get_clients()
+    client.get_clients()
+    assert server.requests["me"] == 1
+    assert server.requests["clients"] == 2
+    client.close()
+
+
+def test_donate_invalidates_cache(server, wait):
+    client = Donatello("token", "widget", connection=server.connection(), longpool_timeout=0.02,
+                       cache_ttl=60, logging_level=logging.ERROR)
+    received = []
+    client.on_donate(received.extend)
+    before = client.get_clients()
+    client.start()
+    server.inject("widget", client_name="client_0", amount=1000)
+    assert wait(lambda: received)
+    client.stop()
+
+    after = client.get_clients()
+    assert server.requests["clients"] == 2
+    totals = {entry.client_name: entry.total_amount for entry in before.clients}
+    assert {entry.client_name: entry.total_amount for entry in after.clients}["client_0"] \
+        == totals.get("client_0", 0) + 1000
+    client.close()
+
+
+def test_concurrent_threads_share_one_request(server):
+    client = Donatello("token", connection=server.connection(), cache_ttl=60, logging_level=logging.ERROR)
+    server.latency = 0.2
+    threads = [threading.Thread(target=client.get_me) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert server.requests["me"] == 1
+    client.close()
+
+
+def test_concurrent_tasks_share_one_request(server):
+    async def main() -> None:
+        client = AsyncDonatello("token", connection=server.connection(), cache_ttl=60,
+                                logging_level=logging.ERROR)
+        users = await asyncio.gather(*(client.get_me() for _ in range(8)))
+        assert all(user == users[0] for user in users)
+        await client.close()
+
+    server.latency = 0.2
+    asyncio.run(main())
+    assert server.requests["me"] == 1
+
+
+def test_least_recently_used_are_evicted():
+    cache = ResponseCache(ttl=60, max_size=2)
+    cache.set(("me", 1), "first")
+    cache.set(("me", 2), "second")
+    assert cache.get(("me", 1)) == "first"
+    cache.set(("me", 3), "third")
+    assert cache.get(("me", 2)) is None
+    assert cache.get(("me", 1)) == "first"
@@ -0,0 +1,33 @@
+import logging
+from collections import Counter
+
+import pytest
+
+from donatello import Donatello
+from donatello.models import DonateColumns
+
+pytest.importorskip("numpy")
+
+
+def test_totals_match_donates(server):
+    client = Donatello("token", connection=server.connection(), logging_level=logging.ERROR)
+    donates = list(client.iter_donates(per_page=100))
+    columns = DonateColumns.from_donates(iter(donates))
+    client.close()
+
+    by_client, by_currency, by_day = Counter(), Counter(), Counter()
+    for donate in donates:
+        by_client[donate.client_name] += donate.amount
+        by_currency[donate.currency] += donate.amount
+        by_day[donate.created_at.date()] += donate.amount
+    assert len(columns) == len(donates) == 250
+    assert columns.total_by_client() == dict(by_client)
+    assert columns.total_by_currency() == dict(by_currency)
+    assert columns.total_by_day() == dict(by_day)
+    assert list(columns.to_dict()["client_name"]) == [donate.client_name for donate in donates]
+
+
+def test_empty_history():
+    columns = DonateColumns.from_donates([])
+    assert len(columns) == 0
+    assert columns.total_by_client() == {}
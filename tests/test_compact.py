@@ -0,0 +1,25 @@
+import logging
+
+import pytest
+
+from donatello import Donatello
+from donatello.models import CompactDonates
+
+
+def test_round_trips_donates(server):
+    client = Donatello("token", connection=server.connection(), logging_level=logging.ERROR)
+    donates = client.get_donates(per_page=100).content
+    client.close()
+
+    history = CompactDonates(donates)
+    assert len(history) == 100
+    assert [donate.to_donate() for donate in history] == donates
+    assert history[-1].created_at == donates[-1].created_at
+    assert set(history.clients) == {donate.client_name for donate in donates}
+    assert max(history).amount == max(donates).amount
+
+
+def test_index_out_of_range():
+    history = CompactDonates()
+    with pytest.raises(IndexError):
+        history[0]
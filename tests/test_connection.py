@@ -0,0 +1,44 @@
+import asyncio
+import logging
+
+from donatello import AsyncDonatello, ConnectionOptions, Donatello
+
+
+def test_request_timeout():
+    assert ConnectionOptions(connect_timeout=3, read_timeout=10).request_timeout == (3, 10)
+    assert ConnectionOptions(connect_timeout=None, read_timeout=None).request_timeout is None
+
+
+def test_session_is_pooled():
+    session = ConnectionOptions(pool_size=25, keepalive=False).session()
+    adapter = session.get_adapter("https://donatello.to")
+    assert adapter._pool_maxsize == 25
+    assert session.headers["Connection"] == "close"
+    session.close()
+
+
+def test_shared_session_outlives_clients(server):
+    options = server.connection()
+    session = options.session()
+    clients = [Donatello("token", session=session, connection=options, logging_level=logging.ERROR)
+               for _ in range(3)]
+    for client in clients:
+        client.get_me()
+        client.close()
+    assert server.requests["me"] == 3
+    assert session.get(f"{server.url}/api/v1/me", headers={"X-Token": "token"}).ok
+    session.close()
+
+
+def test_async_session_limit(server):
+    async def main() -> None:
+        options = server.connection()
+        session = options.async_session(limit=3)
+        assert session.connector.limit == 3
+        client = AsyncDonatello("token", session=session, connection=options, logging_level=logging.ERROR)
+        await client.get_me()
+        await client.close()
+        assert not session.closed
+        await session.close()
+
+    asyncio.run(main())
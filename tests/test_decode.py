@@ -0,0 +1,51 @@
+import logging
+
+import pytest
+
+from donatello import Donatello
+from donatello.models import DonateList, LongpoolDonate, decode_trusted
+
+
+def donate(i: int) -> dict:
+    return {
+        "pubId": f"D{i:08d}", "clientName": f"client_{i}", "message": "Hi", "amount": 10 + i,
+        "currency": "UAH", "isPublished": True, "createdAt": f"2023-05-01 12:00:{i:02d}",
+    }
+
+
+PAGE = {"content": [donate(i) for i in range(10)], "page": 0, "size": 10, "num": 10,
+        "first": True, "last": False, "total": 30}
+
+LONGPOOL = {
+    "clientName": "client", "message": "Hi", "amount": "100", "currency": "UAH",
+    "source": "site", "image": "", "sound": "", "video": "", "interactionMedia": "",
+    "interactionMediaStartTime": "", "goalWidgetName": "", "manuallyApproved": False,
+    "ban": False, "isPublished": True, "createdAt": "2023-05-01 12:00:00",
+    "isSubscription": False, "uploadedVoice": "", "name": "client",
+}
+
+
+def test_matches_validated_parsing():
+    page = decode_trusted(DonateList, PAGE)
+    assert page == DonateList(**PAGE)
+    assert page.content[0].goal == ""
+    assert page.content[0].created_at == DonateList(**PAGE).content[0].created_at
+
+    longpool = decode_trusted(LongpoolDonate, LONGPOOL, widget_id="widget")
+    assert longpool == LongpoolDonate(**LONGPOOL, widget_id="widget")
+    assert longpool.widget_id == "widget"
+
+
+def test_missing_required_field():
+    with pytest.raises(KeyError, match="pubId"):
+        decode_trusted(DonateList, {**PAGE, "content": [{"clientName": "client"}]})
+
+
+def test_trusted_client_matches_validated(server):
+    validated = Donatello("token", connection=server.connection(), logging_level=logging.ERROR)
+    trusted = Donatello("token", connection=server.connection(), trusted=True, logging_level=logging.ERROR)
+    assert trusted.get_me() == validated.get_me()
+    assert trusted.get_donates(per_page=50) == validated.get_donates(per_page=50)
+    assert trusted.get_clients() == validated.get_clients()
+    validated.close()
+    trusted.close()
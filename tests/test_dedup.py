@@ -0,0 +1,60 @@
+import logging
+
+from donatello import DonateDeduplicator, Donatello
+from donatello.models import LongpoolDonate
+
+
+PAYLOAD = {
+    "clientName": "client", "name": "client", "amount": "100", "currency": "UAH", "source": "mock",
+    "image": "", "sound": "", "video": "", "interactionMedia": "", "interactionMediaStartTime": "",
+    "goalWidgetName": "", "manuallyApproved": False, "ban": False, "isPublished": True,
+    "createdAt": "2024-01-01 12:00:00", "isSubscription": False, "uploadedVoice": "",
+}
+
+
+def donate(message: str, widget_id: str = "widget") -> LongpoolDonate:
+    return LongpoolDonate(**PAYLOAD, message=message, widget_id=widget_id)
+
+
+def test_duplicates_are_dropped():
+    dedup = DonateDeduplicator()
+    assert dedup.is_new(donate("hello"))
+    assert not dedup.is_new(donate("hello"))
+    assert dedup.is_new(donate("hello", widget_id="other"))
+    assert dedup.duplicates == 1
+
+
+def test_memory_is_bounded():
+    dedup = DonateDeduplicator(max_size=3)
+    for index in range(5):
+        dedup.is_new(donate(str(index)))
+    assert len(dedup) == 3
+    assert dedup.is_new(donate("0"))
+    assert not dedup.is_new(donate("4"))
+
+
+def test_checkpoint_survives_restart(tmp_path):
+    path = str(tmp_path / "donates.seen")
+    dedup = DonateDeduplicator(checkpoint=path)
+    dedup.is_new(donate("hello"))
+    dedup.close()
+
+    restarted = DonateDeduplicator(checkpoint=path)
+    assert donate("hello") in restarted
+    assert not restarted.is_new(donate("hello"))
+    restarted.close()
+
+
+def test_redelivered_donate_reaches_listeners_once(server, redeliver, wait):
+    client = Donatello("token", "widget", connection=server.connection(), longpool_timeout=0.02,
+                       deduplicator=DonateDeduplicator(), logging_level=logging.ERROR)
+    received = []
+    client.on_donate(received.extend)
+    client.start()
+    payload = server.inject("widget", message="only once")
+    assert wait(lambda: received)
+    redeliver("widget", payload)
+    server.inject("widget", message="next")
+    assert wait(lambda: len(received) == 2)
+    client.stop()
+    assert [donate.message for donate in received] == ["only once", "next"]
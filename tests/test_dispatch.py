@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import threading
+import time
+
+from donatello import Donatello
+from donatello.events import AsyncEventHandler, ThreadedEventHandler
+
+
+def test_listeners_run_on_workers():
+    handler = ThreadedEventHandler(workers=2)
+    threads = []
+
+    def listener(event):
+        threads.append(threading.current_thread().name)
+
+    handler.add_listener(listener)
+    for index in range(3):
+        handler.handle_event(index)
+    handler.close()
+    assert threads == ["donatello-dispatch"] * 3
+    assert handler.stats[listener.__qualname__].calls == 3
+
+
+def test_stop_joins_polling_and_workers(server, wait):
+    client = Donatello("token", "widget", connection=server.connection(), longpool_timeout=0.02,
+                       dispatch_workers=2, logging_level=logging.ERROR)
+    received = []
+    client.on_donate(received.extend)
+    client.start()
+    server.inject("widget")
+    assert wait(lambda: received)
+    client.stop()
+    assert wait(lambda: not any(thread.name in ("donatello-polling", "donatello-dispatch")
+                                for thread in threading.enumerate()))
+
+
+def test_closed_handler_drops_events():
+    handler = ThreadedEventHandler(workers=1)
+    received, done = [], []
+    handler.add_listener(received.append)
+    handler.close()
+    handler.handle_event("late", on_done=lambda: done.append(True))
+    assert received == [] and done == []
+
+    handler.start()
+    handler.handle_event("again", on_done=lambda: done.append(True))
+    handler.close()
+    assert received == ["again"] and done == [True]
+
+
+def test_listener_removed_during_dispatch_is_skipped():
+    handler = ThreadedEventHandler(workers=2)
+    received, done = [], []
+    handler.add_listener(received.append)
+    removed = []
+    handler.add_listener(removed.append)
+    # State seen by handle_event when remove_listener runs after the listeners were copied
+    del handler._assigned[removed.append]
+    handler.handle_event("event", on_done=lambda: done.append(True))
+    handler.close()
+    assert received == ["event"] and removed == [] and done == [True]
+
+
+def test_remove_donate_listener_unpins_worker(server):
+    client = Donatello("token", "widget", connection=server.connection(), dispatch_workers=2,
+                       logging_level=logging.ERROR)
+
+    def listener(donates):
+        pass
+
+    client.on_donate(listener)
+    client.on_donate_batch(listener, max_size=10)
+    client.remove_donate_listener(listener)
+    client.remove_donate_listener(listener)
+    assert client._on_donate.listeners == []
+    assert client._on_donate._assigned == {}
+
+
+def test_async_listeners_run_concurrently():
+    async def main() -> None:
+        running, peak, errors, done = [0], [0], [], []
+
+        async def report(error):
+            errors.append(error)
+
+        handler = AsyncEventHandler(concurrent=True, max_concurrency=2, timeout=0.5, error_callback=report)
+
+        async def slow(event):
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            await asyncio.sleep(0.1)
+            running[0] -= 1
+
+        for _ in range(4):
+            handler.add_listener(slow)
+        started = time.monotonic()
+        assert await handler.handle_event("event", on_done=lambda: done.append(True))
+        assert 0.2 <= time.monotonic() - started < 0.35
+        assert peak == [2] and done == [True] and errors == []
+
+        async def hang(event):
+            await asyncio.sleep(10)
+
+        handler.add_listener(hang)
+        assert not await handler.handle_event("event", on_done=lambda: done.append(True))
+        assert done == [True]
+        assert [type(error) for error in errors] == [asyncio.TimeoutError]
+
+    asyncio.run(main())
@@ -0,0 +1,23 @@
+import subprocess
+import sys
+
+import pytest
+
+import donatello
+import donatello.models
+
+
+def test_import_loads_no_dependencies():
+    code = ("import sys, donatello, donatello.models; "
+            "print(sorted(name for name in ('pydantic', 'requests', 'aiohttp', 'numpy') if name in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
+
+
+@pytest.mark.parametrize("package", [donatello, donatello.models])
+def test_every_public_name_resolves(package):
+    for name in package.__all__:
+        assert getattr(package, name).__name__ == name
+    assert set(package.__all__) <= set(dir(package))
+    with pytest.raises(AttributeError):
+        package.Missing
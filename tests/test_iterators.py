@@ -0,0 +1,32 @@
+import asyncio
+import logging
+
+import pytest
+
+from donatello import AsyncDonatello, Donatello
+
+
+def test_iter_donates_reads_whole_history(server):
+    client = Donatello("token", connection=server.connection(), logging_level=logging.ERROR)
+    donates = list(client.iter_donates(per_page=40, prefetch=2))
+    assert len(donates) == 250
+    assert len({donate.id for donate in donates}) == 250
+    client.close()
+
+
+def test_aiter_donates_reads_whole_history(server):
+    async def main() -> list:
+        client = AsyncDonatello("token", connection=server.connection(), logging_level=logging.ERROR)
+        donates = [donate async for donate in client.aiter_donates(per_page=40, prefetch=3)]
+        await client.close()
+        return donates
+
+    donates = asyncio.run(main())
+    assert len({donate.id for donate in donates}) == 250
+
+
+def test_prefetch_must_be_positive(server):
+    client = Donatello("token", connection=server.connection(), logging_level=logging.ERROR)
+    with pytest.raises(ValueError, match="prefetch"):
+        next(client.iter_donates(prefetch=0))
+    client.close()
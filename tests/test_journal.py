@@ -0,0 +1,91 @@
+import logging
+import os
+
+from donatello import Donatello, EventJournal
+
+
+def polling_client(server, journal: EventJournal) -> Donatello:
+    return Donatello("token", "widget", connection=server.connection(), longpool_timeout=0.02,
+                     journal=journal, logging_level=logging.ERROR)
+
+
+def test_pending_until_acked(tmp_path):
+    journal = EventJournal(str(tmp_path / "donates.journal"), sync_interval=0)
+    first = journal.append({"message": "first"})
+    journal.append({"message": "second"})
+    journal.ack(first)
+    assert [payload["message"] for _, payload in journal.pending()] == ["second"]
+    journal.close()
+
+    reopened = EventJournal(str(tmp_path / "donates.journal"), sync_interval=0)
+    assert [payload["message"] for _, payload in reopened.pending()] == ["second"]
+    reopened.close()
+
+
+def test_compaction_keeps_unacked(tmp_path):
+    path = str(tmp_path / "donates.journal")
+    journal = EventJournal(path, compact_after=5)
+    seqs = [journal.append({"index": index}) for index in range(20)]
+    for seq in seqs[::2]:
+        journal.ack(seq)
+    assert [payload["index"] for _, payload in journal.pending()] == list(range(1, 20, 2))
+    journal.close()
+    reopened = EventJournal(path)
+    assert [payload["index"] for _, payload in reopened.pending()] == list(range(1, 20, 2))
+    reopened.close()
+
+
+def test_torn_record_is_dropped(tmp_path):
+    path = str(tmp_path / "donates.journal")
+    journal = EventJournal(path, sync_interval=0)
+    journal.append({"message": "kept"})
+    journal.append({"message": "torn"})
+    journal.close()
+    os.truncate(path, os.path.getsize(path) - 3)
+
+    reopened = EventJournal(path, sync_interval=0)
+    assert [payload["message"] for _, payload in reopened.pending()] == ["kept"]
+    reopened.append({"message": "after"})
+    assert [payload["message"] for _, payload in reopened.pending()] == ["kept", "after"]
+    reopened.close()
+
+
+def test_failed_listener_is_replayed(server, tmp_path, wait):
+    path = str(tmp_path / "donates.journal")
+    journal = EventJournal(path)
+    client = polling_client(server, journal)
+
+    @client.on_donate
+    def crash(donates):
+        raise RuntimeError("listener crashed")
+
+    client.start()
+    server.inject("widget", message="replay me")
+    assert wait(lambda: len(journal) == 1)
+    client.stop()
+    journal.close()
+
+    journal = EventJournal(path)
+    client = polling_client(server, journal)
+    received = []
+    client.on_donate(received.extend)
+    client.start()
+    assert wait(lambda: received)
+    client.stop()
+    assert [donate.message for donate in received] == ["replay me"]
+    assert journal.pending() == []
+    journal.close()
+
+
+def test_compact_empty_journal(tmp_path):
+    journal = EventJournal(str(tmp_path / "donates.journal"))
+    journal.compact()
+    journal.compact()
+    assert journal.pending() == []
+    seq = journal.append({"message": "only"})
+    journal.ack(seq)
+    journal.compact()
+    journal.compact()
+    assert journal.pending() == []
+    assert len(journal) == 0
+    journal.close()
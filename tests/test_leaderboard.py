@@ -0,0 +1,43 @@
+import logging
+import random
+from datetime import datetime
+
+from donatello import Donatello, Leaderboard
+from donatello.models import Donate
+
+
+def test_ranking_matches_sorting():
+    board = Leaderboard()
+    rng = random.Random(1)
+    totals = {}
+    for index in range(500):
+        name = f"client_{rng.randrange(40)}"
+        amount = rng.randrange(1, 1000)
+        totals[name] = totals.get(name, 0) + amount
+        board.add(Donate(pubId=str(index), clientName=name, message="", amount=amount, currency="UAH",
+                         goal="camera", isPublished=True, createdAt=datetime(2024, 1, 1)))
+
+    expected = sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+    assert board.top(10) == expected[:10]
+    assert [board.rank(name) for name, _ in expected] == list(range(1, len(expected) + 1))
+    assert board.rank("nobody") is None
+    assert board.total() == sum(totals.values())
+    assert board.goal("camera").raised == sum(totals.values())
+
+
+def test_follows_live_donates(server, wait):
+    client = Donatello("token", "widget", connection=server.connection(), longpool_timeout=0.02,
+                       logging_level=logging.ERROR)
+    board = Leaderboard()
+    board.seed(client)
+    goal = board.set_goal("camera", 1000)
+    board.attach(client)
+    client.start()
+    try:
+        server.inject("widget", client_name="Raider", amount=600, currency="UAH", goal="camera")
+        server.inject("widget", client_name="Raider", amount=600, currency="UAH", goal="camera")
+        assert wait(lambda: board.donates == 2)
+    finally:
+        client.stop()
+    assert board.total("Raider") == 1200
+    assert goal.raised == 1200 and goal.remaining == 0 and goal.ratio == 1.2
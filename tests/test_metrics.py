@@ -0,0 +1,36 @@
+import logging
+
+from donatello import Donatello, Metrics
+
+
+def test_render_prometheus_text():
+    metrics = Metrics(buckets=(0.1, 1))
+    metrics.inc("requests_total", endpoint="me")
+    metrics.inc("requests_total", 2, endpoint="me")
+    metrics.observe("request_duration_seconds", 0.5, endpoint="me")
+    text = metrics.render()
+    assert 'donatello_requests_total{endpoint="me"} 3' in text
+    assert 'donatello_request_duration_seconds_bucket{endpoint="me",le="0.1"} 0' in text
+    assert 'donatello_request_duration_seconds_bucket{endpoint="me",le="1"} 1' in text
+    assert 'donatello_request_duration_seconds_bucket{endpoint="me",le="+Inf"} 1' in text
+    assert "# TYPE donatello_request_duration_seconds histogram" in text
+    metrics.reset()
+    assert metrics.render() == "\n"
+
+
+def test_client_reports_requests_and_donates(server, wait):
+    observed = []
+    metrics = Metrics(callback=lambda name, labels, value: observed.append(name))
+    client = Donatello("token", "widget", connection=server.connection(), longpool_timeout=0.02,
+                       metrics=metrics, logging_level=logging.ERROR)
+    client.on_donate(lambda donates: None)
+    client.get_me()
+    client.start()
+    server.inject("widget")
+    assert wait(lambda: metrics.counter("donates_total"))
+    client.stop()
+    assert metrics.counter("requests_total", endpoint="me") == server.requests["me"]
+    assert metrics.histogram("request_duration_seconds", endpoint="me").count == server.requests["me"]
+    assert metrics.counter("requests_total", endpoint="info") == server.requests["info"]
+    assert metrics.histogram("donate_latency_seconds").count == 1
+    assert "requests_total" in observed
@@ -0,0 +1,39 @@
+import logging
+
+import pytest
+
+from donatello import AdaptivePolling, Donatello, PollingPolicy
+
+
+def test_backoff_while_idle():
+    policy = AdaptivePolling(min_interval=1, max_interval=5, factor=2, jitter=0)
+    stats = policy.create_stats()
+    assert [policy.next_interval(stats, False) for _ in range(4)] == [2, 4, 5, 5]
+    assert policy.next_interval(stats, True) == 1
+    assert policy.next_interval(stats, False) == 2
+
+
+def test_jitter_stays_in_bounds():
+    policy = AdaptivePolling(min_interval=1, max_interval=2, jitter=0.5)
+    stats = policy.create_stats()
+    assert all(1 <= policy.next_interval(stats, False) <= 2 for _ in range(50))
+
+
+def test_rejects_invalid_intervals():
+    with pytest.raises(ValueError):
+        AdaptivePolling(min_interval=0)
+    with pytest.raises(ValueError):
+        AdaptivePolling(min_interval=2, max_interval=1)
+
+
+def test_client_counts_requests(server, wait):
+    client = Donatello("token", "widget", connection=server.connection(), polling_policy=PollingPolicy(0.02),
+                       logging_level=logging.ERROR)
+    received = []
+    client.on_donate(received.extend)
+    client.start()
+    server.inject("widget")
+    assert wait(lambda: received)
+    client.stop()
+    assert client.polling_stats.donates == 1
+    assert client.polling_stats.requests == server.requests["info"]
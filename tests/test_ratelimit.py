@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+import pytest
+
+from donatello import Priority, RateLimiter
+
+
+def test_burst_then_rate():
+    limiter = RateLimiter(rate=50, burst=5, reserve=0)
+    started = time.monotonic()
+    for _ in range(10):
+        limiter.acquire()
+    # Five tokens come from the bucket, five more at 50 per second
+    assert 0.08 <= time.monotonic() - started < 0.3
+
+
+def test_bulk_leaves_reserve_for_live():
+    limiter = RateLimiter(rate=1, burst=4, reserve=2)
+    limiter.acquire(Priority.BULK)
+    limiter.acquire(Priority.BULK)
+    # A third bulk request would dip into the reserve
+    assert limiter._try_acquire(Priority.BULK) > 0
+    started = time.monotonic()
+    limiter.acquire(Priority.LIVE)
+    limiter.acquire(Priority.LIVE)
+    assert time.monotonic() - started < 0.1
+
+
+def test_async_acquire():
+    async def main() -> float:
+        limiter = RateLimiter(rate=50, burst=1, reserve=0)
+        started = time.monotonic()
+        await asyncio.gather(*(limiter.acquire_async() for _ in range(3)))
+        return time.monotonic() - started
+
+    assert 0.03 <= asyncio.run(main()) < 0.3
+
+
+def test_rejects_invalid_arguments():
+    with pytest.raises(ValueError):
+        RateLimiter(rate=0)
+    with pytest.raises(ValueError):
+        RateLimiter(burst=2, reserve=2)
@@ -0,0 +1,39 @@
+import pytest
+
+from donatello import DonateRates
+from donatello.models import Donate
+
+
+def donate(amount: int = 100, currency: str = "UAH") -> Donate:
+    return Donate(pubId="D", clientName="client", message="", amount=amount, currency=currency,
+                  isPublished=True, createdAt="2024-01-01 12:00:00")
+
+
+def test_windows_slide_and_spike_is_reported():
+    now = [0.0]
+    spikes = []
+    rates = DonateRates(windows=(60, 3600), spike_factor=3, spike_min_donates=5,
+                        on_spike=spikes.append, clock=lambda: now[0])
+    for _ in range(60):
+        rates.add(donate())
+        now[0] += 60
+    # The first donate is an hour old and slid out
+    assert rates.count(3600) == 59
+    assert rates.count(60) == 0
+    assert not rates.is_spike()
+
+    for _ in range(10):
+        rates([donate(50, "USD")])
+    assert rates.count(60) == 10
+    assert rates.amounts(60) == {"USD": 500}
+    assert rates.amount(3600) == 59 * 100
+    assert rates.is_spike() and len(spikes) == 1 and spikes[0] >= 3
+
+    now[0] += 61
+    assert rates.count(60) == 0
+    assert not rates.is_spike()
+
+
+def test_untracked_window():
+    with pytest.raises(ValueError):
+        DonateRates(windows=(60,)).count(300)
@@ -0,0 +1,59 @@
+import logging
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+
+from donatello import CircuitBreaker, CircuitOpenError, Donatello, RetryPolicy
+
+
+def failing_client(server, error: Exception) -> Donatello:
+    client = Donatello("token", connection=server.connection(), retry_policy=RetryPolicy(attempts=3, backoff=0),
+                       circuit_breaker=CircuitBreaker(failure_threshold=3, recovery_timeout=60),
+                       logging_level=logging.CRITICAL)
+    client.calls = 0
+
+    def request(*args, **kwargs):
+        client.calls += 1
+        raise error
+
+    client._session.request = request
+    return client
+
+
+def test_connection_errors_are_retried(server):
+    client = failing_client(server, requests.ConnectionError("refused"))
+    with pytest.raises(requests.ConnectionError):
+        client.get_me()
+    assert client.calls == 3
+    with pytest.raises(CircuitOpenError):
+        client.get_me()
+    client.close()
+
+
+def test_invalid_requests_are_not_retried(server):
+    client = failing_client(server, requests.exceptions.InvalidURL("bad url"))
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.InvalidURL):
+            client.get_me()
+    assert client.calls == 3
+    assert client._circuit_breaker.state(urlsplit(server.url).netloc) == CircuitBreaker.CLOSED
+    client.close()
+
+
+def test_error_statuses_are_retried(server):
+    client = Donatello("token", connection=server.connection(), retry_policy=RetryPolicy(attempts=3, backoff=0),
+                       logging_level=logging.CRITICAL)
+    server.error_rate = 1
+    assert client._request("GET", client._api_url, "me")["success"] is False
+    assert server.requests["me"] == 3
+    client.close()
+
+
+def test_breaker_recovers_after_probe():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+    breaker.record_failure("host")
+    breaker.check("host")
+    assert breaker.state("host") == CircuitBreaker.HALF_OPEN
+    breaker.record_success("host")
+    assert breaker.state("host") == CircuitBreaker.CLOSED
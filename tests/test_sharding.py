@@ -0,0 +1,70 @@
+import logging
+
+from donatello import PollingPolicy, ShardedRunner
+from donatello.sharding import HashRing
+
+WIDGETS = [f"widget_{index}" for index in range(6)]
+
+
+def runner_for(server, **kwargs) -> ShardedRunner:
+    runner = ShardedRunner(workers=2, polling_policy=PollingPolicy(0.05), connection=server.connection(),
+                           logging_level=logging.ERROR, **kwargs)
+    for widget_id in WIDGETS:
+        runner.add_widget("token", widget_id)
+    return runner
+
+
+def inject_all(server, message: str) -> None:
+    for widget_id in WIDGETS:
+        server.inject(widget_id, message=message)
+
+
+def test_ring_moves_only_removed_keys():
+    ring = HashRing(range(4))
+    owners = {key: ring.node_for(key) for key in map(str, range(1000))}
+    ring.remove(2)
+    for key, owner in owners.items():
+        if owner != 2:
+            assert ring.node_for(key) == owner
+        else:
+            assert ring.node_for(key) != 2
+
+
+def test_crashed_worker_is_restarted(server, wait):
+    runner = runner_for(server)
+    received = []
+    runner.on_donate(received.append)
+    runner.start()
+    try:
+        inject_all(server, "before")
+        assert wait(lambda: len(received) == len(WIDGETS), timeout=30)
+
+        victim = runner._workers[0]
+        pid = victim.process.pid
+        victim.process.kill()
+        assert wait(lambda: victim.process.pid != pid and victim.process.is_alive(), timeout=10)
+
+        inject_all(server, "after")
+        assert wait(lambda: len(received) == 2 * len(WIDGETS), timeout=30)
+    finally:
+        runner.stop()
+    assert sorted(donate.widget_id for donate in received if donate.message == "after") == sorted(WIDGETS)
+
+
+def test_crashing_worker_is_dropped(server, wait):
+    runner = runner_for(server, max_restarts=0)
+    received = []
+    runner.on_donate(received.append)
+    runner.start()
+    try:
+        inject_all(server, "before")
+        assert wait(lambda: len(received) == len(WIDGETS), timeout=30)
+
+        runner._workers[0].process.kill()
+        assert wait(lambda: list(runner.shards) == [1], timeout=10)
+        assert sorted(runner.shards[1]) == sorted(WIDGETS)
+
+        inject_all(server, "after")
+        assert wait(lambda: len(received) == 2 * len(WIDGETS), timeout=30)
+    finally:
+        runner.stop()
@@ -0,0 +1,29 @@
+import logging
+
+from donatello import Donatello, RetryPolicy
+
+
+def test_stream_matches_pages(server):
+    client = Donatello("token", connection=server.connection(), logging_level=logging.ERROR)
+    streamed = list(client.stream_donates(per_page=100))
+    assert len(streamed) == 250
+    assert [donate.id for donate in streamed[:100]] == [donate.id for donate in client.get_donates(per_page=100).content]
+    client.close()
+
+
+def test_retried_stream_is_closed(server):
+    client = Donatello("token", connection=server.connection(), retry_policy=RetryPolicy(attempts=2, backoff=0),
+                       logging_level=logging.ERROR)
+    responses = []
+    request = client._session.request
+
+    def record(*args, **kwargs):
+        responses.append(request(*args, **kwargs))
+        return responses[-1]
+
+    client._session.request = record
+    server.error_rate = 1
+    assert list(client.stream_donates()) == []
+    assert len(responses) == 2
+    assert responses[0].raw.closed
+    client.close()
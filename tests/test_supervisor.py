@@ -0,0 +1,39 @@
+import asyncio
+import logging
+
+import pytest
+
+from donatello import AsyncSupervisor, PollingPolicy
+
+
+def test_polls_every_widget(server):
+    async def main() -> list:
+        supervisor = AsyncSupervisor(connection=server.connection(), polling_policy=PollingPolicy(0.02),
+                                     concurrency=2, logging_level=logging.ERROR)
+        for widget_id in ("first", "second", "third"):
+            supervisor.add_widget("token", widget_id)
+        received = []
+
+        @supervisor.on_donate
+        async def store(donate):
+            received.append((donate.widget_id, donate.message))
+
+        polling = asyncio.ensure_future(supervisor.run())
+        for widget_id in ("first", "second", "third"):
+            server.inject(widget_id, message=widget_id)
+        for _ in range(100):
+            if len(received) == 3:
+                break
+            await asyncio.sleep(0.02)
+        supervisor.remove_widget("third")
+        assert supervisor.widgets == ["first", "second"]
+        supervisor.stop()
+        await polling
+        return received
+
+    assert sorted(asyncio.run(main())) == [("first", "first"), ("second", "second"), ("third", "third")]
+
+
+def test_rejects_non_positive_timeout():
+    with pytest.raises(ValueError):
+        AsyncSupervisor(longpool_timeout=0)
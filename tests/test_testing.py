@@ -0,0 +1,37 @@
+import asyncio
+import logging
+
+import aiohttp
+import requests
+
+from donatello import Donatello
+from donatello.testing import MockServer
+
+
+def test_serves_api_endpoints(server):
+    client = Donatello("token", connection=server.connection(), logging_level=logging.ERROR)
+    assert client.get_me().nickname.startswith("creator_")
+    assert client.get_donates(per_page=10).total == 250
+    assert client.get_clients().clients
+    assert server.requests["me"] == server.requests["donates"] == server.requests["clients"] == 1
+    client.close()
+
+
+def test_injected_donate_reaches_the_widget(server):
+    payload = server.inject("widget", client_name="Raider", amount=500)
+    response = requests.get(f"{server.url}/widget/widget/token/token/info").json()
+    assert response["clientName"] == payload["clientName"] == "Raider"
+    assert response["amount"] == "500"
+
+
+def test_rejects_unknown_tokens_and_injects_errors():
+    async def main() -> None:
+        async with MockServer(tokens=["good"], history=0) as server:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"{server.url}/api/v1/me", headers={"X-Token": "bad"}) as resp:
+                    assert resp.status == 401
+                server.error_rate = 1
+                async with session.get(f"{server.url}/api/v1/me", headers={"X-Token": "good"}) as resp:
+                    assert resp.status == 503
+
+    asyncio.run(main())
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+import pytest
+
+from donatello.models import parse_datetime, parse_datetimes
+
+
+@pytest.mark.parametrize("value", ["2023-05-01 12:00:00", "1999-12-31 23:59:59", "2024-02-29 00:00:01"])
+def test_matches_strptime(value):
+    assert parse_datetime(value) == datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+
+
+@pytest.mark.parametrize("value", ["2023-13-01 12:00:00", "2023-05-01T12:00:00", "2023-05-01 12:0a:00", ""])
+def test_rejects_malformed(value):
+    with pytest.raises(ValueError):
+        parse_datetime(value)
+
+
+def test_datetimes_pass_through():
+    now = datetime.now()
+    assert parse_datetime(now) is now
+    assert parse_datetimes(["2023-05-01 12:00:00", now, "2023-05-01 12:00:00"]) \
+        == [datetime(2023, 5, 1, 12), now, datetime(2023, 5, 1, 12)]